@@ -0,0 +1,146 @@
+#
+# Content-addressed cache for converted assets
+#
+# Converter outputs are stored under a hash of the converter name, its version,
+# its parameters and the contents of all its input files. Entries live in:
+#
+#   build/cache/ (or folder set by environment variable UNITY_CACHE)
+#
+# Converters declare a version number, which should be increased whenever their
+# output changes. The cache is capped to 256 MB (or UNITY_CACHE_SIZE in MB, 0 to disable), and
+# least recently used entries are evicted first. Entries are written atomically,
+# so that the same folder can be shared between several builds and hosts.
+#
+
+import hashlib, os, pickle
+
+scriptDir = os.path.dirname(os.path.abspath(__file__))
+
+hashes = {}
+
+def FileHash(filename):
+    # Return hash of file contents (only read once per process, unless modified)
+    stat = os.stat(filename)
+    ident = (os.path.abspath(filename), stat.st_mtime, stat.st_size)
+    if ident not in hashes:
+        f = open(filename, 'rb')
+        hashes[ident] = hashlib.sha1(f.read()).hexdigest()
+        f.close()
+    return hashes[ident]
+
+class AssetCache:
+
+    folder = None
+    maxSize = 0
+    hits = 0
+    misses = 0
+
+    def __init__(self, folder=None, maxSize=None):
+        if folder is None:
+            folder = os.environ.get('UNITY_CACHE', os.path.join(scriptDir, '..', '..', 'build', 'cache'))
+        if maxSize is None:
+            maxSize = int(os.environ.get('UNITY_CACHE_SIZE', '256')) * 1024 * 1024
+        self.folder = os.path.abspath(folder)
+        self.maxSize = maxSize
+
+    def Enabled(self):
+        return self.maxSize > 0
+
+    def Key(self, params, inputs):
+        # Hash parameters (converter, version, settings...) and input file contents
+        digest = hashlib.sha1(repr(params))
+        for filename in inputs:
+            digest.update(FileHash(filename))
+        return digest.hexdigest()
+
+    def Path(self, key):
+        return os.path.join(self.folder, key[0:2], key)
+
+    def Load(self, key):
+        # Return list of cached data blocks (or None if missing)
+        if not self.Enabled():
+            return None
+        path = self.Path(key)
+        try:
+            f = open(path, 'rb')
+            blobs = pickle.load(f)
+            f.close()
+            os.utime(path, None)    # Mark as recently used
+        except (IOError, OSError, EOFError, pickle.UnpicklingError):
+            self.misses += 1
+            return None
+        return blobs
+
+    def Save(self, key, blobs):
+        # Save list of data blocks to cache
+        if not self.Enabled():
+            return
+        path = self.Path(key)
+        temp = path + '.' + str(os.getpid()) + '.tmp'
+        try:
+            if not os.path.exists(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            f = open(temp, 'wb')
+            pickle.dump(blobs, f, 2)
+            f.close()
+            if os.path.exists(path):
+                os.remove(path)
+            os.rename(temp, path)
+        except (IOError, OSError):
+            # Another build got there first
+            try:
+                os.remove(temp)
+            except OSError:
+                pass
+
+    def Fetch(self, key, outputs):
+        # Copy cached data to output files (return False if missing)
+        blobs = self.Load(key)
+        if blobs is None:
+            return False
+        if len(blobs) != len(outputs):
+            self.misses += 1
+            return False
+        for i in range(len(outputs)):
+            f = open(outputs[i], 'wb')
+            f.write(blobs[i])
+            f.close()
+        self.hits += 1
+        return True
+
+    def Store(self, key, outputs):
+        # Save contents of output files to cache
+        blobs = []
+        for filename in outputs:
+            f = open(filename, 'rb')
+            blobs.append(f.read())
+            f.close()
+        self.Save(key, blobs)
+
+    def Trim(self):
+        # Evict least recently used entries until cache fits within size cap
+        if not self.Enabled() or not os.path.exists(self.folder):
+            return
+        entries = []
+        total = 0
+        for root, dirs, files in os.walk(self.folder):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+        entries.sort()
+        for mtime, size, path in entries:
+            if total <= self.maxSize:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def Report(self):
+        print "Asset cache: %i hits, %i misses (%s)" % (self.hits, self.misses, self.folder)
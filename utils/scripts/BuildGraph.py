@@ -0,0 +1,497 @@
+"""
+ * Copyright (c) 2020 Anthony Beaucamp.
+ *
+ * This software is provided 'as-is', without any express or implied warranty.
+ * In no event will the authors be held liable for any damages arising from
+ * the use of this software.
+ *
+ * Permission is granted to anyone to use this software for any purpose,
+ * including commercial applications, and to alter it and redistribute it
+ * freely, subject to the following restrictions:
+ *
+ *   1. The origin of this software must not be misrepresented * you must not
+ *   claim that you wrote the original software. If you use this software in a
+ *   product, an acknowledgment in the product documentation would be
+ *   appreciated but is not required.
+ *
+ *   2. Altered source versions must be plainly marked as such, and must not
+ *   be misrepresented as being the original software.
+ *
+ *   3. This notice may not be removed or altered from any distribution.
+ *
+ *   4. The names of this software and/or it's copyright holders may not be
+ *   used to endorse or promote products derived from this software without
+ *   specific prior written permission.
+"""
+
+#
+# Build graph generator (ninja files for Linux/Unix hosts)
+#
+#   Writes build/<disk>-<target>.ninja next to the .bat scripts, covering asset
+#   conversion, unity library compilation, linking, compression and disk image
+#   creation with explicit inputs and outputs. Run from the 8bit-Unity folder:
+#
+#     ninja -f build/diskname-c64.ninja -j8
+#
+#   Independent steps are run in parallel, and steps that are up to date are
+#   skipped. Tool names can be changed in the variables at the top of each file.
+#
+
+import os, glob
+from ProcessAssets import converters
+from UnityLib import LibFolder
+
+targets = ['apple64k', 'apple128k', 'atari', 'c64', 'lynx', 'oric']
+
+# Tools (names of executables in the PATH)
+tools = [ ('python', 'python2'), ('cl65', 'cl65'),
+          ('exomizer', 'exomizer'), ('sidreloc', 'sidreloc'), ('psid64', 'psid64'), ('mads', 'mads'),
+          ('header', 'header'), ('ym2mym', 'ym2mym') ]
+
+def FileBase(filepath, suffix):
+    # Return asset file base
+    return os.path.basename(filepath).lower().replace(suffix, '')
+
+def Escape(path):
+    # Escape special characters of ninja paths
+    return path.replace('$', '$$').replace(' ', '$ ').replace(':', '$:')
+
+def ChunkSources(root, chunkDefs):
+    # Return list of bitmaps used in chunks definition file
+    sources = []
+    try:
+        with open(root + chunkDefs, "r") as fp:
+            for line in fp:
+                if line[0] == '\'':
+                    source = os.path.dirname(chunkDefs) + '/' + line[1:line.index('\'', 1)]
+                    if source not in sources:
+                        sources.append(source)
+    except IOError:
+        pass
+    return sources
+
+def CodeHeaders(root, code):
+    # Return headers that the project code may include
+    headers = []
+    for folder in sorted(set([os.path.dirname(item) for item in code])):
+        for item in sorted(glob.glob(root + folder + '/*.h')):
+            headers.append(folder + '/' + os.path.basename(item))
+    return headers
+
+############################################
+# Ninja file writer
+class Ninja:
+
+    fp = None
+
+    def __init__(self, fp):
+        self.fp = fp
+
+    def Comment(self, text):
+        self.fp.write('# ' + text + '\n')
+
+    def Variable(self, name, value):
+        self.fp.write(name + ' = ' + value + '\n')
+
+    def Rule(self, name, command, description=None, restat=False):
+        self.fp.write('rule ' + name + '\n')
+        self.fp.write('  command = ' + command + '\n')
+        if description:
+            self.fp.write('  description = ' + description + '\n')
+        if restat:
+            self.fp.write('  restat = 1\n')
+        self.fp.write('\n')
+
+    def Build(self, outputs, rule, inputs=[], implicit=[], variables=[]):
+        line = 'build ' + ' '.join([Escape(f) for f in outputs]) + ': ' + rule
+        if len(inputs) > 0:
+            line += ' ' + ' '.join([Escape(f) for f in inputs])
+        if len(implicit) > 0:
+            line += ' | ' + ' '.join([Escape(f) for f in implicit])
+        self.fp.write(line + '\n')
+        for name, value in variables:
+            self.fp.write('  ' + name + ' = ' + value + '\n')
+        self.fp.write('\n')
+
+############################################
+# Common graph sections
+def WriteHeader(n, target):
+    n.Comment('Build graph for ' + target + ' (generated by builder.py)')
+    n.Comment('Run from the 8bit-Unity folder with: ninja -f <this file>')
+    n.fp.write('\n')
+    n.Variable('ninja_required_version', '1.7')
+    n.Variable('builddir', 'build/ninja-' + target)
+    for name, value in tools:
+        n.Variable(name, value)
+    n.fp.write('\n')
+
+    # Rules
+    n.Rule('convert', '$python utils/scripts/ProcessAssets.py $args', 'CONVERT $out')
+    n.Rule('unitylib', '$python utils/scripts/UnityLib.py $args', 'UNITYLIB $out', restat=True)
+    n.Rule('cl65', '$cl65 -o $out -m $map -Cl -O -t $target $ldflags -I unity $in', 'CL65 $out')
+    n.Rule('copy', 'cp $in $out', 'COPY $out')
+    n.Rule('run', '$command', '$description')
+    n.Build(['always'], 'phony')
+
+def Convert(n, root, line, folder):
+    # Asset conversion step (inputs and outputs are given by the converter arguments)
+    args = line.split()
+    folderName, script, function, spec, bundled = converters[args[0]]
+    inputs = []
+    outputs = []
+    implicit = [os.path.join('utils/scripts', folderName, script).replace('\\', '/')]
+    implicit += ['utils/scripts/' + item for item in bundled]
+    for i in range(len(args)-1):
+        if spec[i] == 'i':
+            inputs.append(args[i+1])
+            if 'd' in spec:
+                implicit += ChunkSources(root, args[i+1])
+        elif spec[i] == 'c':
+            inputs.append(args[i+1])
+            implicit.append(args[i+1][0:args[i+1].rindex('-')] + '.csv')
+        elif spec[i] == 'o':
+            outputs.append(args[i+1])
+        elif spec[i] == 'd':
+            outputs.append(folder + 'chunks.lst')
+    n.Build(outputs, 'convert', inputs, implicit, [('args', line)])
+    return outputs
+
+def UnityLib(n, platform, defines=[]):
+    # Shared unity library (UnityLib.py checks which objects are out of date)
+    lib = LibFolder(platform, defines) + 'unity.lib'
+    n.Build([lib], 'unitylib', [], ['always'], [('args', ' '.join([platform] + defines))])
+    return lib
+
+def Run(n, outputs, command, description, inputs=[], implicit=[]):
+    # Custom shell command step ($in and $out are not defined in build scope)
+    inList = ' '.join([Escape(f) for f in inputs])
+    outList = ' '.join([Escape(f) for f in outputs])
+    command = command.replace('$in', inList).replace('$out', outList)
+    description = description.replace('$out', outList)
+    n.Build(outputs, 'run', inputs, implicit, [('command', command), ('description', description)])
+
+def ChunkLoop(folder, command):
+    # Shell loop over files listed in chunks.lst ($$f is the chunk file)
+    return 'for f in $$(cat ' + folder + 'chunks.lst); do ' + command + '; done'
+
+############################################
+# Apple graph
+def WriteApple(n, project, root, target):
+    diskname = project['Disk']
+    folder = 'build/' + target + '/'
+    bitmaps = project['AppleBitmap']
+    charset = project['AppleCharset']
+    sprites = project['AppleSprites']
+    chunks = project['AppleChunks']
+    music = project['AppleMusic']
+    if target == 'apple128k':
+        graphics = 'double'
+        defines = ['__DHR__']
+    else:
+        graphics = 'single'
+        defines = []
+
+    # Assets
+    assets = []
+    for item in bitmaps:
+        assets += Convert(n, root, 'AppleBitmap ' + graphics + ' ' + item + ' ' + folder + FileBase(item, '-apple.png') + '.img', folder)
+    if len(charset) > 0:
+        assets += Convert(n, root, 'AppleCharset ' + graphics + ' ' + charset[0] + ' ' + folder + FileBase(charset[0], '-apple.png') + '.dat', folder)
+    if len(sprites) > 0:
+        assets += Convert(n, root, 'AppleSprites ' + graphics + ' ' + sprites[0] + ' ' + folder + 'sprites.dat ' + str(int(project['AppleSpriteHeight'])), folder)
+    if len(chunks) > 0:
+        assets += Convert(n, root, 'ProcessChunks apple-' + graphics + ' ' + chunks[0] + ' ' + folder, folder)
+
+    # Compilation and compression
+    lib = UnityLib(n, 'apple', defines)
+    ldflags = ' '.join(['-D ' + define for define in defines]) + " -Wl '-D,__STACKSIZE__=$$0400,-D,__HIMEM__=$$A800,-D,__LCADDR__=$$D000,-D,__LCSIZE__=$$1000' -C apple2-hgr.cfg"
+    binary = folder + diskname.lower() + '.bin'
+    n.Build([binary], 'cl65', project['Code'] + [lib, 'unity/IP65/ip65_tcp.lib', 'unity/IP65/ip65_apple2.lib'], CodeHeaders(root, project['Code']),
+            [('target', 'apple2'), ('ldflags', ldflags), ('map', 'build/' + diskname.lower() + '-' + target + '.map')])
+    Run(n, [folder + 'loader'], '$exomizer sfx bin $in -o $out', 'EXOMIZER $out', [binary])
+
+    # Disk builder
+    disk = 'build/' + diskname + '-' + target + '.do'
+    cmd = '$python utils/scripts/apple/ProDOS.py utils/scripts/apple/ProDOS190.dsk $out ' + folder + 'loader'
+    files = []
+    if len(sprites) > 0:
+        files.append(('SPRITES.DAT', folder + 'sprites.dat'))
+    for item in bitmaps:
+        fb = FileBase(item, '-apple.png')
+        files.append((fb.upper() + '.IMG', folder + fb + '.img'))
+    if len(charset) > 0:
+        fb = FileBase(charset[0], '-apple.png')
+        files.append((fb.upper() + '.DAT', folder + fb + '.dat'))
+    for item in project['Charmap']:
+        files.append((FileBase(item, '.map').upper() + '.MAP', item))
+    for item in music:
+        files.append((FileBase(item, '-apple.m').upper() + '.MUS', item))
+    for item in project['Shared']:
+        files.append((FileBase(item, '').upper(), item))
+    for name, item in files:
+        cmd += ' ' + name + '=' + item
+    if len(chunks) > 0:
+        cmd += ' @' + folder + 'chunks.lst'
+    Run(n, [disk], cmd, 'DISK $out', [folder + 'loader'], [item for name, item in files] + assets + ['utils/scripts/apple/ProDOS190.dsk'])
+    return disk
+
+############################################
+# Atari graph
+def WriteAtari(n, project, root, target):
+    diskname = project['Disk']
+    folder = 'build/atari/'
+    bitmaps = project['AtariBitmap']
+    charset = project['AtariCharset']
+    sprites = project['AtariSprites']
+    chunks = project['AtariChunks']
+    music = project['AtariMusic']
+
+    # Assets
+    assets = []
+    for item in bitmaps:
+        assets += Convert(n, root, 'AtariBitmap ' + item + ' ' + folder + FileBase(item, '-atari.png') + '.img', folder)
+    if len(charset) > 0:
+        assets += Convert(n, root, 'AtariCharset ' + charset[0] + ' ' + folder + FileBase(charset[0], '-atari.png') + '.dat', folder)
+    if len(sprites) > 0:
+        assets += Convert(n, root, 'AtariSprites ' + sprites[0] + ' ' + folder + 'sprites.dat ' + str(int(project['AtariSpriteHeight'])), folder)
+    if len(chunks) > 0:
+        assets += Convert(n, root, 'ProcessChunks atari ' + chunks[0] + ' ' + folder, folder)
+
+    # Compilation
+    lib = UnityLib(n, 'atari')
+    if project['AtariNoText']:
+        ldflags = "-Wl '-D,__STACKSIZE__=$$0400,-D,__CHARGENSIZE__=$$0000' -C atarixl-largehimem.cfg"
+    else:
+        ldflags = "-Wl '-D,__STACKSIZE__=$$0400' -C atarixl-largehimem.cfg"
+    binary = folder + diskname.lower() + '.bin'
+    n.Build([binary], 'cl65', project['Code'] + ['unity/Atari/POKEY.s', lib, 'unity/IP65/ip65_tcp.lib', 'unity/IP65/ip65_atarixl.lib'], CodeHeaders(root, project['Code']),
+            [('target', 'atarixl'), ('ldflags', ldflags), ('map', 'build/' + diskname.lower() + '-atari.map')])
+    Run(n, [folder + 'basicoff.bin'], '$cl65 -t atarixl -C atari-asm.cfg -o $out $in', 'CL65 $out', ['unity/Atari/BASICOFF.s'])
+    Run(n, [folder + 'rmt.bin'], '$mads -o:$out $in', 'MADS $out', ['unity/Atari/RMT.a65'])
+
+    # Disk builder (linking basicoff, program and rmt player into xautorun)
+    if project['AtariDiskSize'] == '180KB':
+        diskSize = '720'
+    else:
+        diskSize = '1440'
+    linked = [folder + 'basicoff.bin', binary, folder + 'rmt.bin']
+    files = [('autorun', 'utils/scripts/atari/xbios.com'), ('xbios.cfg', 'utils/scripts/atari/xbios.cfg'), ('xautorun', '+'.join(linked))]
+    files += [(os.path.basename(item), item) for item in assets if not item.endswith('chunks.lst')]
+    files += [(FileBase(item, ''), item) for item in project['Charmap'] + project['Shared']]
+    files += [(FileBase(item, '-atari.rmt') + '.mus', item) for item in music]
+    cmd = '$python utils/scripts/atari/ATR.py $out ' + diskSize + ' utils/scripts/atari/xboot.obx'
+    for name, item in files:
+        cmd += ' ' + name + '=' + item
+    if len(chunks) > 0:
+        cmd += ' @' + folder + 'chunks.lst'
+    disk = 'build/' + diskname + '-atari.atr'
+    Run(n, [disk], cmd, 'DISK $out', linked, [item for name, item in files if '+' not in item] + [item for item in assets if item.endswith('chunks.lst')] + ['utils/scripts/atari/xboot.obx'])
+    return disk
+
+############################################
+# C64 graph
+def WriteC64(n, project, root, target):
+    diskname = project['Disk']
+    folder = 'build/c64/'
+    bitmaps = project['C64Bitmap']
+    charset = project['C64Charset']
+    sprites = project['C64Sprites']
+    chunks = project['C64Chunks']
+    music = project['C64Music']
+
+    # Assets
+    assets = []
+    for item in bitmaps:
+        assets += Convert(n, root, 'C64Bitmap ' + item + ' ' + folder + FileBase(item, '-c64.png') + '.img', folder)
+    if len(charset) > 0:
+        assets += Convert(n, root, 'C64Charset ' + charset[0] + ' ' + folder + FileBase(charset[0], '-c64.png') + '.dat', folder)
+    if len(sprites) > 0:
+        assets += Convert(n, root, 'C64Sprites ' + sprites[0] + ' ' + folder + 'sprites.dat', folder)
+    if len(chunks) > 0:
+        assets += Convert(n, root, 'ProcessChunks c64 ' + chunks[0] + ' ' + folder, folder)
+
+    # Music (use original file if relocation is impossible)
+    for item in music:
+        fb = FileBase(item, '-c64.sid')
+        Run(n, [folder + fb + '.prg'], '($sidreloc -v -z 30-ff -p 08 $in ' + folder + fb + '.sid && $psid64 -n ' + folder + fb + '.sid) || cp $in $out', 'SIDRELOC $out', [item])
+
+    # Compilation and compression
+    lib = UnityLib(n, 'c64')
+    binary = folder + diskname.lower() + '.bin'
+    n.Build([binary], 'cl65', project['Code'] + [lib, 'unity/IP65/ip65_tcp.lib', 'unity/IP65/ip65_c64.lib'], CodeHeaders(root, project['Code']) + ['unity/C64/c64.cfg'],
+            [('target', 'c64'), ('ldflags', '-C unity/C64/c64.cfg'), ('map', 'build/' + diskname.lower() + '-c64.map')])
+    if len(sprites) > 0:
+        Run(n, [folder + 'loader.prg'], "$exomizer sfx '$$180d' $in -o $out", 'EXOMIZER $out', [binary, folder + 'sprites.dat'])
+    else:
+        Run(n, [folder + 'loader.prg'], "$exomizer sfx '$$180d' $in -o $out", 'EXOMIZER $out', [binary])
+
+    # Disk builder
+    files = [(folder + 'loader.prg', 'loader.prg')]
+    for item in bitmaps:
+        fb = FileBase(item, '-c64.png')
+        files.append((folder + fb + '.img', fb + '.img'))
+    if len(charset) > 0:
+        fb = FileBase(charset[0], '-c64.png')
+        files.append((folder + fb + '.dat', fb + '.dat'))
+    for item in project['Charmap']:
+        files.append((item, FileBase(item, '')))
+    for item in music:
+        fb = FileBase(item, '-c64.sid')
+        files.append((folder + fb + '.prg', fb + '.mus'))
+    for item in project['Shared']:
+        files.append((item, FileBase(item, '')))
+    cmd = '$python utils/scripts/c64/D64.py $out loader,666'
+    for item, name in files:
+        cmd += ' ' + name + '=' + item
+    if len(chunks) > 0:
+        cmd += ' @' + folder + 'chunks.lst'
+    disk = 'build/' + diskname + '-c64.d64'
+    Run(n, [disk], cmd, 'DISK $out', [folder + 'loader.prg'], [item for item, name in files[1:]] + assets)
+    return disk
+
+############################################
+# Lynx graph
+def WriteLynx(n, project, root, target):
+    diskname = project['Disk']
+    folder = 'build/lynx/'
+    bitmaps = project['LynxBitmap']
+    charset = project['LynxCharset']
+    sprites = project['LynxSprites']
+    chunks = project['LynxChunks']
+    music = project['LynxMusic']
+    charmaps = project['Charmap']
+    shared = project['Shared']
+
+    # Keyboard and Bitmaps
+    data = []
+    for item, fb in [('utils/scripts/lynx/cursor.png', 'cursor'), ('utils/scripts/lynx/keyboard.png', 'keyboard')] + [(item, FileBase(item, '-lynx.png')) for item in bitmaps]:
+        data += Convert(n, root, 'LynxSprites ' + item + ' ' + folder + fb + '.spr literal', folder)
+
+    # Charset (128 chars of 4x6 pixels in each file)
+    if len(charset) > 0:
+        for item, fb in [(charset[0], 'char'), ('utils/scripts/lynx/font.png', 'font')]:
+            data += Convert(n, root, 'LynxSprites ' + item + ' ' + folder + fb + '.spr literal 32,4 4,6 0,0', folder)
+        data += Convert(n, root, 'LynxCharset ' + charset[0] + ' ' + folder + 'charset.dat', folder)
+
+    # Sprites (action point in centre of frames)
+    spriteFrames = 0
+    if len(sprites) > 0:
+        spriteFrames = int(project['LynxSpriteFrames'])
+        spriteWidth  = int(project['LynxSpriteWidth'])
+        spriteHeight = int(project['LynxSpriteHeight'])
+        data += Convert(n, root, 'LynxSprites ' + sprites[0] + ' ' + folder + 'sprites.spr literal 1,' + str(spriteFrames) + ' ' + \
+                                 str(spriteWidth) + ',' + str(spriteHeight) + ' ' + str(spriteWidth/2) + ',' + str(spriteHeight/2), folder)
+
+    # Charmaps and Shared files
+    for item in charmaps + shared:
+        n.Build([folder + FileBase(item, '')], 'copy', [item])
+        data.append(folder + FileBase(item, ''))
+
+    # Chunks
+    if len(chunks) > 0:
+        data += Convert(n, root, 'ProcessChunks lynx ' + chunks[0] + ' ' + folder, folder)
+        chunkNum = '$$(cat ' + folder + 'chunks.lst | wc -l)'
+    else:
+        chunkNum = '0'
+
+    # Chipper sfx and music data
+    musicAsm = []
+    n.Build([folder + 'soundbs.mac'], 'copy', ['unity/Lynx/chipper.s'])
+    for i in range(len(music)):
+        asm = folder + 'music' + str(i).zfill(2) + '.asm'
+        Run(n, [asm], '$python utils/scripts/lynx/LynxChipper.py $in $out _musData' + str(i).zfill(2) + ' MUS' + str(i) + 'DATA', 'CHIPPER $out', [music[i]], [folder + 'soundbs.mac'])
+        musicAsm.append(asm)
+
+    # Data, config and directory files
+    names = [','.join([FileBase(item, '-lynx.png') for item in bitmaps]), ','.join([FileBase(item, '') for item in charmaps]),
+             ','.join([FileBase(item, '-lynx.asm') for item in music]), ','.join([FileBase(item, '') for item in shared])]
+    Run(n, [folder + 'data.asm'], '$python utils/scripts/lynx/LynxData.py ' + folder + ' "' + '" "'.join(names) + '" ' + str(int(len(charset) > 0)) + ' ' + str(spriteFrames) + ' ' + str(project['LynxSpriteFrames']),
+        'DATA $out', data + musicAsm, ['utils/scripts/lynx/LynxData.py'])
+    counts = ' ' + str(len(bitmaps)+len(charmaps)) + ' ' + str(len(music)) + ' ' + str(len(shared)) + ' ' + chunkNum
+    Run(n, [folder + 'lynx.cfg'], '$python utils/scripts/lynx/LynxConfig.py $in $out' + counts, 'CONFIG $out', ['unity/Lynx/lynx.cfg'], [folder + 'data.asm'])
+    Run(n, [folder + 'directory.asm'], '$python utils/scripts/lynx/LynxDirectory.py $in $out' + counts, 'DIRECTORY $out', ['unity/Lynx/directory.s'], [folder + 'data.asm'])
+
+    # Compilation
+    lib = UnityLib(n, 'lynx')
+    disk = 'build/' + diskname.lower() + '-lynx.lnx'
+    n.Build([disk], 'cl65', project['Code'] + musicAsm + ['unity/Lynx/sfx.s', folder + 'directory.asm', folder + 'data.asm', lib], CodeHeaders(root, project['Code']) + [folder + 'lynx.cfg'],
+            [('target', 'lynx'), ('ldflags', '-C ' + folder + 'lynx.cfg'), ('map', 'build/' + diskname.lower() + '-lynx.map')])
+    return disk
+
+############################################
+# Oric graph
+def WriteOric(n, project, root, target):
+    diskname = project['Disk']
+    folder = 'build/oric/'
+    bitmaps = project['OricBitmap']
+    charset = project['OricCharset']
+    sprites = project['OricSprites']
+    chunks = project['OricChunks']
+    music = project['OricMusic']
+    dithering = project['OricDithering']
+    quality = project['OricImageQuality']
+
+    # Assets (headers are added when building the disk)
+    files = []
+    for item in bitmaps:
+        fb = FileBase(item, '-oric.png')
+        if quality == 'Hires(Noisy)':
+            Convert(n, root, 'PictOric ' + dithering + ' ' + item + ' ' + folder + fb + '.dat', folder)
+        else:
+            Convert(n, root, 'OricBitmap ' + item + ' ' + folder + fb + '.dat', folder)
+    if len(sprites) > 0:
+        Convert(n, root, 'OricSprites ' + sprites[0] + ' ' + folder + 'sprites.dat ' + str(int(project['OricSpriteHeight'])), folder)
+        files.append(('sprites.dat', folder + 'sprites.dat', '0x7800'))
+    files += [(FileBase(item, '-oric.png') + '.img', folder + FileBase(item, '-oric.png') + '.dat', '0xA000') for item in bitmaps]
+    if len(charset) > 0:
+        fb = FileBase(charset[0], '-oric.png')
+        Convert(n, root, 'OricCharset ' + dithering + ' ' + charset[0] + ' ' + folder + fb + '.dat', folder)
+        files.append((fb + '.dat', folder + fb + '.dat', '0xA000'))
+    for item in project['Charmap']:
+        files.append((FileBase(item, ''), item, '0xA000'))
+    for item in music:
+        fb = FileBase(item, '-oric.ym')
+        Run(n, [folder + fb + '.mus'], '$ym2mym $in $out', 'YM2MYM $out', [item])
+        files.append((fb + '.mus', folder + fb + '.mus', '0x8000'))
+    for item in project['Shared']:
+        files.append((FileBase(item, ''), item, '0xA000'))
+    if len(chunks) > 0:
+        line = 'OricChunks "' + quality + '" ' + dithering + ' ' + chunks[0] + ' ' + folder
+        Run(n, [folder + 'chunks.lst'], '$python utils/scripts/ProcessAssets.py ' + line, 'CONVERT $out',
+            [chunks[0]], ['utils/scripts/oric/ProcessChunks.py', 'utils/scripts/oric/PictOric.py', 'utils/scripts/oric/OricBitmap.py', 'utils/scripts/Palette.py', 'utils/scripts/ImageCache.py'] + ChunkSources(root, chunks[0]))
+
+    # Compilation and compression
+    lib = UnityLib(n, 'oric')
+    binary = folder + diskname.lower() + '.bin'
+    n.Build([binary], 'cl65', project['Code'] + [lib], CodeHeaders(root, project['Code']) + ['unity/Oric/oric.cfg'],
+            [('target', 'atmos'), ('ldflags', '-C unity/Oric/oric.cfg'), ('map', 'build/' + diskname.lower() + '-oric.map')])
+    Run(n, [folder + diskname.lower() + '.com'], "$header $in $out '$$0501'", 'HEADER $out', [binary])
+    Run(n, [folder + 'launch.com'], '$exomizer sfx bin $in -o $out', 'EXOMIZER $out', [folder + diskname.lower() + '.com'])
+
+    # Disk builder
+    disk = 'build/' + diskname + '-oric.dsk'
+    cmd = '$python utils/scripts/oric/OricDisk.py $out ' + folder + 'launch.com'
+    for name, item, address in files:
+        cmd += ' ' + name + '=' + item + ',' + address
+    implicit = [item for name, item, address in files]
+    if len(chunks) > 0:
+        cmd += ' @' + folder + 'chunks.lst,0x8000'
+        implicit.append(folder + 'chunks.lst')
+    Run(n, [disk], cmd, 'DISK $out', [folder + 'launch.com'], implicit)
+    return disk
+
+############################################
+# Write ninja files for all targets
+writers = { 'apple64k': WriteApple, 'apple128k': WriteApple, 'atari': WriteAtari, 'c64': WriteC64, 'lynx': WriteLynx, 'oric': WriteOric }
+
+def WriteNinja(project, target, filename, root):
+    with open(filename, "wb") as fp:
+        n = Ninja(fp)
+        WriteHeader(n, target)
+        disk = writers[target](n, project, root, target)
+        fp.write('default ' + Escape(disk) + '\n')
+
+def WriteBuildGraph(project, root='../../'):
+    # Paths in the project are relative to the 8bit-Unity folder (root)
+    for target in targets:
+        WriteNinja(project, target, root + 'build/' + project['Disk'] + '-' + target + '.ninja', root)
@@ -0,0 +1,170 @@
+"""
+ * Copyright (c) 2020 Anthony Beaucamp.
+ *
+ * This software is provided 'as-is', without any express or implied warranty.
+ * In no event will the authors be held liable for any damages arising from
+ * the use of this software.
+ *
+ * Permission is granted to anyone to use this software for any purpose,
+ * including commercial applications, and to alter it and redistribute it
+ * freely, subject to the following restrictions:
+ *
+ *   1. The origin of this software must not be misrepresented * you must not
+ *   claim that you wrote the original software. If you use this software in a
+ *   product, an acknowledgment in the product documentation would be
+ *   appreciated but is not required.
+ *
+ *   2. Altered source versions must be plainly marked as such, and must not
+ *   be misrepresented as being the original software.
+ *
+ *   3. This notice may not be removed or altered from any distribution.
+ *
+ *   4. The names of this software and/or it's copyright holders may not be
+ *   used to endorse or promote products derived from this software without
+ *   specific prior written permission.
+"""
+
+#
+# Headless builder (no Tk/pygubu required)
+#
+# Usage: BuildProject.py [-w workers] [-j jobs] project.builder [targets...]
+#
+#   Loads a project saved by builder.py, writes the ninja build graphs and runs
+#   the pipelines of all targets (apple64k, apple128k, atari, c64, lynx, oric)
+#   concurrently. The output of each target is logged to build/<disk>-<target>.log
+#   and a summary of results and wall times is printed at the end.
+#
+
+import argparse, os, pickle, subprocess, sys, time
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
+from BuildGraph import targets, WriteBuildGraph
+
+rootDir = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')) + '/'
+
+############################################
+# Names of fields in .builder files (in the order of Application.entries, listboxes, checkbuttons and comboboxes)
+entryNames = [ 'Disk',
+               'AppleSpriteFrames', 'AppleSpriteWidth', 'AppleSpriteHeight',
+               'AtariSpriteFrames', 'AtariSpriteWidth', 'AtariSpriteHeight',
+               'C64SpriteFrames',   'C64SpriteWidth',   'C64SpriteHeight',
+               'LynxSpriteFrames',  'LynxSpriteWidth',  'LynxSpriteHeight',
+               'OricSpriteFrames',  'OricSpriteWidth',  'OricSpriteHeight',
+               'OricDithering' ]
+listNames = [ 'Code',
+              'AppleBitmap',  'AppleSprites', 'AppleMusic',
+              'AtariBitmap',  'AtariSprites', 'AtariMusic',
+              'C64Bitmap',    'C64Sprites',   'C64Music',
+              'OricBitmap',   'OricSprites',  'OricMusic',
+              'Shared',
+              'LynxBitmap',   'LynxSprites',  'LynxMusic',
+              'AppleChunks',  'AtariChunks',  'C64Chunks',
+              'LynxChunks',   'OricChunks',
+              'AppleCharset', 'AtariCharset', 'C64Charset',
+              'LynxCharset',  'OricCharset',
+              'Charmap' ]
+checkNames = [ 'AtariNoText' ]
+comboNames = [ 'AtariDiskSize', 'OricImageQuality' ]
+
+def LoadProject(filename):
+    # Defaults (for fields missing from legacy files)
+    project = { 'AtariNoText': False, 'AtariDiskSize': '180KB', 'OricImageQuality': 'Hires(Noisy)' }
+    for name in entryNames:
+        project[name] = '0'
+    project['Disk'] = 'diskname'
+    project['OricDithering'] = '0.2'
+    for name in listNames:
+        project[name] = []
+
+    # Unpickle data (same sequence as Application.FileLoad)
+    with open(filename, "rb") as fp:
+        print "File version: " + str(pickle.load(fp))
+        try:
+            data = pickle.load(fp)
+            while data != 'entries':
+                data = pickle.load(fp)
+            for name in entryNames:
+                data = pickle.load(fp)
+                if data == 'listboxes' or data == 'lists':
+                    break   # Legacy file
+                project[name] = data
+            while data != 'listboxes' and data != 'lists':
+                data = pickle.load(fp)
+            for name in listNames:
+                data = pickle.load(fp)
+                if data == 'checkbuttons':
+                    break   # Legacy file
+                project[name] = list(data)
+            while data != 'checkbuttons':
+                data = pickle.load(fp)
+            for name in checkNames:
+                data = pickle.load(fp)
+                if data == 'comboboxes':
+                    break   # Legacy file
+                project[name] = 'selected' in data
+            while data != 'comboboxes':
+                data = pickle.load(fp)
+            for name in comboNames:
+                project[name] = pickle.load(fp)
+        except EOFError:
+            pass    # Legacy file
+    return project
+
+############################################
+# Run pipeline of one target (and return result, time and log file)
+def BuildTarget(project, target, ninja, jobs):
+    graph = 'build/' + project['Disk'] + '-' + target + '.ninja'
+    log = 'build/' + project['Disk'] + '-' + target + '.log'
+    start = time.time()
+    with open(rootDir + log, "wb") as fp:
+        try:
+            result = subprocess.call([ninja, '-f', graph, '-j', str(jobs)], cwd=rootDir, stdout=fp, stderr=subprocess.STDOUT)
+        except OSError:
+            fp.write("Error: cannot run '" + ninja + "'\n")
+            result = -1
+    return (target, result == 0, time.time() - start, log)
+
+def BuildProject(filename, selection=[], workers=None, jobs=None, ninja='ninja'):
+    project = LoadProject(filename)
+    if len(selection) == 0:
+        selection = targets
+    for target in selection:
+        if target not in targets:
+            print "Error: unknown target '" + target + "' (use " + ', '.join(targets) + ")"
+            return False
+
+    # Write build graphs
+    if not os.path.exists(rootDir + 'build'):
+        os.makedirs(rootDir + 'build')
+    WriteBuildGraph(project, rootDir)
+
+    # Run pipelines on bounded pool
+    if workers is None:
+        workers = min(len(selection), cpu_count())
+    if jobs is None:
+        jobs = max(1, cpu_count() / workers)
+    start = time.time()
+    pool = ThreadPool(workers)
+    results = pool.map(lambda target: BuildTarget(project, target, ninja, jobs), selection)
+    pool.close()
+
+    # Print summary
+    print "%-10s %-8s %8s" % ('Target', 'Result', 'Time')
+    for target, success, duration, log in results:
+        if success:
+            print "%-10s %-8s %7.1fs" % (target, 'OK', duration)
+        else:
+            print "%-10s %-8s %7.1fs  (see %s)" % (target, 'FAILED', duration, log)
+    print "Total: %.1fs" % (time.time() - start)
+    return False not in [success for target, success, duration, log in results]
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build 8bit-Unity project without the GUI')
+    parser.add_argument('project', help='project file (.builder)')
+    parser.add_argument('targets', nargs='*', help='targets to build (default: all)')
+    parser.add_argument('-w', dest='workers', type=int, help='number of targets built concurrently')
+    parser.add_argument('-j', dest='jobs', type=int, help='number of parallel jobs per target')
+    parser.add_argument('--ninja', default='ninja', help='ninja executable')
+    args = parser.parse_args()
+    if not BuildProject(args.project, args.targets, args.workers, args.jobs, args.ninja):
+        sys.exit(1)
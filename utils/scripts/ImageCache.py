@@ -0,0 +1,104 @@
+#
+# Cache of decoded images shared by all converters
+#
+# PNG files are decoded once to arrays of palette indices, stored under the hash
+# of the file contents (and version of this script) in:
+#
+#   build/cache/images/ (or images folder in UNITY_CACHE)
+#
+# and memory-mapped when read back, so that assets used by several platforms or
+# modes (e.g. Apple 64k and 128k), and sheets holding many chunks, go through PIL
+# only once. Images are also kept in memory for the rest of the process. Entries
+# are evicted with the rest of the asset cache (see AssetCache.py).
+#
+
+import numpy, os
+from PIL import Image
+from AssetCache import AssetCache
+
+version = 1
+
+images = {}
+
+class CachedImage:
+    # Decoded image (same accessors as PIL images used by the converters)
+    def __init__(self, pixels, palette):
+        self.pixels = pixels
+        self.palette = palette
+        self.size = (pixels.shape[1], pixels.shape[0])
+
+    def __array__(self, dtype=None):
+        if dtype is None:
+            return numpy.asarray(self.pixels)
+        return numpy.asarray(self.pixels, dtype=dtype)
+
+    def getpalette(self):
+        return self.palette
+
+    def getdata(self):
+        return self.pixels.ravel().tolist()
+
+    def crop(self, box):
+        # Pixels outside the image are set to 0 (as PIL does)
+        x0, y0, x1, y1 = box
+        pixels = numpy.zeros((y1-y0, x1-x0) + self.pixels.shape[2:], dtype=self.pixels.dtype)
+        sx0, sy0 = max(x0, 0), max(y0, 0)
+        sx1, sy1 = min(x1, self.size[0]), min(y1, self.size[1])
+        if sx1 > sx0 and sy1 > sy0:
+            pixels[sy0-y0:sy1-y0, sx0-x0:sx1-x0] = self.pixels[sy0:sy1, sx0:sx1]
+        return CachedImage(pixels, self.palette)
+
+def Decode(filename):
+    # Decode image with PIL
+    img = Image.open(filename)
+    palette = img.getpalette()
+    if palette is not None:
+        palette = numpy.array(palette, dtype=numpy.uint8)
+    return numpy.asarray(img), palette
+
+def Load(path):
+    # Memory-map cached arrays (or None if missing)
+    try:
+        pixels = numpy.load(path + '.npy', mmap_mode='r')
+        palette = numpy.load(path + '.pal.npy')
+        os.utime(path + '.npy', None)    # Mark as recently used
+        os.utime(path + '.pal.npy', None)
+    except (IOError, OSError, ValueError):
+        return None
+    if len(palette) == 0:
+        palette = None
+    return pixels, palette
+
+def Save(path, pixels, palette):
+    # Write arrays atomically (another build may be writing the same entry)
+    if palette is None:
+        palette = numpy.zeros(0, dtype=numpy.uint8)
+    try:
+        if not os.path.exists(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        for suffix, data in [('.pal.npy', palette), ('.npy', pixels)]:
+            temp = path + '.' + str(os.getpid()) + '.tmp'
+            f = open(temp, 'wb')
+            numpy.save(f, data)
+            f.close()
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+            os.rename(temp, path + suffix)
+    except (IOError, OSError):
+        pass
+
+def OpenImage(filename):
+    # Return decoded image (from memory, cache folder, or PIL)
+    cache = AssetCache()
+    key = cache.Key(['Image', version], [filename])
+    if key not in images:
+        path = os.path.join(cache.folder, 'images', key[0:2], key)
+        data = None
+        if cache.Enabled():
+            data = Load(path)
+        if data is None:
+            data = Decode(filename)
+            if cache.Enabled():
+                Save(path, data[0], data[1])
+        images[key] = CachedImage(data[0], data[1].tolist() if data[1] is not None else None)
+    return images[key]
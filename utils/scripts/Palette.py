@@ -0,0 +1,79 @@
+"""
+ * Copyright (c) 2020 Anthony Beaucamp.
+ *
+ * This software is provided 'as-is', without any express or implied warranty.
+ * In no event will the authors be held liable for any damages arising from
+ * the use of this software.
+ *
+ * Permission is granted to anyone to use this software for any purpose,
+ * including commercial applications, and to alter it and redistribute it
+ * freely, subject to the following restrictions:
+ *
+ *   1. The origin of this software must not be misrepresented * you must not
+ *   claim that you wrote the original software. If you use this software in a
+ *   product, an acknowledgment in the product documentation would be
+ *   appreciated but is not required.
+ *
+ *   2. Altered source versions must be plainly marked as such, and must not
+ *   be misrepresented as being the original software.
+ *
+ *   3. This notice may not be removed or altered from any distribution.
+ *
+ *   4. The names of this software and/or it's copyright holders may not be
+ *   used to endorse or promote products derived from this software without
+ *   specific prior written permission.
+"""
+
+#
+# Palette remapping for the asset converters
+#
+#   Palette reductions are declared below as data (target color of each source
+#   color, colors not listed are unchanged). Each one is turned into a 256 entry
+#   translation table, and applied to whole images (or arrays of runs) at once.
+#
+
+import numpy
+
+############################################
+# Palette mappings: list of target colors (by source color) or {source: target}
+paletteMaps = {
+    # Apple double hires (16 colors) > single hires (6 colors)
+    'DHR2SHR': [ 0,   # BLACK
+                 1,   # DBLUE -> PURPLE
+                 2,   # DGREEN -> GREEN
+                 3,   # BLUE
+                 4,   # BROWN -> ORANGE
+                 0,   # DGREY -> BLACK
+                 2,   # GREEN
+                 2,   # LGREEN -> GREEN
+                 0,   # DPURPLE -> BLACK
+                 1,   # PURPLE
+                 3,   # LGREY -> BLUE
+                 3,   # LBLUE -> BLUE
+                 4,   # ORANGE
+                 5,   # PINK -> WHITE
+                 2,   # YELLOW -> GREEN
+                 5 ], # WHITE
+
+    # Apple single hires: Blue/Orange share bits with Purple/Green (high bit selects group)
+    'SHRGroup': { 3: 1, 4: 2, 5: 3 },
+
+    # Oric: force BW over WB order for grey colour
+    'OricGrey': { 5: 10 },
+}
+
+def RemapTable(mapping):
+    # 256 entry translation table
+    table = numpy.arange(256, dtype=numpy.uint8)
+    if isinstance(mapping, dict):
+        for source, target in mapping.items():
+            table[source] = target
+    else:
+        table[0:len(mapping)] = mapping
+    return table
+
+remapTables = dict([(name, RemapTable(mapping)) for name, mapping in paletteMaps.items()])
+
+def Remap(pixels, name):
+    # Apply palette mapping to array of pixels (of any shape)
+    return remapTables[name][numpy.asarray(pixels, dtype=numpy.uint8)]
@@ -0,0 +1,140 @@
+#
+# Process Asset manifest file
+#
+# Usage: ProcessAssets.py manifest.txt
+#        ProcessAssets.py <converter> <arguments...>
+#
+#   Each line of the manifest names a converter followed by the same arguments
+#   as its command line script (paths are relative to the current folder), e.g.
+#
+#     AppleBitmap single projects/demos/bitmaps/banner-apple.png build/apple/banner.img
+#     AppleSprites single projects/demos/sprites/sprites-apple.png build/apple/sprites.dat 13
+#     ProcessChunks apple-single projects/demos/chunks/chunks.txt build/apple/
+#
+#   All assets are converted within a single process, so that the interpreter
+#   and PIL only need to be loaded once per platform.
+#   Lines starting with # are ignored. A single entry can also be passed on the
+#   command line (as used by the ninja build graphs), in which case errors are
+#   reported through the exit code.
+#
+#   Converted files are kept in the asset cache (see AssetCache.py), and only
+#   re-converted when the input files, parameters, converter version or converter
+#   scripts (including bundled files) change.
+#
+
+import imp, os, sys
+from AssetCache import AssetCache, FileHash
+
+scriptDir = os.path.dirname(os.path.abspath(__file__))
+
+def NumList(arg):
+    return [int(n) for n in arg.split(',')]
+
+############################################
+# Converter: (folder, script, function, arguments, bundled files)
+#   Arguments: s = string, n = number, l = number list, i = input file,
+#              c = charset (with .csv flags), o = output file, d = output folder
+converters = {
+    'AppleBitmap':   ('apple', 'AppleBitmap.py',   'ConvertBitmap',  'sio',  ['apple/AppleHires.py', 'Palette.py', 'Tiles.py', 'ImageCache.py']),
+    'AppleCharset':  ('apple', 'AppleCharset.py',  'ConvertCharset', 'sco',  ['apple/AppleHires.py', 'Palette.py', 'Tiles.py', 'ImageCache.py']),
+    'AppleSprites':  ('apple', 'AppleSprites.py',  'ConvertSprites', 'sionl', ['apple/AppleHires.py', 'Palette.py', 'Tiles.py', 'ImageCache.py']),
+    'AtariBitmap':   ('atari', 'AtariBitmap.py',   'ConvertBitmap',  'io',   ['Tiles.py', 'ImageCache.py']),
+    'AtariCharset':  ('atari', 'AtariCharset.py',  'ConvertCharset', 'co',   ['atari/font.png', 'Tiles.py', 'ImageCache.py']),
+    'AtariSprites':  ('atari', 'AtariSprites.py',  'ConvertSprites', 'ion',  ['Tiles.py', 'ImageCache.py']),
+    'C64Bitmap':     ('c64',   'C64Bitmap.py',     'ConvertBitmap',  'io',   ['Tiles.py', 'ImageCache.py']),
+    'C64Charset':    ('c64',   'C64Charset.py',    'ConvertCharset', 'co',   ['c64/font.png', 'Tiles.py', 'ImageCache.py']),
+    'C64Sprites':    ('c64',   'C64Sprites.py',    'ConvertSprites', 'io',   ['Tiles.py', 'ImageCache.py']),
+    'LynxCharset':   ('lynx',  'LynxCharset.py',   'ConvertCharset', 'co',   []),
+    'LynxSprites':   ('lynx',  'LynxSprites.py',   'ConvertSprites', 'ioslll', ['Tiles.py', 'ImageCache.py']),
+    'OricBitmap':    ('oric',  'OricBitmap.py',    'ConvertBitmap',  'iol',  ['Palette.py', 'ImageCache.py']),
+    'OricCharset':   ('oric',  'OricCharset.py',   'ConvertCharset', 'sco',  ['oric/PictOric.py']),
+    'OricSprites':   ('oric',  'OricSprites.py',   'ConvertSprites', 'ion',  ['ImageCache.py']),
+    'OricChunks':    ('oric',  'ProcessChunks.py', 'ProcessChunks',  'ssid', []),
+    'PictOric':      ('oric',  'PictOric.py',      'ConvertPicture', 'sio',  []),
+    'ProcessChunks': ('',      'ProcessChunks.py', 'ProcessChunks',  'sid',  ['apple/AppleHires.py', 'atari/AtariBitmap.py', 'c64/C64Bitmap.py', 'oric/OricBitmap.py', 'Palette.py', 'Tiles.py', 'ImageCache.py']),
+}
+types = { 's': str, 'n': int, 'l': NumList, 'i': str, 'c': str, 'o': str, 'd': str }
+
+def LoadConverter(name):
+    # Import converter script (only once per process)
+    folder, script = converters[name][0:2]
+    folder = os.path.join(scriptDir, folder)
+    if folder not in sys.path:
+        sys.path.append(folder)
+    if name in sys.modules:
+        return sys.modules[name]
+    return imp.load_source(name, os.path.join(folder, script))
+
+def CharsetFlags(charFile):
+    # e.g. chars-apple.png > chars.csv
+    return charFile[0:charFile.rindex('-')] + '.csv'
+
+def RunConverter(cache, name, args):
+    module = LoadConverter(name)
+    folder, script, function, spec, bundled = converters[name]
+    function = getattr(module, function)
+    values = [types[spec[i]](args[i]) for i in range(len(args))]
+    spec = spec[0:len(args)]
+
+    # Converter script and bundled files are part of every cache key
+    scripts = [os.path.join(scriptDir, folder, script)] + [os.path.join(scriptDir, item) for item in bundled]
+
+    # Chunk processors cache each chunk separately
+    if 'd' in spec:
+        function(*values, cache=cache, scriptHashes=[FileHash(item) for item in scripts])
+        return
+
+    # Find input/output files and other parameters
+    params = [name, getattr(module, 'version', 0)]
+    inputs = []
+    outputs = []
+    for i in range(len(args)):
+        if spec[i] == 'i':
+            inputs.append(args[i])
+        elif spec[i] == 'c':
+            inputs.append(args[i])
+            inputs.append(CharsetFlags(args[i]))
+        elif spec[i] == 'o':
+            outputs.append(args[i])
+        else:
+            params.append(values[i])
+    inputs += scripts
+
+    # Convert only if not already in cache
+    key = cache.Key(params, inputs)
+    if not cache.Fetch(key, outputs):
+        function(*values)
+        cache.Store(key, outputs)
+
+def ProcessAssets(manifest):
+    script = open(manifest, "r")
+    lines = script.readlines()
+    script.close()
+
+    cache = AssetCache()
+    for line in lines:
+        # Skip comments and empty lines
+        args = line.split()
+        if len(args) == 0 or args[0][0] == '#':
+            continue
+
+        # Run converter with typed arguments
+        if args[0] not in converters:
+            print "Error: unknown converter '" + args[0] + "'"
+            continue
+        try:
+            RunConverter(cache, args[0], args[1:])
+        except:
+            print "Error: cannot process '" + line.strip() + "'... (" + str(sys.exc_info()[1]) + ")"
+
+    # Evict old entries from cache
+    cache.Trim()
+    cache.Report()
+
+if __name__ == '__main__':
+    if len(sys.argv) > 2:
+        cache = AssetCache()
+        RunConverter(cache, sys.argv[1], sys.argv[2:])
+        cache.Trim()
+    else:
+        ProcessAssets(sys.argv[1])
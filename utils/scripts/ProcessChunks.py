@@ -19,144 +19,48 @@
 # followed by platform specific graphic data
 #
  
-import io, os, struct, sys
-from PIL import Image
-from collections import Counter
-from math import sqrt
+import io, numpy, os, struct, sys
 
-#############################################
-# Set color of specific pixel (Single Hires)
-# 0=BLACK, 1=VIOLET/BLUE, 2=GREEN/ORANGE, 3=WHITE
-def SetSHRColor(block, pixel, color):
-    
-    if pixel == 0:
-        block[0] |= (color & 3)
-    if pixel == 1:
-        block[0] |= (color & 3) << 2
-    if pixel == 2:
-        block[0] |= (color & 3) << 4
-    if pixel == 3:
-        block[0] |= (color & 1) << 6
-        block[1] |= (color & 2) >> 1
-    if pixel == 4:
-        block[1] |= (color & 3) << 1
-    if pixel == 5:
-        block[1] |= (color & 3) << 3
-    if pixel == 6:
-        block[1] |= (color & 3) << 5
-
-#############################################
-# Set color of specific pixel (Double Hires)
-def SetDHRColor(block, pixel, color):
-
-    if pixel == 0:
-        block[0] |= (color & 15)
-    if pixel == 1:
-        block[0] |= (color &  7) << 4
-        block[1] |= (color &  8) >> 3
-    if pixel == 2:
-        block[1] |= (color & 15) << 1
-    if pixel == 3:
-        block[1] |= (color &  3) << 5
-        block[2] |= (color & 12) >> 2
-    if pixel == 4:
-        block[2] |= (color & 15) << 2
-    if pixel == 5:
-        block[2] |= (color &  1) << 6
-        block[3] |= (color & 14) >> 1
-    if pixel == 6:
-        block[3] |= (color & 15) << 3
-        
-#############################################
-def RemapDHR2SHR(pixels):
-    remap = [x+100 for x in pixels]                
-    remap = [0 if x==100 else x for x in remap] # BLACK
-    remap = [1 if x==101 else x for x in remap] # DBLUE -> PURPLE
-    remap = [2 if x==102 else x for x in remap] # DGREEN -> GREEN
-    remap = [3 if x==103 else x for x in remap] # BLUE
-    remap = [4 if x==104 else x for x in remap] # BROWN -> ORANGE
-    remap = [0 if x==105 else x for x in remap] # DGREY -> BLACK
-    remap = [2 if x==106 else x for x in remap] # GREEN
-    remap = [2 if x==107 else x for x in remap] # LGREEN -> GREEN
-    remap = [0 if x==108 else x for x in remap] # DPURPLE -> BLACK
-    remap = [1 if x==109 else x for x in remap] # PURPLE                
-    remap = [3 if x==110 else x for x in remap] # LGREY -> BLUE                
-    remap = [3 if x==111 else x for x in remap] # LBLUE -> BLUE
-    remap = [4 if x==112 else x for x in remap] # ORANGE
-    remap = [5 if x==113 else x for x in remap] # PINK -> WHITE
-    remap = [2 if x==114 else x for x in remap] # YELLOW -> GREEN
-    remap = [5 if x==115 else x for x in remap] # WHITE    
-    return remap
-    
-#############################################
-def AssignColorGroup(pixels): 
-    # Find group (Purple/Green) or (Blue/Orange) with most occurence
-    group1 = pixels.count(1)+pixels.count(2)
-    group2 = pixels.count(3)+pixels.count(4)
-    if group1 > group2:
-        block = [0,0]
-    else:
-        block = [128,128] 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'apple'))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'atari'))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'c64'))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'oric'))
+from AppleHires import PackSHR, PackDHR
+from AtariBitmap import EncodeBitmap as EncodeAtari
+from C64Bitmap import EncodeBitmap as EncodeC64
+from OricBitmap import EncodeBlocks as EncodeOric
+from ImageCache import OpenImage
+from Palette import Remap
 
-    # Re-assign all colors according to that group
-    pixels = [1 if x==3 else x for x in pixels]
-    pixels = [2 if x==4 else x for x in pixels]
-    pixels = [3 if x==5 else x for x in pixels]
-    return pixels, block
+version = 1
 
 ############################################
 def ExportApple(filename, coords, pixdata, mode):
 
-    # Process in blocks of 7 pixels > 4 bytes
+    # Process in blocks of 7 pixels > 2 bytes (single) or 4 bytes (double)
     imgWidth  = (coords[2]-coords[0])
     imgHeight = (coords[3]-coords[1])
     colors = max(pixdata)    
-    blocks = []
-    for i in range(len(pixdata)/7):
-        pixels = pixdata[i*7:(i+1)*7]
-        if mode == 'single':
-            # Reduce palette?
-            if colors > 6:
-                pixels = RemapDHR2SHR(pixels)
-            res = AssignColorGroup(pixels)    
-            pixels = res[0]; block = res[1]
-            
-            # Process in blocks of 7 pixels, to be packed into 2 bytes
-            for k in range(7):
-                SetSHRColor(block, k, pixels[k])
-            blocks.append(block)
-        else:
-            # Process in blocks of 7 pixels, to be packed into 4 bytes
-            block = [0,0,0,0]
-            for k in range(7):
-                SetDHRColor(block, k, pixels[k])        
-            blocks.append(block)
+    runs = numpy.asarray(pixdata[0:len(pixdata)/7*7], dtype=numpy.uint8).reshape(-1, 7)
+    if mode == 'single':
+        blocks = PackSHR(runs, 0, colors > 6)
+    else:
+        blocks = PackDHR(runs)
 
     # Write to file line-by-line
     blocksPerLine = (coords[2]-coords[0])/7
+    lines = blocks.reshape(-1, blocksPerLine, blocks.shape[1])
     output = io.open(filename, 'wb')
     output.write(chr(coords[0]))
     output.write(chr(coords[1]))
     output.write(chr(imgWidth))
     output.write(chr(imgHeight))
-    i = 0
-    while i < len(blocks):
-        if mode == 'single':
-            for j in range(blocksPerLine):
-                output.write(chr(blocks[i+j][0]))           
-                output.write(chr(blocks[i+j][1]))           
-        else:
-            # Write MAIN data
-            for j in range(blocksPerLine):
-                output.write(chr(blocks[i+j][0]))           
-                output.write(chr(blocks[i+j][2]))           
-            # Write AUX data
-            for j in range(blocksPerLine):
-                output.write(chr(blocks[i+j][1]))           
-                output.write(chr(blocks[i+j][3]))           
-        i += blocksPerLine
-    output.close() 
-
+    if mode == 'single':
+        output.write(lines.tostring())
+    else:
+        # Write MAIN then AUX data of each line
+        output.write(numpy.concatenate([lines[:,:,0::2], lines[:,:,1::2]], axis=1).tostring())
+    output.close()
 
 ############################################
 def ExportAtari(filename, coords, pixdata):
@@ -164,32 +68,7 @@ def ExportAtari(filename, coords, pixdata):
     # Process to double frame buffer
     imgWidth  = (coords[2]-coords[0])
     imgHeight = (coords[3]-coords[1]) 
-    imgSize   = (imgHeight*imgWidth/4)
-    buoutput = [0] * imgSize
-    buf2 = [0] * imgSize
-    for y in range(imgHeight):
-        for x in range(imgWidth):
-            # Convert PNG to INP index 
-            color = pixdata[y*imgWidth+x]
-            shift = 6 - 2*(x%4)
-            if (x+y)%2:   # Alternate to create checker board
-                col2 = color%4 << shift
-                col1 = color/4 << shift
-            else:
-                col1 = color%4 << shift
-                col2 = color/4 << shift
-                
-            # Assign bits in both buffers
-            offset = y*(imgWidth/4)+x/4
-            mask = 255 - (3<<shift)            
-            buoutput[offset] = (buoutput[offset] & mask) | col1
-            buf2[offset] = (buf2[offset] & mask) | col2  
-            
-    #################
-    # Convert to CHR
-    for i in range(imgSize):
-        buoutput[i] = chr(buoutput[i])
-        buf2[i] = chr(buf2[i])
+    buoutput, buf2 = EncodeAtari(pixdata, imgWidth, imgHeight)
             
     ########################
     # Write output INP file
@@ -198,8 +77,8 @@ def ExportAtari(filename, coords, pixdata):
     output.write(chr(coords[1]))
     output.write(chr(imgWidth))
     output.write(chr(imgHeight))
-    output.write(''.join(buoutput))
-    output.write(''.join(buf2))
+    output.write(buoutput)
+    output.write(buf2)
     output.close()
         
         
@@ -214,68 +93,7 @@ def ExportC64(filename, coords, pixdata, paldata):
     # Process in blocks of 4 x 8 pixels
     imgWidth  = (coords[2]-coords[0])
     imgHeight = (coords[3]-coords[1])
-    bmp = [0] * (imgWidth*imgHeight/4)
-    scr = [0] * (imgWidth*imgHeight/32)
-    col = [0] * (imgWidth*imgHeight/32)
-    for y in range(0, imgHeight, 8):
-        for x in range(0, imgWidth, 4):
-            # Find most abundant colors in block
-            block = []
-            for i in range(8):
-                for j in range(4):
-                 block.append(pixdata[(y+i)*imgWidth+(x+j)])             
-            
-            # Find 3 most abundant colors (except black)
-            abundant = (value for value in block if value != 0)
-            count = Counter(abundant)        
-            choice = count.most_common(3)
-            
-            # Set these 3 colors in SCREENRAM and COLORRAM
-            translate = { 0:0 }
-            for i in range(1,len(choice)+1):
-                color = choice[i-1][0]                        
-                translate[color] = i
-                offset = (y/8)*(imgWidth/4)+(x/4);
-                if i == 1:
-                    # SCREENRAM (Upper bits)
-                    scr[offset] |= color << 4
-                if i == 2:
-                    # SCREENRAM (Lower bits)
-                    scr[offset] |= color
-                if i == 3:
-                    # COLORRAM (Lower bits)
-                    col[offset] = color
-                  
-            # Assign colours not in palette to nearest colour
-            for i in range(8):
-                for j in range(4):
-                    if block[i*4+j] not in translate.keys():
-                        delta = []
-                        vec1 = rgb[block[i*4+j]]
-                        for k in range(1,4):
-                            vec2 = rgb[translate.keys()[k]]
-                            delta.append( sqrt( (vec1[0]-vec2[0])**2 + (vec1[1]-vec2[1])**2 + (vec1[2]-vec2[2])**2 ) )
-                        swap = delta.index(min(delta))+1
-                        block[i*4+j] = translate.keys()[swap]
-                                              
-                  
-            # Set colour indices (0-3)
-            for i in range(8):
-                for j in range(4):
-                    color = block[i*4+j]
-                    index = translate[color]
-                    shift = 2*(3-(x+j)%4);
-                    offset = (imgWidth/4)*((y+i)&248)+((y+i)&7)+((2*(x+j))&504);
-                    bmp[offset] |= index << shift
-
-    #################
-    # Convert to CHR
-    for i in range(len(bmp)):
-        bmp[i] = chr(bmp[i])
-    for i in range(len(scr)):    
-        scr[i] = chr(scr[i])
-    for i in range(len(col)):    
-        col[i] = chr(col[i])
+    bmp, scr, col = EncodeC64(pixdata, imgWidth, imgHeight, rgb)
             
     ########################
     # Write output INP file
@@ -284,9 +102,9 @@ def ExportC64(filename, coords, pixdata, paldata):
     output.write(chr(coords[1]))
     output.write(chr(imgWidth))
     output.write(chr(imgHeight))
-    output.write(''.join(bmp))
-    output.write(''.join(scr))
-    output.write(''.join(col))
+    output.write(bmp)
+    output.write(scr)
+    output.write(col)
     output.close()    
     
     
@@ -325,87 +143,22 @@ def ExportOric(filename, coords, pixdata, paldata):
     imgWidth  = (coords[2]-coords[0])
     imgHeight = (coords[3]-coords[1]) 
     imgSize   = (2*imgHeight*imgWidth/3)    
-    buffer    = [0] * imgSize
+    buffer    = numpy.zeros(imgSize, dtype=numpy.uint8)
     noRemap   = [19]
 
     # Force BW over WB order for grey colour
-    pixdata = [pix if pix != 5 else 10 for pix in pixdata]
+    pixdata = Remap(pixdata, 'OricGrey').reshape(imgHeight, imgWidth)
 
     # Get RGB components of palette
     rgb = []
     for i in range(20):
         rgb.append(paldata[i*3:i*3+3])
 
-    # Inversion groups
-    groups = [ [0,1,2,3,4],         # line 1 and 2 non-inverted
-               [5,6,7,8,9],         # line 1 inverted
-               [10,11,12,13,14],    # line 2 inverted
-               [15,16,17,18,19] ]   # line 1 and 2 inverted
-               
-    # Convert to AIC format
-    for y in range(imgHeight):        
-        # Process in blocks of 3x1 pixels (encoded as 6x2)
-        for x in range(imgWidth/3):
-            # Find most frequent colour in block
-            block = pixdata[y*imgWidth+x*3:y*imgWidth+x*3+3]
-            gcount = []
-            for i in block:
-                for g in range(len(groups)):
-                    if i in groups[g]:
-                        gcount.append(g)
-            count = Counter(gcount)
-            gsel = count.most_common(1)[0][0]
-                
-            # Process other colors
-            for i in range(3):            
-                # In same group?
-                if block[i] not in groups[gsel]:            
-                    # Find nearest color in group
-                    delta = []
-                    vec1 = rgb[block[i]]
-                    for k in range(len(groups[gsel])):
-                        index = groups[gsel][k]
-                        if index in noRemap:
-                            delta.append( 999999 )
-                        else:
-                            vec2 = rgb[index]
-                            delta.append( sqrt( (vec1[0]-vec2[0])**2 + (vec1[1]-vec2[1])**2 + (vec1[2]-vec2[2])**2 ) )
-                    swap = delta.index(min(delta))
-                    block[i] = groups[gsel][swap]
-            
-            # Assign inversion bit
-            byte1 = (2*y+0)*(imgWidth/3)+x
-            byte2 = (2*y+1)*(imgWidth/3)+x
-            if gsel == 0:
-                buffer[byte1] = 64
-                buffer[byte2] = 64
-            if gsel == 1:
-                buffer[byte1] = 192
-                buffer[byte2] = 64
-            if gsel == 2:
-                buffer[byte1] = 64
-                buffer[byte2] = 192
-            if gsel == 3:
-                buffer[byte1] = 192
-                buffer[byte2] = 192
-                
-            # Assign bits
-            for i in range(3):
-                index = block[i] % 5
-                if index == 1:
-                    buffer[byte1] += 32 / 4**i
-                    buffer[byte2] += 16 / 4**i
-                if index == 2:
-                    buffer[byte1] += (32+16) / 4**i
-                if index == 3:
-                    buffer[byte2] += (32+16) / 4**i
-                if index == 4:
-                    buffer[byte1] += (32+16) / 4**i
-                    buffer[byte2] += (32+16) / 4**i
-            
-    # Convert to char
-    for i in range(len(buffer)):
-        buffer[i] = chr(buffer[i])
+    # Convert to AIC format (blocks of 3x1 pixels, encoded as 6x2)
+    blocks = pixdata[:,0:imgWidth/3*3].reshape(imgHeight, imgWidth/3, 3)
+    lines = numpy.stack(EncodeOric(blocks, rgb, noRemap), axis=1)
+    buffer[0:lines.size] = lines.ravel()
+    buffer = buffer.tostring()
                 
     #################
     # Write DAT file
@@ -414,86 +167,113 @@ def ExportOric(filename, coords, pixdata, paldata):
     output.write(chr(coords[1]))
     output.write(chr(imgWidth))
     output.write(chr(imgHeight))
-    output.write(''.join(buffer))
+    output.write(buffer)
     output.close()
     
     
 ############################################    
 # Process chunks definition file
-platform = sys.argv[1]
-chunkDefs = sys.argv[2]
-outfolder = sys.argv[3]
+def ParseChunks(chunkDefs, outfolder):
+    # Return list of chunks: (input file, output file, [x1,y1,x2,y2])
+    script = open(chunkDefs, "r")
+    lines = script.readlines() 
+    script.close()
 
-script = open(chunkDefs, "r")
-lines = script.readlines() 
-script.close()
-
-listing = open(outfolder+'chunks.lst', "w")
-
-for line in lines:
-    # Skip comments
-    if line[0] != '\'':
-        continue
+    chunks = []
+    for line in lines:
+        # Skip comments
+        if line[0] != '\'':
+            continue
         
-    # Parse chunk filename
-    offset1 = 1
-    offset2 = 1
-    while line[offset2] != '\'':
-        offset2 += 1
-    infile = os.path.dirname(chunkDefs) + '/' + line[offset1:offset2]
+        # Parse chunk filename
+        offset1 = 1
+        offset2 = 1
+        while line[offset2] != '\'':
+            offset2 += 1
+        infile = os.path.dirname(chunkDefs) + '/' + line[offset1:offset2]
 
-    # Skip to next '
-    offset2 += 1
-    while line[offset2] != '\'':
+        # Skip to next '
         offset2 += 1
-    offset2 += 1
-
-    # Parse output filename
-    offset1 = offset2
-    while line[offset2] != '\'':
+        while line[offset2] != '\'':
+            offset2 += 1
         offset2 += 1
-    outfile = outfolder + '/' + line[offset1:offset2]
-    outfile = outfile.replace('//','/')
 
-    # Skip to next [
-    while line[offset2] != '[':
-        offset2 += 1
-    offset2 += 1    
-    
-    # Parse coordinates
-    offset1 = offset2
-    while line[offset2] != ']':
-        offset2 += 1
-    coords = [int(s) for s in line[offset1:offset2].split(',')]
-    coords[2] = coords[0]+coords[2]
-    coords[3] = coords[1]+coords[3]
-    
-    # Process chunk    
-    image = Image.open(infile)
-    chunkdata = image.crop(coords)
-    pixdata = list(chunkdata.getdata())
-    paldata = chunkdata.getpalette()
+        # Parse output filename
+        offset1 = offset2
+        while line[offset2] != '\'':
+            offset2 += 1
+        outfile = outfolder + '/' + line[offset1:offset2]
+        outfile = outfile.replace('//','/')
+
+        # Skip to next [
+        while line[offset2] != '[':
+            offset2 += 1
+        offset2 += 1    
     
-    # Export to required format    
-    if platform == 'apple-double':
-        ExportApple(outfile, coords, pixdata, 'double')
-    if platform == 'apple-single':
-        ExportApple(outfile, coords, pixdata, 'single')
-    if platform == 'atari':
-        ExportAtari(outfile, coords, pixdata)
-    if platform == 'c64':
-        ExportC64(outfile, coords, pixdata, paldata)
-    if platform == 'lynx':
-        ExportLynx(outfile, coords, pixdata)
-    if platform == 'oric':
-        ExportOric(outfile, coords, pixdata, paldata)
+        # Parse coordinates
+        offset1 = offset2
+        while line[offset2] != ']':
+            offset2 += 1
+        coords = [int(s) for s in line[offset1:offset2].split(',')]
+        coords[2] = coords[0]+coords[2]
+        coords[3] = coords[1]+coords[3]
+        chunks.append((infile, outfile, coords))
+    return chunks
 
-    # Print some info
-    coords[2] -= coords[0]
-    coords[3] -= coords[1]
-    print 'Generated ', outfile, coords
+def ProcessChunks(platform, chunkDefs, outfolder, cache=None, scriptHashes=[]):
+    chunks = ParseChunks(chunkDefs, outfolder)
 
-    # Add file to list
-    listing.write(outfile+'\n')
-    
-listing.close()
+    # Group chunks by source sheet (in order of first use)
+    sheets = []
+    groups = {}
+    for infile, outfile, coords in chunks:
+        if infile not in groups:
+            sheets.append(infile)
+            groups[infile] = []
+        groups[infile].append((outfile, coords))
+
+    # Decode each sheet once, and slice chunks from it
+    for infile in sheets:
+        image = None
+        for outfile, coords in groups[infile]:
+            # Check asset cache
+            if cache:
+                key = cache.Key(['ProcessChunks', version, platform, coords] + scriptHashes, [infile])
+            if cache and cache.Fetch(key, [outfile]):
+                continue
+
+            # Process chunk    
+            if image is None:
+                image = OpenImage(infile)
+            chunkdata = image.crop(coords)
+            pixdata = chunkdata.getdata()
+            paldata = chunkdata.getpalette()
+        
+            # Export to required format    
+            if platform == 'apple-double':
+                ExportApple(outfile, coords, pixdata, 'double')
+            if platform == 'apple-single':
+                ExportApple(outfile, coords, pixdata, 'single')
+            if platform == 'atari':
+                ExportAtari(outfile, coords, pixdata)
+            if platform == 'c64':
+                ExportC64(outfile, coords, pixdata, paldata)
+            if platform == 'lynx':
+                ExportLynx(outfile, coords, pixdata)
+            if platform == 'oric':
+                ExportOric(outfile, coords, pixdata, paldata)
+            if cache:
+                cache.Store(key, [outfile])
+
+    # Print some info and list files (in order of definition)
+    listing = open(outfolder+'chunks.lst', "w")
+    for infile, outfile, coords in chunks:
+        print 'Generated ', outfile, [coords[0], coords[1], coords[2]-coords[0], coords[3]-coords[1]]
+        listing.write(outfile+'\n')
+    listing.close()
+
+if __name__ == '__main__':
+    platform = sys.argv[1]
+    chunkDefs = sys.argv[2]
+    outfolder = sys.argv[3]
+    ProcessChunks(platform, chunkDefs, outfolder)
@@ -0,0 +1,73 @@
+"""
+ * Copyright (c) 2020 Anthony Beaucamp.
+ *
+ * This software is provided 'as-is', without any express or implied warranty.
+ * In no event will the authors be held liable for any damages arising from
+ * the use of this software.
+ *
+ * Permission is granted to anyone to use this software for any purpose,
+ * including commercial applications, and to alter it and redistribute it
+ * freely, subject to the following restrictions:
+ *
+ *   1. The origin of this software must not be misrepresented * you must not
+ *   claim that you wrote the original software. If you use this software in a
+ *   product, an acknowledgment in the product documentation would be
+ *   appreciated but is not required.
+ *
+ *   2. Altered source versions must be plainly marked as such, and must not
+ *   be misrepresented as being the original software.
+ *
+ *   3. This notice may not be removed or altered from any distribution.
+ *
+ *   4. The names of this software and/or it's copyright holders may not be
+ *   used to endorse or promote products derived from this software without
+ *   specific prior written permission.
+"""
+
+#
+# Tiling and packing kernel shared by the charset, sprite and chunk converters
+#
+#   Tiles() rearranges an image into blocks (characters, sprite frames or
+#   bitmap cells) in row order, and PackPixels() packs pixels of 1, 2 or 4 bits
+#   into bytes (first pixel in the high bits). The tiles of bundled fonts are
+#   packed once, and kept in memory and in the asset cache (see AssetCache.py).
+#
+
+import numpy, os
+from AssetCache import AssetCache
+from ImageCache import OpenImage
+
+scriptDir = os.path.dirname(os.path.abspath(__file__))
+
+fonts = {}
+
+def Tiles(pixels, width, height, tileWidth, tileHeight):
+    # Split image into tiles (array of shape [numTiles, tileHeight, tileWidth])
+    # Always a copy: images from the cache are read-only, and converters modify tiles in place
+    pixels = numpy.asarray(pixels, dtype=numpy.uint8).reshape(height/tileHeight, tileHeight, width/tileWidth, tileWidth)
+    return pixels.transpose(0, 2, 1, 3).reshape(-1, tileHeight, tileWidth).copy()
+
+def PackPixels(pixels, bits):
+    # Pack pixels along last axis into bytes (shape [..., N*bits/8])
+    pixels = numpy.asarray(pixels, dtype=numpy.uint8)
+    perByte = 8 / bits
+    pixels = pixels.reshape(pixels.shape[:-1] + (pixels.shape[-1]/perByte, perByte))
+    packed = numpy.zeros(pixels.shape[:-1], dtype=numpy.uint8)
+    for i in range(perByte):
+        packed |= pixels[...,i] << (8 - bits*(i+1))
+    return packed
+
+def FontTiles(fontFile, tileWidth, tileHeight, bits):
+    # Packed tiles of bundled font (as string)
+    ident = (fontFile, tileWidth, tileHeight, bits)
+    if ident not in fonts:
+        cache = AssetCache()
+        key = cache.Key(['FontTiles', tileWidth, tileHeight, bits], [fontFile, os.path.join(scriptDir, 'Tiles.py'), os.path.join(scriptDir, 'ImageCache.py')])
+        blobs = cache.Load(key)
+        if blobs is None:
+            fontImg = OpenImage(fontFile)
+            tiles = Tiles(numpy.asarray(fontImg), fontImg.size[0], fontImg.size[1], tileWidth, tileHeight)
+            blobs = [PackPixels(tiles, bits).tostring()]
+            cache.Save(key, blobs)
+        fonts[ident] = blobs[0]
+    return fonts[ident]
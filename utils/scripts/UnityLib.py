@@ -0,0 +1,208 @@
+"""
+ * Copyright (c) 2020 Anthony Beaucamp.
+ *
+ * This software is provided 'as-is', without any express or implied warranty.
+ * In no event will the authors be held liable for any damages arising from
+ * the use of this software.
+ *
+ * Permission is granted to anyone to use this software for any purpose,
+ * including commercial applications, and to alter it and redistribute it
+ * freely, subject to the following restrictions:
+ *
+ *   1. The origin of this software must not be misrepresented * you must not
+ *   claim that you wrote the original software. If you use this software in a
+ *   product, an acknowledgment in the product documentation would be
+ *   appreciated but is not required.
+ *
+ *   2. Altered source versions must be plainly marked as such, and must not
+ *   be misrepresented as being the original software.
+ *
+ *   3. This notice may not be removed or altered from any distribution.
+ *
+ *   4. The names of this software and/or it's copyright holders may not be
+ *   used to endorse or promote products derived from this software without
+ *   specific prior written permission.
+"""
+
+#
+# Incremental build of the unity library
+#
+# Usage: UnityLib.py <platform> [defines...]
+#
+#   e.g. UnityLib.py apple __DHR__  >  build/unity/apple-dhr/unity.lib
+#
+#   Objects are kept in a separate folder for each platform and set of defines,
+#   and shared by all projects. Only translation units whose source or included
+#   files (as listed in the cc65/ca65 dependency files) have changed are
+#   recompiled and replaced in the library.
+#
+
+import os, sys, subprocess, time
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+rootDir = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+############################################
+# Unity library sources
+unityC = {
+    'apple': ['bitmap.c', 'charmap.c', 'chunks.c', 'geom2d.c', 'mouse.c', 'music.c', 'net-base.c', 'net-url.c', 'net-tcp.c', 'net-udp.c', 'net-web.c', 'pixel.c', 'print.c', 'scaling.c', 'sfx.c', 'sprites.c', 'widgets.c', 'Apple/clock.c', 'Apple/directory.c', 'Apple/files.c', 'Apple/hires.c', 'Apple/pixelDHR.c', 'Apple/pixelSHR.c'],
+    'atari': ['bitmap.c', 'charmap.c', 'chunks.c', 'geom2d.c', 'joystick.c', 'mouse.c', 'music.c', 'net-base.c', 'net-url.c', 'net-tcp.c', 'net-udp.c', 'net-web.c', 'pixel.c', 'print.c', 'scaling.c', 'sfx.c', 'sprites.c', 'widgets.c', 'Atari/directory.c', 'Atari/files.c'],
+    'c64':   ['bitmap.c', 'charmap.c', 'chunks.c', 'geom2d.c', 'mouse.c', 'music.c', 'net-base.c', 'net-url.c', 'net-tcp.c', 'net-udp.c', 'net-web.c', 'pixel.c', 'print.c', 'scaling.c', 'sfx.c', 'sprites.c', 'widgets.c', 'C64/directory.c', 'C64/VIC2.c'],
+    'lynx':  ['bitmap.c', 'charmap.c', 'chunks.c', 'geom2d.c', 'hub.c', 'joystick.c', 'mouse.c', 'music.c', 'net-base.c', 'net-url.c', 'net-tcp.c', 'net-udp.c', 'net-web.c', 'pixel.c', 'print.c', 'scaling.c', 'sfx.c', 'sprites.c', 'widgets.c', 'Lynx/display.c', 'Lynx/files.c'],
+    'oric':  ['bitmap.c', 'charmap.c', 'chunks.c', 'geom2d.c', 'hub.c', 'joystick.c', 'mouse.c', 'music.c', 'net-base.c', 'net-url.c', 'net-tcp.c', 'net-udp.c', 'net-web.c', 'pixel.c', 'print.c', 'scaling.c', 'sfx.c', 'sprites.c', 'widgets.c', 'Oric/directory.c', 'Oric/files.c'],
+}
+unityS = {
+    'apple': ['atan2.s', 'chars.s', 'Apple/blitDHR.s', 'Apple/blitSHR.s', 'Apple/DUET.s', 'Apple/hiresLines.s', 'Apple/joystick.s', 'Apple/MOCKING.S', 'Apple/paddle.s', 'Apple/prodos.s'],
+    'atari': ['atan2.s', 'chars.s', 'Atari/DLI.s', 'Atari/ROM.s', 'Atari/xbios.s'],
+    'c64':   ['atan2.s', 'chars.s', 'C64/joystick.s', 'C64/ROM.s', 'C64/SID.s'],
+    'lynx':  ['atan2.s', 'chars.s', 'Lynx/header.s', 'Lynx/serial.s', 'Lynx/suzy.s'],
+    'oric':  ['atan2.s', 'chars.s', 'Oric/blit.s', 'Oric/paseIJK.s', 'Oric/keyboard.s', 'Oric/scroll.s', 'Oric/sedoric.s', 'Oric/MYM.s'],
+}
+
+# Compiler target and assembler flags
+cc65Targets = { 'apple': 'apple2', 'atari': 'atarixl', 'c64': 'c64', 'lynx': 'lynx', 'oric': 'atmos' }
+ca65Flags = { 'apple': [], 'atari': [], 'c64': [], 'lynx': ['--cpu', '65SC02'], 'oric': [] }
+
+def Tool(name):
+    # Use bundled cc65 binaries if present, otherwise those in the PATH
+    bundled = os.path.join(rootDir, 'utils', 'cc65', 'bin', name)
+    if os.path.exists(bundled) or os.path.exists(bundled + '.exe'):
+        return bundled
+    return name
+
+def LibFolder(platform, defines=[]):
+    # e.g. build/unity/apple-dhr/
+    name = platform
+    for define in defines:
+        name += '-' + define.strip('_').lower()
+    return 'build/unity/' + name + '/'
+
+def ReadDeps(depFile):
+    # Return list of prerequisites from make style dependency file
+    with open(depFile, "r") as fp:
+        text = fp.read().replace('\\\n', ' ').replace('\\\r\n', ' ')
+    deps = []
+    for line in text.splitlines():
+        if ': ' in line:
+            deps += line[line.index(': ')+2:].split()
+    return deps
+
+def IsStale(obj):
+    # Object must be rebuilt if missing, or older than any of its prerequisites
+    if not os.path.exists(obj) or not os.path.exists(obj + '.d'):
+        return True
+    try:
+        deps = ReadDeps(obj + '.d')
+    except IOError:
+        return True
+    if len(deps) == 0:
+        return True
+    objTime = os.path.getmtime(obj)
+    for dep in deps:
+        if not os.path.exists(dep) or os.path.getmtime(dep) > objTime:
+            return True
+    return False
+
+def Compile(platform, defines, source, obj):
+    # Compile source to object, and write dependency file
+    flags = []
+    for define in defines:
+        flags += ['-D', define]
+    if source.endswith('.c'):
+        asm = obj[0:-2] + '.s'
+        commands = [ [Tool('cc65'), '-Cl', '-O', '-t', cc65Targets[platform]] + flags + ['-I', os.path.join(rootDir, 'unity'), '--create-dep', obj + '.d', '--dep-target', obj, '-o', asm, source],
+                     [Tool('ca65')] + ca65Flags[platform] + [asm, '-o', obj] ]
+    else:
+        asm = None
+        commands = [ [Tool('ca65')] + ca65Flags[platform] + ['--create-dep', obj + '.d', source, '-o', obj] ]
+    for command in commands:
+        if subprocess.call(command) != 0:
+            if os.path.exists(obj):
+                os.remove(obj)
+            return False
+    if asm and os.path.exists(asm):
+        os.remove(asm)
+    return True
+
+def Lock(folder):
+    # Prevent concurrent builds of the same library (the OS releases the lock if a build is killed)
+    lock = open(folder + 'unity.lock', 'a+')
+    lock.seek(0)
+    for i in range(600):
+        try:
+            if os.name == 'nt':
+                msvcrt.locking(lock.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return lock
+        except IOError:
+            time.sleep(1)
+    print "Error: cannot lock '" + lock.name + "' (another build is still running)"
+    sys.exit(1)
+
+def Unlock(lock):
+    if os.name == 'nt':
+        lock.seek(0)
+        msvcrt.locking(lock.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(lock, fcntl.LOCK_UN)
+    lock.close()
+
+############################################
+# Build library (and return its path)
+def BuildUnityLib(platform, defines=[]):
+    folder = os.path.join(rootDir, LibFolder(platform, defines))
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+    lock = Lock(folder)
+    try:
+        # Find stale objects
+        jobs = []
+        objects = []
+        for file in unityC[platform] + unityS[platform]:
+            source = os.path.join(rootDir, 'unity', file)
+            obj = folder + file[0:-2] + '.o'
+            if not os.path.exists(os.path.dirname(obj)):
+                os.makedirs(os.path.dirname(obj))
+            if IsStale(obj):
+                jobs.append((source, obj))
+            objects.append(obj)
+
+        # Compile in parallel
+        compiled = len(jobs)
+        pool = ThreadPool(cpu_count())
+        results = pool.map(lambda job: Compile(platform, defines, job[0], job[1]), jobs)
+        pool.close()
+        if False in results:
+            print "Error: cannot compile unity library for " + platform
+            sys.exit(1)
+
+        # Rebuild library if list of objects changed, otherwise replace changed objects only
+        lib = folder + 'unity.lib'
+        listing = folder + 'unity.lst'
+        if not os.path.exists(lib) or not os.path.exists(listing) or open(listing, "r").read() != '\n'.join(objects):
+            if os.path.exists(lib):
+                os.remove(lib)
+            jobs = [(None, obj) for obj in objects]
+        if len(jobs) > 0:
+            if subprocess.call([Tool('ar65'), 'r', lib] + [obj for source, obj in jobs]) != 0:
+                if os.path.exists(lib):
+                    os.remove(lib)
+                print "Error: cannot archive unity library for " + platform
+                sys.exit(1)
+            with open(listing, "w") as fp:
+                fp.write('\n'.join(objects))
+        print "Unity library (" + lib[len(rootDir)+1:] + "): " + str(compiled) + " objects compiled"
+        return lib
+    finally:
+        Unlock(lock)
+
+if __name__ == '__main__':
+    platform = sys.argv[1]
+    defines = sys.argv[2:]
+    BuildUnityLib(platform, defines)
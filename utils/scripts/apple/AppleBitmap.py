@@ -25,58 +25,47 @@
 """
 
 from AppleHires import *
-from PIL import Image
-import io, sys
+import io, numpy, sys
 
-mode = sys.argv[1]
-input = sys.argv[2]
-output = sys.argv[3]
+version = 1
 
-try:
+def ConvertBitmap(mode, input, output):
     ###################
     # Read source file
-    img1 = Image.open(input)
-    rawdata = list(img1.getdata())
-    colors = max(rawdata)
+    img1 = OpenImage(input)
+    rawdata = numpy.asarray(img1)
+    colors = rawdata.max()
 
     # Prepare data lists
-    main = [chr(0)]*8192
+    main = bytearray(8192)
     if mode == 'double':
-        aux = [chr(0)]*8192
+        aux = bytearray(8192)
 
-    # Convert bitmap
+    # Convert bitmap in blocks of 7 pixels, packed into 2 bytes (single) or 4 bytes (double)
+    runs = SplitRuns(rawdata, 140, 192)
+    if mode == 'single':
+        blocks = PackSHR(runs, 0, colors > 6)
+    else:
+        blocks = PackDHR(runs)
     for i in range(192):
-        for j in range(0,140,7):
-            pixels = rawdata[i*140+j:i*140+j+7]
-            if mode == 'single':
-                # Reduce palette?
-                if colors > 6:
-                    pixels = RemapDHR2SHR(pixels)
-                res = AssignColorGroup(pixels)    
-                pixels = res[0]; block = res[1]
-                
-                # Process in blocks of 7 pixels, to be packed into 2 bytes
-                for k in range(7):
-                    SetSHRColor(block, k, pixels[k])
-                main[HiresLines[i]+(j*2)/7+0] = (chr(block[0]))
-                main[HiresLines[i]+(j*2)/7+1] = (chr(block[1]))
-                
-            else:
-                # Process in blocks of 7 pixels, to be packed into 4 bytes
-                block = [0,0,0,0]
-                for k in range(7):
-                    SetDHRColor(block, k, pixels[k])
-                aux [HiresLines[i]+(j*2)/7+0] = (chr(block[0]))
-                main[HiresLines[i]+(j*2)/7+0] = (chr(block[1]))
-                aux [HiresLines[i]+(j*2)/7+1] = (chr(block[2]))
-                main[HiresLines[i]+(j*2)/7+1] = (chr(block[3]))
+        if mode == 'single':
+            main[HiresLines[i]:HiresLines[i]+40] = blocks[i].tostring()
+        else:
+            aux [HiresLines[i]:HiresLines[i]+40] = blocks[i][:,0::2].tostring()
+            main[HiresLines[i]:HiresLines[i]+40] = blocks[i][:,1::2].tostring()
 
     # Write to file
     f2 = io.open(output, 'wb')
     if mode == 'double':
-        f2.write(''.join(aux))
-    f2.write(''.join(main))
+        f2.write(aux)
+    f2.write(main)
     f2.close()
 
-except:
-    print "Error: cannot convert " + input + "... (is it a 140x192 PNG file with 6 or 16 color palette?)"
+if __name__ == '__main__':
+    mode = sys.argv[1]
+    input = sys.argv[2]
+    output = sys.argv[3]
+    try:
+        ConvertBitmap(mode, input, output)
+    except:
+        print "Error: cannot convert " + input + "... (is it a 140x192 PNG file with 6 or 16 color palette?)"
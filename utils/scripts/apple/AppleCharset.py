@@ -25,98 +25,64 @@
 """
  
 from AppleHires import *
-from PIL import Image
-import io, os, sys, csv
-from copy import *
+import io, numpy, os, sys, csv
 
-mode = sys.argv[1]
-charFile = sys.argv[2]
-output   = sys.argv[3]
+version = 1
 
-flagFile = charFile.replace('-apple.png', '.csv')
+def ConvertCharset(mode, charFile, output):
+    flagFile = charFile.replace('-apple.png', '.csv')
 
-#################################
-# Read source bitmap and palette
-charImg = Image.open(charFile)
-charRaw = list(charImg.getdata())
-colors = max(charRaw)
-print "Charmap size: {%i,%i}; Colors: %i" % (charImg.size[0], charImg.size[1], colors)
+    #################################
+    # Read source bitmap and palette
+    charImg = OpenImage(charFile)
+    charRaw = numpy.asarray(charImg)
+    colors = charRaw.max()
+    print "Charmap size: {%i,%i}; Colors: %i" % (charImg.size[0], charImg.size[1], colors)
 
-#######################################
-# Rearrange into 2 sets of 3.5*8 blocks
-charL = []; charR = []
-for row in range(0, charImg.size[1], 8):
-    for col in range(0, charImg.size[0], 7):
-        char1L = []; char1R = []; char2L = []; char2R = []
-        for k in range(0, 8):
-            pixels = charRaw[(row+k)*charImg.size[0]+col:(row+k)*charImg.size[0]+col+7]
-            if mode == 'single':   
-                # Reduce palette?
-                if colors > 6:
-                    pixels = RemapDHR2SHR(pixels)
-                res = AssignColorGroup(pixels)    
-                pixels = res[0]
+    #######################################
+    # Rearrange into 2 sets of 3.5*8 blocks
+    runs = Tiles(charRaw, charImg.size[0], charImg.size[1], 7, 8)
+    if mode == 'single':
+        # Left and right positions
+        runs, group = GroupSHR(runs, colors > 6)
+        block1 = PackSHR(runs, 0, group=group)
+        block2 = PackSHR(runs, 4, group=group)
 
-                # Left position
-                block1 = deepcopy(res[1])
-                for j in range(7):
-                    SetSHRColor(block1, j, pixels[j])
-                
-                # Right position
-                block2 = deepcopy(res[1])
-                for j in range(7):
-                    SetSHRColor(block2, (j+4)%7, pixels[j])
+        # Save in respective banks (char 1 then char 2)
+        charL = numpy.stack([block1[...,0], block2[...,0]], axis=1)
+        charR = numpy.stack([block2[...,1], block1[...,1]], axis=1)
+    else:
+        # Left and right positions
+        block1 = PackDHR(runs, 0)
+        block2 = PackDHR(runs, 3)
 
-                # Save in respective banks
-                char1L.append(chr(block1[0]))
-                char2L.append(chr(block2[0]))
-                
-                char1R.append(chr(block2[1]))
-                char2R.append(chr(block1[1]))
-                
-            else:
-                # Left position
-                block1 = [0,0,0,0]
-                for j in range(7):
-                    SetDHRColor(block1, j, pixels[j])
-                    
-                # Left position
-                block2 = [0,0,0,0]
-                for j in range(7):
-                    SetDHRColor(block2, (j+3)%7, pixels[j])
+        # Save in respective banks (char 1 then char 2)
+        charL = numpy.stack([block1[...,0:2], block2[...,0:2]], axis=1)
+        charR = numpy.stack([block2[...,2:4], block1[...,2:4]], axis=1)
+    charL = [charL.tostring()]
+    charR = [charR.tostring()]
 
-                # Save in respective banks
-                char1L.append(chr(block1[0]))
-                char1L.append(chr(block1[1]))
-                char2L.append(chr(block2[0]))
-                char2L.append(chr(block2[1]))
-                
-                char1R.append(chr(block2[2]))
-                char1R.append(chr(block2[3]))
-                char2R.append(chr(block1[2]))
-                char2R.append(chr(block1[3]))
-
-        # Recombine char 1 and 2
-        charL.append(''.join(char1L))
-        charL.append(''.join(char2L))
-        charR.append(''.join(char1R))
-        charR.append(''.join(char2R))
-
-#######################
-# Read character flags
-flagData = [chr(0)] * 128
-with open(flagFile) as csvfile:
-    i = 0
-    rows = csv.reader(csvfile, delimiter=',')
-    for row in rows:
-        for elt in row:
-            flagData[i] = chr(int(elt))
-            i += 1
+    #######################
+    # Read character flags
+    flagData = [chr(0)] * 128
+    with open(flagFile) as csvfile:
+        i = 0
+        rows = csv.reader(csvfile, delimiter=',')
+        for row in rows:
+            for elt in row:
+                flagData[i] = chr(int(elt))
+                i += 1
             
-############################
-# Write output binary file
-f2 = io.open(output, 'wb')
-f2.write(''.join(charL))
-f2.write(''.join(charR))
-f2.write(''.join(flagData))
-f2.close()
+    ############################
+    # Write output binary file
+    f2 = io.open(output, 'wb')
+    f2.write(''.join(charL))
+    f2.write(''.join(charR))
+    f2.write(''.join(flagData))
+    f2.close()
+
+if __name__ == '__main__':
+    mode = sys.argv[1]
+    charFile = sys.argv[2]
+    output   = sys.argv[3]
+    ConvertCharset(mode, charFile, output)
@@ -24,6 +24,13 @@
  *   specific prior written permission.
 """
 
+import numpy, os, sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ImageCache import OpenImage
+from Palette import Remap
+from Tiles import Tiles
+
 ###########################
 # Hi-res Lines Array
 HiresLines = [
@@ -96,38 +103,48 @@ def SetDHRColor(block, pixel, color):
 		block[3] |= (color & 15) << 3
 		
 #############################################
-def RemapDHR2SHR(pixels):
-	remap = [x+100 for x in pixels]                
-	remap = [0 if x==100 else x for x in remap] # BLACK
-	remap = [1 if x==101 else x for x in remap] # DBLUE -> PURPLE
-	remap = [2 if x==102 else x for x in remap] # DGREEN -> GREEN
-	remap = [3 if x==103 else x for x in remap] # BLUE
-	remap = [4 if x==104 else x for x in remap] # BROWN -> ORANGE
-	remap = [0 if x==105 else x for x in remap] # DGREY -> BLACK
-	remap = [2 if x==106 else x for x in remap] # GREEN
-	remap = [2 if x==107 else x for x in remap] # LGREEN -> GREEN
-	remap = [0 if x==108 else x for x in remap] # DPURPLE -> BLACK
-	remap = [1 if x==109 else x for x in remap] # PURPLE                
-	remap = [3 if x==110 else x for x in remap] # LGREY -> BLUE                
-	remap = [3 if x==111 else x for x in remap] # LBLUE -> BLUE
-	remap = [4 if x==112 else x for x in remap] # ORANGE
-	remap = [5 if x==113 else x for x in remap] # PINK -> WHITE
-	remap = [2 if x==114 else x for x in remap] # YELLOW -> GREEN
-	remap = [5 if x==115 else x for x in remap] # WHITE    
-	return remap
-	
+# Packing tables: bytes set by each color at each position of a 7 pixel block
+def PixelTable(setColor, numBytes, numColors):
+	table = numpy.zeros((7, numColors, numBytes), dtype=numpy.uint8)
+	for pixel in range(7):
+		for color in range(numColors):
+			block = [0]*numBytes
+			setColor(block, pixel, color)
+			table[pixel,color] = block
+	return table
+
+SHRTable = PixelTable(SetSHRColor, 2, 4)
+DHRTable = PixelTable(SetDHRColor, 4, 16)
+
 #############################################
-def AssignColorGroup(pixels): 
-	# Find group (Purple/Green) or (Blue/Orange) with most occurence
-	group1 = pixels.count(1)+pixels.count(2)
-	group2 = pixels.count(3)+pixels.count(4)
-	if group1 > group2:
-		block = [0,0]
-	else:
-		block = [128,128] 
+# Pack runs of 7 pixels (array of shape [...,7]) into blocks of bytes (shape [...,N])
+# Pixel j of each run is set at position (j+shift)%7 of the block
+def PackBlocks(table, pixels, shift=0):
+	mask = table.shape[1] - 1
+	blocks = numpy.zeros(pixels.shape[:-1] + (table.shape[2],), dtype=numpy.uint8)
+	for j in range(7):
+		blocks |= table[(j+shift)%7][pixels[...,j] & mask]
+	return blocks
+
+def GroupSHR(pixels, remap=False):
+	# Reduce palette and assign color group of each run (returns pixels and high bit of each run)
+	pixels = numpy.asarray(pixels, dtype=numpy.uint8)
+	if remap:
+		pixels = Remap(pixels, 'DHR2SHR')
+	group1 = numpy.sum((pixels == 1) | (pixels == 2), axis=-1)
+	group2 = numpy.sum((pixels == 3) | (pixels == 4), axis=-1)
+	return Remap(pixels, 'SHRGroup'), numpy.where(group1 > group2, 0, 128).astype(numpy.uint8)
+
+def PackSHR(pixels, shift=0, remap=False, group=None):
+	# Pack into 2 bytes (runs already processed by GroupSHR if group is given)
+	if group is None:
+		pixels, group = GroupSHR(pixels, remap)
+	return PackBlocks(SHRTable, pixels, shift) | group[...,None]
+
+def PackDHR(pixels, shift=0):
+	# Pack into 4 bytes (AUX, MAIN, AUX, MAIN)
+	return PackBlocks(DHRTable, numpy.asarray(pixels, dtype=numpy.uint8), shift)
 
-	# Re-assign all colors according to that group
-	pixels = [1 if x==3 else x for x in pixels]
-	pixels = [2 if x==4 else x for x in pixels]
-	pixels = [3 if x==5 else x for x in pixels]
-	return pixels, block
+def SplitRuns(rawdata, width, height):
+	# Split image into rows of 7 pixel runs (array of shape [height, width/7, 7])
+	return numpy.asarray(rawdata, dtype=numpy.uint8).reshape(height, width/7, 7)
@@ -25,117 +25,46 @@
 """
 
 from AppleHires import *
-from PIL import Image
-import io, sys
+import io, numpy, sys
 
-mode = sys.argv[1]
-input = sys.argv[2]
-output = sys.argv[3]
-height = int(sys.argv[4])
+version = 1
 
-try:
+def ConvertSprites(mode, input, output, height, shifts=[0,2,4,5]):
     ###################
     # Read source file
-    img1 = Image.open(input)
-    rawdata = list(img1.getdata())
-    colors = max(rawdata)
+    img1 = OpenImage(input)
+    rawdata = numpy.asarray(img1)
+    colors = rawdata.max()
 
     # Create sprite file
     f1 = io.open(output, 'wb')
 
-    # Shifted by 0 pix
-    for row in range(0, img1.size[1], height):
-        for col in range(0, img1.size[0], 7):
-            for k in range(0, height):  
-                pixels = rawdata[(row+k)*img1.size[0]+col:(row+k)*img1.size[0]+col+7]
-                if mode == 'single':   
-                    # Reduce palette?
-                    if colors > 6:
-                        pixels = RemapDHR2SHR(pixels)
-                    res = AssignColorGroup(pixels)    
-                    pixels = res[0]; block = res[1]
-                    for j in range(7):
-                        SetSHRColor(block, j, pixels[j])
-                    for j in [0,1]:
-                        f1.write(chr(block[j]))  
-                      
-                else:
-                    block = [0,0,0,0]
-                    for j in range(7):
-                        SetDHRColor(block, j, pixels[j])
-                    for j in [0,2,1,3]:
-                        f1.write(chr(block[j]))
+    # Decode runs of 7 pixels once (palette reduction and color groups)
+    runs = Tiles(rawdata, img1.size[0], img1.size[1], 7, height)
+    if mode == 'single':
+        runs, group = GroupSHR(runs, colors > 6)
 
-    # Shifted by 2 pix
-    for row in range(0, img1.size[1], height):
-        for col in range(0, img1.size[0], 7):
-            for k in range(0, height):  
-                pixels = rawdata[(row+k)*img1.size[0]+col:(row+k)*img1.size[0]+col+7]
-                if mode == 'single':        
-                    # Reduce palette?
-                    if colors > 6:
-                        pixels = RemapDHR2SHR(pixels)
-                    res = AssignColorGroup(pixels)    
-                    pixels = res[0]; block = res[1]
-                    for j in range(7):
-                        SetSHRColor(block, (j+2)%7, pixels[j])
-                    for j in [0,1]:
-                        f1.write(chr(block[j]))  
-                      
-                else:
-                    block = [0,0,0,0]
-                    for j in range(7):
-                        SetDHRColor(block, (j+2)%7, pixels[j])
-                    for j in [0,2,1,3]:
-                        f1.write(chr(block[j]))            
-            
-    # Shifted by 4 pix
-    for row in range(0, img1.size[1], height):
-        for col in range(0, img1.size[0], 7):
-            for k in range(0, height):  
-                pixels = rawdata[(row+k)*img1.size[0]+col:(row+k)*img1.size[0]+col+7]
-                if mode == 'single':        
-                    # Reduce palette?
-                    if colors > 6:
-                        pixels = RemapDHR2SHR(pixels)
-                    res = AssignColorGroup(pixels)    
-                    pixels = res[0]; block = res[1]
-                    for j in range(7):
-                        SetSHRColor(block, (j+4)%7, pixels[j])
-                    for j in [1,0]:
-                        f1.write(chr(block[j]))  
-                      
-                else:
-                    block = [0,0,0,0]
-                    for j in range(7):
-                        SetDHRColor(block, (j+4)%7, pixels[j])
-                    for j in [2,0,3,1]:
-                        f1.write(chr(block[j]))            
-
-    # Shifted by 5 pix
-    for row in range(0, img1.size[1], height):
-        for col in range(0, img1.size[0], 7):
-            for k in range(0, height):  
-                pixels = rawdata[(row+k)*img1.size[0]+col:(row+k)*img1.size[0]+col+7]
-                if mode == 'single':        
-                    # Reduce palette?
-                    if colors > 6:
-                        pixels = RemapDHR2SHR(pixels)
-                    res = AssignColorGroup(pixels)    
-                    pixels = res[0]; block = res[1]
-                    for j in range(7):
-                        SetSHRColor(block, (j+5)%7, pixels[j])
-                    for j in [1,0]:
-                        f1.write(chr(block[j]))  
-                      
-                else:
-                    block = [0,0,0,0]
-                    for j in range(7):
-                        SetDHRColor(block, (j+5)%7, pixels[j])
-                    for j in [2,0,3,1]:
-                        f1.write(chr(block[j]))            
+    # Write blocks shifted by each offset (bytes are swapped once the first pixel is in the second byte)
+    for shift in shifts:
+        if mode == 'single':
+            blocks = PackSHR(runs, shift, group=group)
+            order = [0,1] if shift < 4 else [1,0]
+        else:
+            blocks = PackDHR(runs, shift)
+            order = [0,2,1,3] if shift < 4 else [2,0,3,1]
+        f1.write(blocks[...,order].tostring())
 
     f1.close()
 
-except:
-    print "Error: cannot convert " + input + "... (is it a 14x? PNG file with 6 or 16 color palette?)"
+if __name__ == '__main__':
+    mode = sys.argv[1]
+    input = sys.argv[2]
+    output = sys.argv[3]
+    height = int(sys.argv[4])
+    shifts = [0,2,4,5]
+    if len(sys.argv) > 5:
+        shifts = [int(n) for n in sys.argv[5].split(',')]
+    try:
+        ConvertSprites(mode, input, output, height, shifts)
+    except:
+        print "Error: cannot convert " + input + "... (is it a 14x? PNG file with 6 or 16 color palette?)"
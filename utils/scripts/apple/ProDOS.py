@@ -0,0 +1,232 @@
+"""
+ * Copyright (c) 2020 Anthony Beaucamp.
+ *
+ * This software is provided 'as-is', without any express or implied warranty.
+ * In no event will the authors be held liable for any damages arising from
+ * the use of this software.
+ *
+ * Permission is granted to anyone to use this software for any purpose,
+ * including commercial applications, and to alter it and redistribute it
+ * freely, subject to the following restrictions:
+ *
+ *   1. The origin of this software must not be misrepresented * you must not
+ *   claim that you wrote the original software. If you use this software in a
+ *   product, an acknowledgment in the product documentation would be
+ *   appreciated but is not required.
+ *
+ *   2. Altered source versions must be plainly marked as such, and must not
+ *   be misrepresented as being the original software.
+ *
+ *   3. This notice may not be removed or altered from any distribution.
+ *
+ *   4. The names of this software and/or it's copyright holders may not be
+ *   used to endorse or promote products derived from this software without
+ *   specific prior written permission.
+"""
+
+#
+# ProDOS disk image writer (replaces AppleCommander)
+#
+# Usage: ProDOS.py <template.dsk> <image.do|image.po> <loader> [NAME=file ...] [@list ...]
+#
+#   Copies the template, adds the loader as LOADER (bin at $0803, or type and
+#   address from its header if it is an AppleSingle file), then adds each other
+#   file as bin at $2000. Files named in a list (such as chunks.lst) are added
+#   under their base name. Files are allocated the same way as AppleCommander,
+#   with the time stamp taken from SOURCE_DATE_EPOCH if it is set.
+#
+
+import os, sys, struct, time
+
+blockSize = 512
+
+# ProDOS block to DOS 3.3 sectors mapping (for .do images)
+dosSectors = [0x0, 0xe, 0xd, 0xc, 0xb, 0xa, 0x9, 0x8, 0x7, 0x6, 0x5, 0x4, 0x3, 0x2, 0x1, 0xf]
+
+# File types
+fileTypes = { 'txt': 0x04, 'bin': 0x06, 'bas': 0xfc, 'var': 0xfd, 'rel': 0xfe, 'sys': 0xff }
+
+def Reorder(data, toDos):
+    # Convert 5.25" image between DOS 3.3 and ProDOS sector order
+    output = bytearray(len(data))
+    for track in range(len(data) / 4096):
+        for sector in range(16):
+            dos = track*4096 + dosSectors[sector]*256
+            pro = track*4096 + sector*256
+            if toDos:
+                output[dos:dos+256] = data[pro:pro+256]
+            else:
+                output[pro:pro+256] = data[dos:dos+256]
+    return output
+
+def IsVolume(data):
+    # Check for volume directory header in block 2
+    return len(data) >= 3*blockSize and data[1024:1026] == '\x00\x00' and (ord(data[1028]) >> 4) == 0xf \
+           and ord(data[1024+0x23]) == 0x27 and ord(data[1024+0x24]) == 0x0d
+
+def TimeStamp():
+    # ProDOS date and time (4 bytes)
+    t = time.localtime(int(os.environ.get('SOURCE_DATE_EPOCH', time.time())))
+    return struct.pack('<HBB', ((t.tm_year % 100) << 9) | (t.tm_mon << 5) | t.tm_mday, t.tm_min, t.tm_hour)
+
+def FileName(name):
+    # Same rules as AppleCommander (starts with letter, letters/digits/periods only, 15 chars max)
+    name = os.path.basename(name)
+    valid = ''
+    if not name[0:1].isalpha():
+        valid = 'A'
+    for c in name:
+        if len(valid) < 15 and (c.isalnum() or c == '.'):
+            valid += c
+    return valid.upper()
+
+def AppleSingle(data):
+    # Return data fork, file type and aux type from AppleSingle file (or None)
+    if data[0:8] != '\x00\x05\x16\x00\x00\x02\x00\x00':
+        return None
+    fork, fileType, auxType = '', None, None
+    for i in range(struct.unpack('>H', data[24:26])[0]):
+        entry, offset, length = struct.unpack('>III', data[26+i*12:38+i*12])
+        if entry == 1:
+            fork = data[offset:offset+length]
+        elif entry == 11:
+            fileType, auxType = struct.unpack('>HI', data[offset+2:offset+8])
+    return (fork, fileType, auxType)
+
+############################################
+class ProDOSImage:
+    def __init__(self, template):
+        with open(template, "rb") as fp:
+            data = fp.read()
+        if len(data) == 143360 and IsVolume(str(Reorder(data, False))):
+            data = Reorder(data, False)
+        elif not IsVolume(data):
+            raise IOError("'" + template + "' is not a ProDOS disk image")
+        self.data = bytearray(data)
+        header = 1024 + 4
+        self.fileCount = header + 0x21
+        self.bitmap = struct.unpack('<H', str(self.data[header+0x23:header+0x25]))[0]
+        self.totalBlocks = struct.unpack('<H', str(self.data[header+0x25:header+0x27]))[0]
+
+    def Word(self, offset, value):
+        self.data[offset:offset+2] = struct.pack('<H', value)
+
+    def IsFree(self, block):
+        return self.data[self.bitmap*blockSize + block/8] & (0x80 >> (block % 8))
+
+    def SetUsed(self, block):
+        self.data[self.bitmap*blockSize + block/8] &= ~(0x80 >> (block % 8)) & 0xff
+
+    def FreeBlocks(self):
+        return len([b for b in range(self.totalBlocks) if self.IsFree(b)])
+
+    def FindFree(self):
+        # Lowest free block
+        for block in range(self.totalBlocks):
+            if self.IsFree(block):
+                return block
+        raise IOError('Disk full')
+
+    def Entries(self):
+        # Offsets of file entries in volume directory
+        block = 2
+        index = 1
+        while block != 0:
+            for i in range(index, 13):
+                yield block*blockSize + 4 + i*0x27
+            block = struct.unpack('<H', str(self.data[block*blockSize+2:block*blockSize+4]))[0]
+            index = 0
+
+    def AddFile(self, name, data, fileType=fileTypes['bin'], auxType=0x2000):
+        # Find unused directory entry (checking name is not taken)
+        name = FileName(name)
+        entry = None
+        for offset in self.Entries():
+            length = self.data[offset] & 0x0f
+            if (self.data[offset] >> 4) == 0:
+                if entry is None:
+                    entry = offset
+            elif str(self.data[offset+1:offset+1+length]) == name:
+                raise IOError("File '" + name + "' already exists")
+        if entry is None:
+            raise IOError("Directory full, cannot add '" + name + "'")
+
+        # Check free space (data blocks, index blocks and master index block)
+        dataBlocks = max(1, (len(data) + blockSize - 1) / blockSize)
+        usedBlocks = dataBlocks
+        if dataBlocks > 1:
+            usedBlocks += (dataBlocks - 1) / 256 + 1
+            if dataBlocks > 256:
+                usedBlocks += 1
+        if usedBlocks > self.FreeBlocks():
+            raise IOError("Disk full, cannot add '" + name + "' (" + str(usedBlocks) + " blocks)")
+
+        # Allocate blocks in order: master index, index, data...
+        master = None
+        index = None
+        for i in range(dataBlocks):
+            if dataBlocks > 256 and master is None:
+                master = self.FindFree()
+                self.SetUsed(master)
+            if dataBlocks > 1 and i % 256 == 0:
+                index = self.FindFree()
+                self.SetUsed(index)
+                if master is not None:
+                    self.data[master*blockSize + i/256] = index & 0xff
+                    self.data[master*blockSize + i/256 + 256] = index >> 8
+            block = self.FindFree()
+            self.SetUsed(block)
+            chunk = data[i*blockSize:(i+1)*blockSize]
+            self.data[block*blockSize:(block+1)*blockSize] = chunk + '\x00'*(blockSize-len(chunk))
+            if index is not None:
+                self.data[index*blockSize + i%256] = block & 0xff
+                self.data[index*blockSize + i%256 + 256] = block >> 8
+        if master is not None:
+            storage, key = 3, master
+        elif index is not None:
+            storage, key = 2, index
+        else:
+            storage, key = 1, block
+
+        # Write directory entry
+        stamp = TimeStamp()
+        self.data[entry:entry+0x27] = chr((storage << 4) | len(name)) + name.ljust(15, '\x00') + chr(fileType) + \
+                                      struct.pack('<HH', key, usedBlocks) + struct.pack('<I', len(data))[0:3] + \
+                                      stamp + '\x00\x00\xe3' + struct.pack('<H', auxType) + stamp + struct.pack('<H', 2)
+        self.Word(self.fileCount, struct.unpack('<H', str(self.data[self.fileCount:self.fileCount+2]))[0] + 1)
+
+    def Save(self, filename):
+        data = self.data
+        if not filename.lower().endswith('.po') and len(data) == 143360:
+            data = Reorder(data, True)
+        with open(filename, "wb") as fp:
+            fp.write(data)
+
+############################################
+# Build disk from template, loader and list of files
+def WriteDisk(template, image, loader, files):
+    disk = ProDOSImage(template)
+    with open(loader, "rb") as fp:
+        data = fp.read()
+    header = AppleSingle(data)
+    if header:
+        data, fileType, auxType = header
+        disk.AddFile('LOADER', data, fileType if fileType is not None else fileTypes['bin'], auxType if auxType is not None else 0x0803)
+    else:
+        disk.AddFile('LOADER', data, fileTypes['bin'], 0x0803)
+    for name, filename in files:
+        with open(filename, "rb") as fp:
+            disk.AddFile(name, fp.read())
+    disk.Save(image)
+    print "Disk (" + image + "): " + str(len(files)+1) + " files, " + str(disk.FreeBlocks()) + " blocks free"
+
+if __name__ == '__main__':
+    files = []
+    for arg in sys.argv[4:]:
+        if arg.startswith('@'):
+            with open(arg[1:], "r") as fp:
+                files += [(os.path.basename(line.strip()), line.strip()) for line in fp if line.strip() != '']
+        else:
+            name, filename = arg.split('=', 1)
+            files.append((name, filename))
+    WriteDisk(sys.argv[1], sys.argv[2], sys.argv[3], files)
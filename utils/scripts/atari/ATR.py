@@ -0,0 +1,176 @@
+"""
+ * Copyright (c) 2020 Anthony Beaucamp.
+ *
+ * This software is provided 'as-is', without any express or implied warranty.
+ * In no event will the authors be held liable for any damages arising from
+ * the use of this software.
+ *
+ * Permission is granted to anyone to use this software for any purpose,
+ * including commercial applications, and to alter it and redistribute it
+ * freely, subject to the following restrictions:
+ *
+ *   1. The origin of this software must not be misrepresented * you must not
+ *   claim that you wrote the original software. If you use this software in a
+ *   product, an acknowledgment in the product documentation would be
+ *   appreciated but is not required.
+ *
+ *   2. Altered source versions must be plainly marked as such, and must not
+ *   be misrepresented as being the original software.
+ *
+ *   3. This notice may not be removed or altered from any distribution.
+ *
+ *   4. The names of this software and/or it's copyright holders may not be
+ *   used to endorse or promote products derived from this software without
+ *   specific prior written permission.
+"""
+
+#
+# ATR disk image writer (replaces dir2atr and the staging folder)
+#
+# Usage: ATR.py <image.atr> <720|1440> <boot.obx> [name=file ...] [@list ...]
+#
+#   Writes a double density disk with boot sectors taken from the boot file,
+#   and each file in a DOS 2 (720 sectors) or MyDOS (1440 sectors) compatible
+#   file system. Files named in a list (such as chunks.lst) are written under
+#   their base name. A name of the form name=file1+file2+... links the XEX
+#   segments of the files (see AtariMerge.py) and writes the result in place.
+#
+
+import io, os, struct, sys
+from AtariMerge import ParseXex, LinkXex, XexData
+
+vtocSector = 360
+dirSector = 361
+dirSectors = 8
+
+def FileName(name):
+    # Atari 8.3 file name (padded to 11 chars)
+    name = os.path.basename(name).upper()
+    if '.' in name:
+        base, ext = name.rsplit('.', 1)
+    else:
+        base, ext = name, ''
+    base = ''.join([c for c in base if c.isalnum()])[0:8]
+    ext = ''.join([c for c in ext if c.isalnum()])[0:3]
+    if base == '' or not base[0].isalpha():
+        raise IOError("Invalid Atari file name '" + name + "'")
+    return base.ljust(8) + ext.ljust(3)
+
+############################################
+class ATRImage:
+    def __init__(self, sectors, boot):
+        self.sectors = sectors
+        self.myDos = (sectors > 1023)   # DOS 2 links only address 1023 sectors
+        self.data = bytearray(16 + 3*128 + (sectors-3)*256)
+        self.files = 0
+
+        # Header (paragraphs of 16 bytes, sector size)
+        paragraphs = (len(self.data) - 16) / 16
+        self.data[0:6] = struct.pack('<HHH', 0x0296, paragraphs & 0xffff, 256)
+        self.data[6] = paragraphs >> 16
+
+        # Boot sectors (strip XEX segment headers if any)
+        if boot[0:2] == '\xff\xff':
+            boot = ''.join([block for start, end, block in ParseXex(boot)])
+        self.data[16:16+min(len(boot), 384)] = boot[0:384]
+
+        # VTOC (sectors 1-3, VTOC and directory are used, DOS 2 cannot use sector 720)
+        self.free = [False]*4 + [True]*(sectors-3)
+        for sector in range(vtocSector, dirSector+dirSectors):
+            self.free[sector] = False
+        if not self.myDos and sectors == 720:
+            self.free[720] = False
+        self.total = self.free.count(True)
+
+    def Offset(self, sector):
+        if sector <= 3:
+            return 16 + (sector-1)*128
+        return 16 + 3*128 + (sector-4)*256
+
+    def FreeSectors(self):
+        return self.free.count(True)
+
+    def AddFile(self, name, data):
+        # Find directory entry
+        name = FileName(name)
+        if self.files == dirSectors*8:
+            raise IOError("Directory full, cannot write '" + name.strip() + "'")
+        for i in range(self.files):
+            entry = self.Offset(dirSector + i/8) + (i%8)*16
+            if str(self.data[entry+5:entry+16]) == name:
+                raise IOError("File '" + name + "' already exists")
+        fileNo = self.files
+        entry = self.Offset(dirSector + fileNo/8) + (fileNo%8)*16
+
+        # Allocate sectors in order (253 bytes of data + 3 bytes link per sector)
+        count = max(1, (len(data) + 252) / 253)
+        if count > self.FreeSectors():
+            raise IOError("Disk full, cannot write '" + name.strip() + "' (" + str(count) + " sectors)")
+        sectors = []
+        for sector in range(len(self.free)):
+            if len(sectors) == count:
+                break
+            if self.free[sector]:
+                self.free[sector] = False
+                sectors.append(sector)
+
+        # Write data and links
+        for i in range(count):
+            chunk = data[i*253:(i+1)*253]
+            offset = self.Offset(sectors[i])
+            if i < count-1:
+                next = sectors[i+1]
+            else:
+                next = 0
+            self.data[offset:offset+len(chunk)] = chunk
+            if self.myDos:
+                self.data[offset+253] = next >> 8
+            else:
+                self.data[offset+253] = (fileNo << 2) | (next >> 8)
+            self.data[offset+254] = next & 0xff
+            self.data[offset+255] = len(chunk)
+
+        # Directory entry (in use, created by DOS 2, no file numbers on MyDOS)
+        if self.myDos:
+            flags = 0x46
+        else:
+            flags = 0x42
+        self.data[entry:entry+16] = chr(flags) + struct.pack('<HH', count, sectors[0]) + name
+        self.files += 1
+
+    def Save(self, filename):
+        # Update VTOC
+        vtoc = self.Offset(vtocSector)
+        self.data[vtoc:vtoc+5] = chr(2) + struct.pack('<HH', self.total, self.FreeSectors())
+        for sector in range(len(self.free)):
+            if self.free[sector]:
+                self.data[vtoc + 10 + sector/8] |= 0x80 >> (sector % 8)
+        with io.open(filename, 'wb') as fp:
+            fp.write(self.data)
+
+############################################
+# Build disk from list of files
+def WriteDisk(image, sectors, bootfile, files):
+    with io.open(bootfile, 'rb') as fp:
+        disk = ATRImage(sectors, fp.read())
+    for name, filename in files:
+        if '+' in filename:
+            data = XexData(LinkXex(filename.split('+')))
+        else:
+            with io.open(filename, 'rb') as fp:
+                data = fp.read()
+        disk.AddFile(name, data)
+    disk.Save(image)
+    print "Disk (" + image + "): " + str(disk.files) + " files, " + str(disk.FreeSectors()) + " sectors free"
+    return disk.FreeSectors()
+
+if __name__ == '__main__':
+    files = []
+    for arg in sys.argv[4:]:
+        if arg.startswith('@'):
+            with open(arg[1:], "r") as fp:
+                files += [(os.path.basename(line.strip()), line.strip()) for line in fp if line.strip() != '']
+        else:
+            name, filename = arg.split('=', 1)
+            files.append((name, filename))
+    WriteDisk(sys.argv[1], int(sys.argv[2]), sys.argv[3], files)
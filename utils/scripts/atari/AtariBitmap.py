@@ -24,57 +24,65 @@
  *   specific prior written permission.
 """
  
-import io,struct, sys
-from PIL import Image
+import io, numpy, os, struct, sys
 
-input = sys.argv[1]
-output = sys.argv[2]
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Tiles import PackPixels
+from ImageCache import OpenImage
 
-try:
+version = 1
+
+def EncodeBitmap(pixdata, width, height):
+    # Split colors into low and high 2 bits, swapped on odd pixels to create checker board
+    pixels = numpy.asarray(pixdata, dtype=numpy.uint8).reshape(height, width)
+    y, x = numpy.indices((height, width))
+    odd = (x + y) % 2 == 1
+    low, high = pixels % 4, pixels / 4
+    col1 = numpy.where(odd, high, low).ravel()
+    col2 = numpy.where(odd, low, high).ravel()
+
+    # Position of each pixel in buffers (4 pixels per byte). If width is not a multiple of 4,
+    # rows overlap and the last pixel written to a position wins
+    if width % 4:
+        slots = ((y*(width/4) + x/4)*4 + x%4).ravel()[::-1]
+        slots, last = numpy.unique(slots, return_index=True)
+        last = len(col1) - 1 - last
+    bufs = []
+    for col in [col1, col2]:
+        if width % 4:
+            buf = numpy.zeros(height*width/4*4, dtype=numpy.uint8)
+            buf[slots] = col[last]
+        else:
+            buf = col
+        bufs.append(PackPixels(buf, 2).tostring())
+    return bufs
+
+def ConvertBitmap(input, output):
     ######################
     # Inter-player colors
     palette = [ chr(0x00), chr(0x24), chr(0x86), chr(0xd8) ]
 
     #####################
     # Read source bitmap
-    img1 = Image.open(input)
-    pixdata = list(img1.getdata())
+    img1 = OpenImage(input)
+    pixdata = numpy.asarray(img1)
 
     ################################
     # Convert pixel data to buffers 
-    buf1 = [0] * 8000
-    buf2 = [0] * 8000
-    for y in range(200):
-        for x in range(160):
-            # Convert PNG to INP index 
-            shift = 6 - 2*(x%4)
-            color = pixdata[y*160+x]
-            if (x+y)%2:   # Alternate to create checker board
-                col2 = color%4 << shift
-                col1 = color/4 << shift
-            else:
-                col1 = color%4 << shift
-                col2 = color/4 << shift
-                
-            # Assign bits in both buffers
-            offset = y*40+x/4
-            mask = 255 - (3<<shift)            
-            buf1[offset] = (buf1[offset] & mask) | col1
-            buf2[offset] = (buf2[offset] & mask) | col2  
-            
-    #################
-    # Convert to CHR
-    for i in range(8000):
-        buf1[i] = chr(buf1[i])
-        buf2[i] = chr(buf2[i])
+    buf1, buf2 = EncodeBitmap(pixdata, 160, 200)
             
     ########################
     # Write output INP file
     f2 = io.open(output, 'wb')	
     f2.write(''.join(palette))
-    f2.write(''.join(buf1))
-    f2.write(''.join(buf2))
+    f2.write(buf1)
+    f2.write(buf2)
     f2.close()
 
-except:
-    print "Error: cannot convert " + input + "... (is it a 160x200 PNG file with 16 color palette?)"
+if __name__ == '__main__':
+    input = sys.argv[1]
+    output = sys.argv[2]
+    try:
+        ConvertBitmap(input, output)
+    except:
+        print "Error: cannot convert " + input + "... (is it a 160x200 PNG file with 16 color palette?)"
@@ -24,25 +24,78 @@
  *   specific prior written permission.
 """
 
-import io,struct, sys
-
-def str2hex(input):
-    return "0x"+input.encode("hex")
-    
-# Read binary files
-data = []
-for i in range(2, len(sys.argv)):
-    f = io.open(sys.argv[i], 'rb')
-    data.append(f.read())
-    f.close()
-
-# Merge into single file
-f = io.open(sys.argv[1], 'wb')
-for i in range(0, len(data)):
-    if i is 0:
-        f.write(data[0])    # Include leading 2 bytes
-    else:
-        f.write(data[i][2:len(data[i])]) # Exclude leading 2 bytes
-    Sta = str2hex(data[i][3]+data[i][2]); End = hex(int(Sta, 16)+len(data[i])-7)
-    print "block%i: %s - %s" % (i, Sta, End)
-f.close()
+#
+# XEX linker
+#
+# Usage: AtariMerge.py <output> <input.xex> [input.xex...]
+#
+#   Parses the segments of all inputs, checks that segments loaded before the
+#   same INIT call do not overlap, merges contiguous segments and writes a
+#   single executable with one $FFFF header.
+#
+
+import io, struct, sys
+
+runVector = 0x02e0
+initVector = 0x02e2
+
+def IsVector(start, end):
+    # Segment writes to RUNAD or INITAD
+    return start <= initVector+1 and end >= runVector
+
+def ParseXex(data, filename=''):
+    # Return list of segments (start, end, data)
+    segments = []
+    i = 0
+    while i < len(data):
+        if i+2 <= len(data) and data[i:i+2] == '\xff\xff':
+            i += 2
+            continue
+        if i+4 > len(data):
+            raise IOError("Truncated segment header in '" + filename + "'")
+        start, end = struct.unpack('<HH', data[i:i+4])
+        if end < start or i+5+end-start > len(data):
+            raise IOError("Invalid segment $%04X-$%04X in '%s'" % (start, end, filename))
+        segments.append((start, end, data[i+4:i+5+end-start]))
+        i += 5+end-start
+    return segments
+
+def LinkXex(files):
+    # Link segments of all files (in order)
+    segments = []
+    loaded = []
+    for filename in files:
+        with io.open(filename, 'rb') as f:
+            data = f.read()
+        if data[0:2] != '\xff\xff':
+            raise IOError("'" + filename + "' is not an Atari executable")
+        for start, end, block in ParseXex(data, filename):
+            # Check overlaps with segments loaded since last INIT call
+            if not IsVector(start, end):
+                for s, e, name in loaded:
+                    if start <= e and end >= s:
+                        raise IOError("Segment $%04X-$%04X of '%s' overlaps segment $%04X-$%04X of '%s'" % (start, end, filename, s, e, name))
+                loaded.append((start, end, filename))
+            elif end >= initVector:
+                loaded = []
+
+            # Merge with previous segment if contiguous
+            if len(segments) > 0 and segments[-1][1]+1 == start and not IsVector(start, end) and not IsVector(segments[-1][0], segments[-1][1]):
+                segments[-1] = (segments[-1][0], end, segments[-1][2] + block)
+            else:
+                segments.append((start, end, block))
+    return segments
+
+def XexData(segments):
+    # Single $FFFF header followed by segments
+    return '\xff\xff' + ''.join([struct.pack('<HH', start, end) + block for start, end, block in segments])
+
+def WriteXex(filename, segments):
+    with io.open(filename, 'wb') as f:
+        f.write(XexData(segments))
+            
+if __name__ == '__main__':
+    segments = LinkXex(sys.argv[2:])
+    WriteXex(sys.argv[1], segments)
+    for i in range(len(segments)):
+        print "block%i: $%04X - $%04X" % (i, segments[i][0], segments[i][1])
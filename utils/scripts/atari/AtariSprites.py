@@ -24,51 +24,49 @@
  *   specific prior written permission.
 """
  
-import io,struct, sys
-from PIL import Image
+import io, numpy, os, struct, sys
 
-input = sys.argv[1]
-output = sys.argv[2]
-height = int(sys.argv[3])
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Tiles import Tiles
+from ImageCache import OpenImage
 
-#################################
-# Read source bitmap and palette
-img1 = Image.open(input)
-rawdata = list(img1.getdata())
-colors = max(rawdata)
-print "Sprite sheet size: {%i,%i}; Number of colors: %i" % (img1.size[0], img1.size[1], colors)
+version = 1
 
-###################################
-# Rearrange into 8 * Height blocks
-pixdata = []
-for row in range(0, img1.size[1], height):
-    for col in range(0, img1.size[0], 8):
-        for j in range(0, height):        
-            for i in range(0, 8):
-                pixdata.append(rawdata[(row+j)*img1.size[0]+col+i])
+def ConvertSprites(input, output, height):
+    #################################
+    # Read source bitmap and palette
+    img1 = OpenImage(input)
+    rawdata = numpy.asarray(img1)
+    colors = int(rawdata.max())
+    print "Sprite sheet size: {%i,%i}; Number of colors: %i" % (img1.size[0], img1.size[1], colors)
 
-################################
-# Convert pixel data to buffers 
-block = 8*height
-frames = len(pixdata) / block
-numBytes = (colors*frames*height)
-sprdata = [chr(0)] * numBytes
-for color in range(1,colors+1):
-    for frame in range(frames):
-        for i in range(0, block, 8):
-            sprdata[(color-1)*frames*height+frame*height+i/8] = \
-                chr(((pixdata[frame*block+i+7]==color)<<0) + ((pixdata[frame*block+i+6]==color)<<1) + 
-                    ((pixdata[frame*block+i+5]==color)<<2) + ((pixdata[frame*block+i+4]==color)<<3) + 
-                    ((pixdata[frame*block+i+3]==color)<<4) + ((pixdata[frame*block+i+2]==color)<<5) + 
-                    ((pixdata[frame*block+i+1]==color)<<6) + ((pixdata[frame*block+i+0]==color)<<7))
+    ###################################
+    # Rearrange into 8 * Height blocks
+    pixdata = Tiles(rawdata, img1.size[0], img1.size[1], 8, height)
+    frames = len(pixdata)
 
-###########################
-# Write output binary file
-f2 = io.open(output, 'wb')
-begLow = chr(0x00)
-begHig = chr(0x90)
-endLow = chr((0x9000+numBytes-1)%256)
-endHig = chr((0x9000+numBytes-1)/256)
-f2.write(''.join([chr(0xff),chr(0xff),begLow,begHig,endLow,endHig]))
-f2.write(''.join(sprdata))
-f2.close()
+    ################################
+    # Convert pixel data to buffers (single pass: the bit of each pixel is added to the byte of its color plane)
+    numBytes = (colors*frames*height)
+    lines = numpy.arange(frames*height).reshape(frames, height, 1)
+    bits = numpy.array([128, 64, 32, 16, 8, 4, 2, 1])
+    planes = numpy.bincount((pixdata.astype(int)*frames*height + lines).ravel(), 
+                            weights=numpy.tile(bits, frames*height), minlength=(colors+1)*frames*height)
+    sprdata = planes[frames*height:].astype(numpy.uint8).tostring()
+
+    ###########################
+    # Write output binary file
+    f2 = io.open(output, 'wb')
+    begLow = chr(0x00)
+    begHig = chr(0x90)
+    endLow = chr((0x9000+numBytes-1)%256)
+    endHig = chr((0x9000+numBytes-1)/256)
+    f2.write(''.join([chr(0xff),chr(0xff),begLow,begHig,endLow,endHig]))
+    f2.write(sprdata)
+    f2.close()
+
+if __name__ == '__main__':
+    input = sys.argv[1]
+    output = sys.argv[2]
+    height = int(sys.argv[3])
+    ConvertSprites(input, output, height)
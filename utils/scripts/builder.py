@@ -29,6 +29,8 @@ import tkMessageBox as messagebox
 from tkFileDialog import askopenfilename, asksaveasfilename
 from PIL import Image, ImageTk
 import os, pickle, pygubu
+from BuildGraph import WriteBuildGraph
+from UnityLib import LibFolder
 
 def FileBase(filepath, suffix):
     # Return asset file base
@@ -171,6 +173,7 @@ class Application:
         self.combobox_OricImageQuality.current(1)
 
         # Make lists of various GUI inputs (adding new inputs to the end of each list will guarantee backward compatibility)
+        # Note: BuildProject.py reads .builder files without the GUI, keep its lists of names in the same order!
         self.entries = [ self.entry_Disk, 
                          self.entry_AppleSpriteFrames, self.entry_AppleSpriteWidth, self.entry_AppleSpriteHeight, 
                          self.entry_AtariSpriteFrames, self.entry_AtariSpriteWidth, self.entry_AtariSpriteHeight, 
@@ -516,6 +519,22 @@ class Application:
     def OricMusicRem(self):
         self.listbox_OricMusic.delete(0, ACTIVE) 
 
+    def Project(self):
+        # Collect project settings (as used by BuildGraph)
+        project = { 'Disk': self.entry_Disk.get() }
+        for item in ['Code', 'Charmap', 'Shared']:
+            project[item] = list(getattr(self, 'listbox_' + item).get(0, END))
+        for platform in ['Apple', 'Atari', 'C64', 'Lynx', 'Oric']:
+            for item in ['Bitmap', 'Charset', 'Sprites', 'Chunks', 'Music']:
+                project[platform + item] = list(getattr(self, 'listbox_' + platform + item).get(0, END))
+            for item in ['SpriteFrames', 'SpriteWidth', 'SpriteHeight']:
+                project[platform + item] = getattr(self, 'entry_' + platform + item).get()
+        project['AtariNoText'] = len(self.Checkbutton_AtariNoText.state()) > 0
+        project['AtariDiskSize'] = self.Combobox_AtariDiskSize.get()
+        project['OricDithering'] = self.entry_OricDithering.get()
+        project['OricImageQuality'] = self.combobox_OricImageQuality.get()
+        return project
+
     def GenerateBuilder(self):
         diskname = self.entry_Disk.get()
         code = list(self.listbox_Code.get(0, END))
@@ -550,49 +569,38 @@ class Application:
                 else:
                     graphics = 'single'
                 
-                # Bitmaps
-                for item in bitmaps:
-                    fp.write('utils\\py27\\python utils\\scripts\\apple\\AppleBitmap.py ' + graphics + ' ' + item + ' build/apple/' + FileBase(item, '-apple.png') + '.img\n')
+                # Assets manifest
+                manifest = diskname + '-apple' + target + '-assets.txt'
+                with open("../../build/"+manifest, "wb") as fm:
+                    # Bitmaps
+                    for item in bitmaps:
+                        fm.write('AppleBitmap ' + graphics + ' ' + item + ' build/apple/' + FileBase(item, '-apple.png') + '.img\n')
+
+                    # Charset
+                    if len(charset) > 0:
+                        fb = FileBase(charset[0], '-apple.png')
+                        fm.write('AppleCharset ' + graphics + ' ' + charset[0] + ' build/apple/' + fb + '.dat\n')
+                        
+                    # Sprites
+                    if len(sprites) > 0:
+                        spriteHeight = int(self.entry_AppleSpriteHeight.get())
+                        fm.write('AppleSprites ' + graphics + ' ' + sprites[0] + ' build/apple/sprites.dat ' + str(spriteHeight) + '\n')
 
-                # Charset
-                if len(charset) > 0:
-                    fb = FileBase(charset[0], '-apple.png')
-                    fp.write('utils\\py27\python utils\\scripts\\apple\\AppleCharset.py ' + graphics + ' ' + charset[0] + ' build/apple/' + fb + '.dat\n')
-                    
-                # Sprites
-                if len(sprites) > 0:
-                    spriteHeight = int(self.entry_AppleSpriteHeight.get())
-                    fp.write('utils\\py27\\python utils\\scripts\\apple\\AppleSprites.py ' + graphics + ' ' + sprites[0] + ' build/apple/sprites.dat ' + str(spriteHeight) + '\n')
-
-                # Chunks
-                if len(chunks) > 0:
-                    fp.write('utils\\py27\\python utils\\scripts\\ProcessChunks.py apple-' + graphics + ' ' + chunks[0] + ' build/apple/\n')
+                    # Chunks
+                    if len(chunks) > 0:
+                        fm.write('ProcessChunks apple-' + graphics + ' ' + chunks[0] + ' build/apple/\n')
+                fp.write('utils\\py27\\python utils\\scripts\\ProcessAssets.py build/' + manifest + '\n')
 
                 # Info
                 fp.write('\necho DONE!\n\n')
                 fp.write('echo --------------- COMPILE PROGRAM ---------------\n\n')
 
-                # Build Unity Library
-                CList = ['bitmap.c', 'charmap.c', 'chunks.c', 'geom2d.c', 'mouse.c', 'music.c', 'net-base.c', 'net-url.c', 'net-tcp.c', 'net-udp.c', 'net-web.c', 'pixel.c', 'print.c', 'scaling.c', 'sfx.c', 'sprites.c', 'widgets.c', 'Apple\\CLOCK.c', 'Apple\\directory.c', 'Apple\\files.c', 'Apple\\hires.c', 'Apple\\pixelDHR.c', 'Apple\\pixelSHR.c']
-                SList = ['atan2.s', 'chars.s', 'Apple\\blitDHR.s', 'Apple\\blitSHR.s', 'Apple\\DUET.s', 'Apple\\hiresLines.s', 'Apple\\joystick.s', 'Apple\\MOCKING.s', 'Apple\\PADDLE.s', 'Apple\\prodos.s']
-                             
-                for file in CList:
-                    if graphics == 'double':
-                        fp.write('utils\\cc65\\bin\\cc65 -Cl -O -t apple2 -D __DHR__ -I unity unity\\' + file + '\n')
-                    else:
-                        fp.write('utils\\cc65\\bin\\cc65 -Cl -O -t apple2 -I unity unity\\' + file + '\n')
-                    fp.write('utils\\cc65\\bin\\ca65 unity\\' + file[0:-2] + '.s\n')
-                    fp.write('del unity\\' + file[0:-2] + '.s\n')
-
-                for file in SList:            
-                    fp.write('utils\\cc65\\bin\\ca65 unity\\' + file + '\n')
-                
-                fp.write('utils\\cc65\\bin\\ar65 r build/apple/unity.lib ')
-                for file in CList:
-                    fp.write('unity\\' + file[0:-2] + '.o ')
-                for file in SList:            
-                    fp.write('unity\\' + file[0:-2] + '.o ')
-                fp.write('\n')
+                # Build Unity Library (shared between projects)
+                if graphics == 'double':
+                    defines = ['__DHR__']
+                else:
+                    defines = []
+                fp.write('utils\\py27\\python utils\\scripts\\UnityLib.py apple ' + ' '.join(defines) + '\n')
                 
                 # Compilation
                 if graphics == 'double':
@@ -602,7 +610,7 @@ class Application:
                 comp = 'utils\\cc65\\bin\\cl65 -o build/apple/' + diskname.lower() + '.bin -m build/' + diskname.lower() + '-apple' + target + '.map -Cl -O -t apple2 ' + symbols + ' -C apple2-hgr.cfg -I unity '
                 for item in code:
                     comp += item + ' '
-                fp.write(comp + 'build/apple/unity.lib unity/IP65/ip65_tcp.lib unity/IP65/ip65_apple2.lib\n\n')
+                fp.write(comp + LibFolder('apple', defines) + 'unity.lib unity/IP65/ip65_tcp.lib unity/IP65/ip65_apple2.lib\n\n')
                 
                 # Compression
                 fp.write('utils\\scripts\\exomizer-3.0.2.exe sfx bin build/apple/' + diskname.lower() + '.bin -o build/apple/loader\n\n')
@@ -612,27 +620,27 @@ class Application:
                 fp.write('echo --------------- APPLE DISK BUILDER --------------- \n\n')
 
                 # Disk builder
-                fp.write('copy utils\\scripts\\apple\\ProDOS190.dsk build\\' + diskname + '-apple' + target + '.do\n')
-                fp.write('utils\\java\\bin\\java -jar utils\\scripts\\apple\\AppleCommander-1.6.0.jar -as build/' + diskname + '-apple' + target + '.do LOADER bin 0x0803 < build/apple/loader\n')
+                disk = 'utils\\py27\\python utils\\scripts\\apple\\ProDOS.py utils/scripts/apple/ProDOS190.dsk build/' + diskname + '-apple' + target + '.do build/apple/loader'
                 if len(sprites) > 0:
-                    fp.write('utils\\java\\bin\\java -jar utils\\scripts\\apple\\AppleCommander-1.6.0.jar -p build/' + diskname + '-apple' + target + '.do SPRITES.DAT bin < build/apple/sprites.dat\n')
+                    disk += ' SPRITES.DAT=build/apple/sprites.dat'
                 for item in bitmaps:
                     fb = FileBase(item, '-apple.png')
-                    fp.write('utils\\java\\bin\\java -jar utils\\scripts\\apple\\AppleCommander-1.6.0.jar -p build/' + diskname + '-apple' + target + '.do ' + fb.upper() + '.IMG bin < build/apple/' + fb + '.img\n')
+                    disk += ' ' + fb.upper() + '.IMG=build/apple/' + fb + '.img'
                 if len(charset) > 0:
                     fb = FileBase(charset[0], '-apple.png')
-                    fp.write('utils\\java\\bin\\java -jar utils\\scripts\\apple\\AppleCommander-1.6.0.jar -p build/' + diskname + '-apple' + target + '.do ' + fb.upper() + '.DAT bin < build/apple/' + fb + '.dat\n')
+                    disk += ' ' + fb.upper() + '.DAT=build/apple/' + fb + '.dat'
                 for item in charmaps:
                     fb = FileBase(item, '.map')
-                    fp.write('utils\\java\\bin\\java -jar utils\\scripts\\apple\\AppleCommander-1.6.0.jar -p build/' + diskname + '-apple' + target + '.do ' + fb.upper() + '.MAP bin < ' + item + '\n')
+                    disk += ' ' + fb.upper() + '.MAP=' + item
                 for item in music:
                     fb = FileBase(item, '-apple.m')
-                    fp.write('utils\\java\\bin\\java -jar utils\\scripts\\apple\\AppleCommander-1.6.0.jar -p build/' + diskname + '-apple' + target + '.do ' + fb.upper() + '.MUS bin < ' +item + '\n')
+                    disk += ' ' + fb.upper() + '.MUS=' + item
                 for item in shared:
                     fb = FileBase(item, '')
-                    fp.write('utils\\java\\bin\\java -jar utils\\scripts\\apple\\AppleCommander-1.6.0.jar -p build/' + diskname + '-apple' + target + '.do ' + fb.upper() + ' bin < ' + item + '\n')
+                    disk += ' ' + fb.upper() + '=' + item
                 if len(chunks) > 0:
-                    fp.write('for /f "tokens=*" %%A in (build\\apple\\chunks.lst) do utils\\java\\bin\\java -jar utils\\scripts\\apple\\AppleCommander-1.6.0.jar -p build/' + diskname + '-apple' + target + '.do %%~nxA bin < %%A \n')
+                    disk += ' @build/apple/chunks.lst'
+                fp.write(disk + '\n')
                 
                 # Info
                 fp.write('\necho DONE\n')
@@ -657,56 +665,34 @@ class Application:
             fp.write('del build\\atari\\*.* /F /Q\n\n')
             fp.write('echo --------------- CONVERT ASSETS ---------------  \n\n')
             
-            # Bitmaps
-            for item in bitmaps:
-                fp.write('utils\\py27\\python utils\\scripts\\atari\\AtariBitmap.py ' + item + ' build/atari/' + FileBase(item, '-atari.png') + '.img\n')
-                
-            # Charmaps/Charset
-            for item in charmaps:
-                fp.write('copy ' + item.replace('/', '\\') + ' build\\atari\n')
-            if len(charset) > 0:
-                fb = FileBase(charset[0], '-atari.png')
-                fp.write('utils\\py27\python utils\\scripts\\atari\\AtariCharset.py ' + charset[0] + ' build/atari/' + fb + '.dat\n')
-                
-            # Sprites    
-            if len(sprites) > 0:
-                spriteHeight = int(self.entry_AtariSpriteHeight.get())
-                fp.write('utils\\py27\\python utils\\scripts\\atari\\AtariSprites.py ' + sprites[0] + ' build/atari/sprites.dat ' + str(spriteHeight) + '\n')
-                
-            # Chunks
-            if len(chunks) > 0:
-                fp.write('utils\\py27\\python utils\\scripts\\ProcessChunks.py atari ' + chunks[0] + ' build/atari/\n')
-
-            # Shared Data
-            for item in shared:
-                fp.write('copy ' + item.replace('/','\\') + ' build\\atari\n')
-
-            # Music
-            for item in music:
-                fp.write('copy ' + item.replace('/','\\') + ' build\\atari\\' + FileBase(item, '-atari.rmt') + '.mus\n')
+            # Assets manifest
+            manifest = diskname + '-atari-assets.txt'
+            with open("../../build/"+manifest, "wb") as fm:
+                # Bitmaps
+                for item in bitmaps:
+                    fm.write('AtariBitmap ' + item + ' build/atari/' + FileBase(item, '-atari.png') + '.img\n')
+                    
+                # Charset
+                if len(charset) > 0:
+                    fb = FileBase(charset[0], '-atari.png')
+                    fm.write('AtariCharset ' + charset[0] + ' build/atari/' + fb + '.dat\n')
+                    
+                # Sprites    
+                if len(sprites) > 0:
+                    spriteHeight = int(self.entry_AtariSpriteHeight.get())
+                    fm.write('AtariSprites ' + sprites[0] + ' build/atari/sprites.dat ' + str(spriteHeight) + '\n')
+                    
+                # Chunks
+                if len(chunks) > 0:
+                    fm.write('ProcessChunks atari ' + chunks[0] + ' build/atari/\n')
+            fp.write('utils\\py27\\python utils\\scripts\\ProcessAssets.py build/' + manifest + '\n')
 
             # Info
             fp.write('\necho DONE!\n\n')
             fp.write('echo --------------- COMPILE PROGRAM ---------------\n\n')
 
-            # Build Unity Library
-            CList = ['bitmap.c', 'charmap.c', 'chunks.c', 'geom2d.c', 'joystick.c', 'mouse.c', 'music.c', 'net-base.c', 'net-url.c', 'net-tcp.c', 'net-udp.c', 'net-web.c', 'pixel.c', 'print.c', 'scaling.c', 'sfx.c', 'sprites.c', 'widgets.c', 'Atari\\directory.c', 'Atari\\files.c']
-            SList = ['atan2.s', 'chars.s', 'Atari\\DLI.s', 'Atari\\ROM.s', 'Atari\\xbios.s']
-                         
-            for file in CList:
-                fp.write('utils\\cc65\\bin\\cc65 -Cl -O -t atarixl -I unity unity\\' + file + '\n')
-                fp.write('utils\\cc65\\bin\\ca65 unity\\' + file[0:-2] + '.s\n')
-                fp.write('del unity\\' + file[0:-2] + '.s\n')
-
-            for file in SList:            
-                fp.write('utils\\cc65\\bin\\ca65 unity\\' + file + '\n')
-            
-            fp.write('utils\\cc65\\bin\\ar65 r build/atari/unity.lib ')
-            for file in CList:
-                fp.write('unity\\' + file[0:-2] + '.o ')
-            for file in SList:            
-                fp.write('unity\\' + file[0:-2] + '.o ')
-            fp.write('\n')
+            # Build Unity Library (shared between projects)
+            fp.write('utils\\py27\\python utils\\scripts\\UnityLib.py atari\n')
             
             # Compilation
             if len(self.Checkbutton_AtariNoText.state()):
@@ -716,32 +702,39 @@ class Application:
             comp = 'utils\\cc65\\bin\\cl65 -o build/atari/' + diskname.lower() + '.bin -m build/' + diskname.lower() + '-atari.map -Cl -O -t atarixl ' + symbols + '-C atarixl-largehimem.cfg -I unity '
             for item in code:
                 comp += (item + ' ')
-            fp.write(comp + 'unity/Atari/POKEY.s build/atari/unity.lib unity/IP65/ip65_tcp.lib unity/IP65/ip65_atarixl.lib\n')
+            fp.write(comp + 'unity/Atari/POKEY.s ' + LibFolder('atari') + 'unity.lib unity/IP65/ip65_tcp.lib unity/IP65/ip65_atarixl.lib\n')
             fp.write('utils\\cc65\\bin\\cl65 -t atarixl -C atari-asm.cfg -o build/atari/basicoff.bin unity/Atari/BASICOFF.s\n')
             fp.write('utils\\scripts\\atari\\mads.exe -o:build/atari/rmt.bin unity/Atari/RMT.a65\n\n')
 
-            # Merging
-            fp.write('utils\\py27\\python utils\\scripts\\atari\\AtariMerge.py build/atari/xautorun build/atari/basicoff.bin build/atari/' + diskname.lower() + '.bin build/atari/rmt.bin\n')
-
             # Info
             fp.write('\necho DONE!\n\n')
             fp.write('echo --------------- ATARI DISK BUILDER --------------- \n\n')
 
-            # Clean-up build folder
-            fp.write('del build\\atari\\*.bin\n')
-            fp.write('del build\\atari\\*.lib\n')
-            fp.write('del build\\atari\\*.lst\n')
-            
-            # Copy xBios files
-            fp.write('copy utils\\scripts\\atari\\xbios.com build\\atari\\autorun\n')
-            fp.write('copy utils\\scripts\\atari\\xbios.cfg build\\atari\\xbios.cfg\n')
-
-            # Disk builder
+            # Disk builder (linking basicoff, program and rmt player into xautorun)
             if self.Combobox_AtariDiskSize.get() == '180KB':                
                 diskSize = '720'
             else:
                 diskSize = '1440'
-            fp.write('utils\\scripts\\atari\\dir2atr.exe -d -B utils/scripts/atari/xboot.obx ' + diskSize + ' build/' + diskname + '-atari.atr build\\atari\n')
+            disk = 'utils\\py27\\python utils\\scripts\\atari\\ATR.py build/' + diskname + '-atari.atr ' + diskSize + ' utils/scripts/atari/xboot.obx'
+            disk += ' autorun=utils/scripts/atari/xbios.com xbios.cfg=utils/scripts/atari/xbios.cfg'
+            disk += ' xautorun=build/atari/basicoff.bin+build/atari/' + diskname.lower() + '.bin+build/atari/rmt.bin'
+            for item in bitmaps:
+                fb = FileBase(item, '-atari.png')
+                disk += ' ' + fb + '.img=build/atari/' + fb + '.img'
+            if len(charset) > 0:
+                fb = FileBase(charset[0], '-atari.png')
+                disk += ' ' + fb + '.dat=build/atari/' + fb + '.dat'
+            if len(sprites) > 0:
+                disk += ' sprites.dat=build/atari/sprites.dat'
+            for item in charmaps:
+                disk += ' ' + FileBase(item, '') + '=' + item
+            for item in shared:
+                disk += ' ' + FileBase(item, '') + '=' + item
+            for item in music:
+                disk += ' ' + FileBase(item, '-atari.rmt') + '.mus=' + item
+            if len(chunks) > 0:
+                disk += ' @build/atari/chunks.lst'
+            fp.write(disk + '\n')
 
             # Info
             fp.write('\necho DONE\n')
@@ -767,22 +760,26 @@ class Application:
             fp.write('del build\\c64\\*.* /F /Q\n\n')
             fp.write('echo --------------- CONVERT ASSETS ---------------  \n\n')
             
-            # Bitmaps
-            for item in bitmaps:
-                fp.write('utils\\py27\\python utils\\scripts\\c64\\C64Bitmap.py ' + item + ' build/c64/' + FileBase(item, '-c64.png') + '.img\n')
-                
-            # Charset    
-            if len(charset) > 0:
-                fb = FileBase(charset[0], '-c64.png')
-                fp.write('utils\\py27\python utils\\scripts\\c64\\C64Charset.py ' + charset[0] + ' build/c64/' + fb + '.dat\n')
-                
-            # Sprites
-            if len(sprites) > 0:
-                fp.write('utils\\py27\\python utils\\scripts\\c64\\C64Sprites.py ' + sprites[0] + ' build/c64/sprites.dat\n')
-                
-            # Chunks
-            if len(chunks) > 0:
-                fp.write('utils\\py27\\python utils\\scripts\\ProcessChunks.py c64 ' + chunks[0] + ' build/c64/\n\n')
+            # Assets manifest
+            manifest = diskname + '-c64-assets.txt'
+            with open("../../build/"+manifest, "wb") as fm:
+                # Bitmaps
+                for item in bitmaps:
+                    fm.write('C64Bitmap ' + item + ' build/c64/' + FileBase(item, '-c64.png') + '.img\n')
+                    
+                # Charset    
+                if len(charset) > 0:
+                    fb = FileBase(charset[0], '-c64.png')
+                    fm.write('C64Charset ' + charset[0] + ' build/c64/' + fb + '.dat\n')
+                    
+                # Sprites
+                if len(sprites) > 0:
+                    fm.write('C64Sprites ' + sprites[0] + ' build/c64/sprites.dat\n')
+                    
+                # Chunks
+                if len(chunks) > 0:
+                    fm.write('ProcessChunks c64 ' + chunks[0] + ' build/c64/\n')
+            fp.write('utils\\py27\\python utils\\scripts\\ProcessAssets.py build/' + manifest + '\n\n')
                 
             # Music
             for item in music:
@@ -799,30 +796,14 @@ class Application:
             fp.write('\necho DONE!\n\n')
             fp.write('echo --------------- COMPILE PROGRAM ---------------\n\n')
 
-            # Build Unity Library
-            CList = ['bitmap.c', 'charmap.c', 'chunks.c', 'geom2d.c', 'mouse.c', 'music.c', 'net-base.c', 'net-url.c', 'net-tcp.c', 'net-udp.c', 'net-web.c', 'pixel.c', 'print.c', 'scaling.c', 'sfx.c', 'sprites.c', 'widgets.c', 'C64\\directory.c', 'C64\\VIC2.c']
-            SList = ['atan2.s', 'chars.s', 'C64\\joystick.s', 'C64\\ROM.s', 'C64\\SID.s']
-                         
-            for file in CList:
-                fp.write('utils\\cc65\\bin\\cc65 -Cl -O -t c64 -I unity unity\\' + file + '\n')
-                fp.write('utils\\cc65\\bin\\ca65 unity\\' + file[0:-2] + '.s\n')
-                fp.write('del unity\\' + file[0:-2] + '.s\n')
-
-            for file in SList:            
-                fp.write('utils\\cc65\\bin\\ca65 unity\\' + file + '\n')
-            
-            fp.write('utils\\cc65\\bin\\ar65 r build/c64/unity.lib ')
-            for file in CList:
-                fp.write('unity\\' + file[0:-2] + '.o ')
-            for file in SList:            
-                fp.write('unity\\' + file[0:-2] + '.o ')
-            fp.write('\n')
+            # Build Unity Library (shared between projects)
+            fp.write('utils\\py27\\python utils\\scripts\\UnityLib.py c64\n')
             
             # Compilation                        
             comp = 'utils\\cc65\\bin\\cl65 -o build/c64/' + diskname.lower() + '.bin -m build/' + diskname.lower() + '-c64.map -Cl -O -t c64 -C unity/C64/c64.cfg -I unity '
             for item in code:
                 comp += (item + ' ')
-            fp.write(comp + 'build/c64/unity.lib unity/IP65/ip65_tcp.lib unity/IP65/ip65_c64.lib\n\n')
+            fp.write(comp + LibFolder('c64') + 'unity.lib unity/IP65/ip65_tcp.lib unity/IP65/ip65_c64.lib\n\n')
             
             # Compression
             if len(sprites) > 0:
@@ -835,24 +816,25 @@ class Application:
             fp.write('echo --------------- C64 DISK BUILDER --------------- \n\n')
 
             # Disk builder
-            fp.write('set C1541=utils\\scripts\\c64\\c1541 -format loader,666 d64 build/' + diskname + '-c64.d64 -attach build/' + diskname + '-c64.d64 ')
-            fp.write('-write build/c64/loader.prg loader.prg ')
+            fp.write('utils\\py27\\python utils\\scripts\\c64\\D64.py build/' + diskname + '-c64.d64 loader,666 ')
+            fp.write('loader.prg=build/c64/loader.prg ')
             for item in bitmaps:
                 fb = FileBase(item, '-c64.png')
-                fp.write('-write build/c64/' + fb + '.img ' + fb + '.img ')
+                fp.write(fb + '.img=build/c64/' + fb + '.img ')
             if len(charset) > 0:
                 fb = FileBase(charset[0], '-c64.png')            
-                fp.write('-write build/c64/' + fb + '.dat ' + fb + '.dat ')                           
+                fp.write(fb + '.dat=build/c64/' + fb + '.dat ')                           
             for item in charmaps:
                 fb = FileBase(item, '')
-                fp.write('-write ' + item + ' ' + fb + ' ')
+                fp.write(fb + '=' + item + ' ')
             for item in music:
                 fb = FileBase(item, '-c64.sid')
-                fp.write('-write build/c64/' + fb + '.prg ' + fb + '.mus ')              
+                fp.write(fb + '.mus=build/c64/' + fb + '.prg ')              
             for item in shared:
-                fp.write('-write ' + item + ' ' + FileBase(item, '') + ' ')                
-            fp.write('\nfor /f "tokens=*" %%A in (build\c64\chunks.lst) do set C1541=!C1541!-write %%A %%~nxA \n')
-            fp.write('%C1541%\n')
+                fp.write(FileBase(item, '') + '=' + item + ' ')                
+            if len(chunks) > 0:
+                fp.write('@build/c64/chunks.lst')
+            fp.write('\n')
                
             # Info
             fp.write('\n\necho DONE\n')
@@ -878,46 +860,6 @@ class Application:
             fp.write('del *.* /F /Q\n\n')
             fp.write('echo --------------- CONVERT ASSETS ---------------  \n\n')
             
-            # Keyboard
-            for item in ['cursor', 'keyboard']:
-                fp.write('copy ..\\..\\utils\\scripts\\lynx\\' + item + '.png ' + item + '.png\n')
-                fp.write('..\\..\\utils\\scripts\\png2bmp ' + item + '.png\n')
-                fp.write('..\\..\\utils\\scripts\\lynx\\sprpck -t6 -p2 -u ' + item + '.bmp\n\n')         
-                
-            # Bitmaps
-            for item in bitmaps:
-                fb = FileBase(item, '-lynx.png')
-                fp.write('copy ..\\..\\' + item.replace('/', '\\') + ' ' + fb + '.png\n')
-                fp.write('..\\..\\utils\\scripts\\png2bmp ' + fb + '.png\n')
-                fp.write('..\\..\\utils\\scripts\\lynx\\sprpck -t6 -p2 -u ' + fb + '.bmp\n')
-            if len(bitmaps) > 0:
-                fp.write('\n')
-                
-            # Charset
-            if len(charset) > 0:
-                fp.write('copy ..\\..\\' + charset[0].replace('/', '\\') + ' char.png\n')
-                fp.write('copy ..\\..\\utils\\scripts\\lynx\\font.png' + ' font.png\n')
-                fp.write('..\\..\\utils\\scripts\\png2bmp char.png\n')
-                fp.write('..\\..\\utils\\scripts\\png2bmp font.png\n')
-                fp.write('..\\..\\utils\\scripts\\lynx\\sprpck -t6 -p2 -u -r032004 -S004006 -a000000 char.bmp\n')
-                fp.write('..\\..\\utils\\scripts\\lynx\\sprpck -t6 -p2 -u -r032004 -S004006 -a000000 font.bmp\n')
-                fp.write('..\\..\\utils\\py27\python ..\\..\\utils\\scripts\\lynx\\LynxCharset.py ..\\..\\' + charset[0].replace('/', '\\') + ' charset.dat\n') 
-                fp.write('\n')
-                
-            # Sprites
-            if len(sprites) > 0:
-                spriteFrames = int(self.entry_LynxSpriteFrames.get())
-                spriteWidth  = int(self.entry_LynxSpriteWidth.get())
-                spriteHeight = int(self.entry_LynxSpriteHeight.get())
-                fp.write('copy ..\\..\\' + sprites[0].replace('/', '\\') + ' sprites.png\n')
-                fp.write('..\\..\\utils\\scripts\\png2bmp sprites.png\n')
-                fp.write('..\\..\\utils\\scripts\\lynx\\sprpck -t6 -p2 -u -r001' + str(spriteFrames).zfill(3) + \
-                                            ' -S' + str(spriteWidth).zfill(3) + str(spriteHeight).zfill(3) + \
-                                            ' -a' + str(spriteWidth/2).zfill(3) + str(spriteHeight/2).zfill(3) + ' sprites.bmp\n')
-                if spriteFrames == 1: 
-                    fp.write('ren sprites.spr sprites000000.spr\n')
-                fp.write('\n')
-
             # Charmaps
             for item in charmaps:
                 fb = FileBase(item, '')
@@ -925,24 +867,39 @@ class Application:
             if len(charmaps) > 0:
                 fp.write('\n')
                 
+            # Assets manifest (Keyboard, Bitmaps, Charset, Sprites and Chunks)
+            manifest = diskname + '-lynx-assets.txt'
+            with open("../../build/"+manifest, "wb") as fm:
+                for item in ['cursor', 'keyboard']:
+                    fm.write('LynxSprites ../../utils/scripts/lynx/' + item + '.png ' + item + '.spr literal\n')
+                for item in bitmaps:
+                    fb = FileBase(item, '-lynx.png')
+                    fm.write('LynxSprites ../../' + item + ' ' + fb + '.spr literal\n')
+                if len(charset) > 0:
+                    fm.write('LynxSprites ../../' + charset[0] + ' char.spr literal 32,4 4,6 0,0\n')
+                    fm.write('LynxSprites ../../utils/scripts/lynx/font.png font.spr literal 32,4 4,6 0,0\n')
+                    fm.write('LynxCharset ../../' + charset[0] + ' charset.dat\n')
+                if len(sprites) > 0:
+                    spriteFrames = int(self.entry_LynxSpriteFrames.get())
+                    spriteWidth  = int(self.entry_LynxSpriteWidth.get())
+                    spriteHeight = int(self.entry_LynxSpriteHeight.get())
+                    fm.write('LynxSprites ../../' + sprites[0] + ' sprites.spr literal 1,' + str(spriteFrames) + ' ' + \
+                             str(spriteWidth) + ',' + str(spriteHeight) + ' ' + str(spriteWidth/2) + ',' + str(spriteHeight/2) + '\n')
+                if len(chunks) > 0:
+                    fm.write('ProcessChunks lynx ../../' + chunks[0] + ' ../../build/lynx/\n')
+            fp.write('..\\..\\utils\\py27\\python ..\\..\\utils\\scripts\\ProcessAssets.py ../' + manifest + '\n\n')
+
             # Chunks
             fp.write('set /a CHUNKNUM=0\n')
             if len(chunks) > 0:
-                fp.write('..\\..\\utils\\py27\\python ..\\..\\utils\\scripts\\ProcessChunks.py lynx ../../' + chunks[0] + ' ../../build/lynx/\n')
-                fp.write('for /f "tokens=*" %%A in (chunks.lst) do set CHUNKNAMES=!CHUNKNAMES!_shkName!CHUNKNUM!,&&set /a CHUNKNUM+=1\n')
-            fp.write('set /a FILENUM=!CHUNKNUM!+' + str(len(bitmaps)+len(charmaps)+len(music)+len(shared)) + '\n')
+                fp.write('for /f "tokens=*" %%A in (chunks.lst) do set /a CHUNKNUM+=1\n')
+            fp.write('\n')
 
             # Copy Chipper sfx and music data
             fp.write('copy ..\\..\\unity\\Lynx\\chipper.s soundbs.mac\n')    
             for i in range(len(music)):
                 fp.write('..\\..\\utils\\py27\\python ../../utils/scripts/lynx/LynxChipper.py ../../' + music[i] + ' music' + str(i).zfill(2) + '.asm _musData' + str(i).zfill(2) + ' MUS' + str(i) + 'DATA"\n')
                 
-            # Clean-up
-            fp.write('del *.png /F /Q\n')
-            fp.write('del *.bmp /F /Q\n')
-            fp.write('del *.pal /F /Q\n')
-            fp.write('\n')
-            
             # Copy Shared files
             if len(shared) > 0:             
                 for item in shared:
@@ -950,183 +907,13 @@ class Application:
                     fp.write('copy ..\\..\\' + item.replace('/', '\\') + ' ' + fb + '\n')
                 fp.write('\n')
                 
-            # Get Size of various files
-            filelist = ''
-            for i in range(len(bitmaps)):
-                fb = FileBase(bitmaps[i], '-lynx.png')
-                filelist += fb + '.spr,'
-            for item in charmaps:
-                fb = FileBase(item, '')
-                filelist += fb + ','
-            for i in range(len(music)):
-                filelist += 'music' + str(i).zfill(2) + '.asm,'
-            for item in shared:
-                fb = FileBase(item, '')
-                filelist += fb + ','
-            fp.write('set FILESIZES=\n')
-            fp.write('for %%I in (' + filelist[0:-1] + ') do set FILESIZES=!FILESIZES!%%~zI,\n\n')
-            fp.write('for /f "tokens=*" %%A in (chunks.lst) do set FILESIZES=!FILESIZES!%%~zA,\n') 
-
-            # Generate declare file for read-only data
-            fp.write('@echo .global _fileNum  >> data.asm\n')
-            fp.write('@echo .global _fileSizes >> data.asm\n')
-            fp.write('@echo .global _fileNames >> data.asm\n')
-            fp.write('@echo .global _charNum >> data.asm\n')
-            fp.write('@echo .global _charData >> data.asm\n')
-            fp.write('@echo .global _charFlags >> data.asm\n')
-            fp.write('@echo .global _spriteNum  >> data.asm\n')
-            fp.write('@echo .global _spriteData >> data.asm\n')
-            fp.write('@echo .global _cursorData >> data.asm\n')
-            fp.write('@echo .global _keybrdData >> data.asm\n')
-            fp.write('@echo ; >> data.asm\n')
-            
-            # Num and sizes of files
-            fp.write('@echo .segment "RODATA" >> data.asm\n')
-            fp.write('@echo _fileNum: .byte %FILENUM% >> data.asm\n')  
-
-            # List of file names and data
-            if len(bitmaps) > 0 or len(charmaps) > 0 or len(music) > 0 or len(shared) > 0 or len(chunks) > 0:
-                # Declare all Bitmap, Shared and Chunk files
-                fp.write('@echo _fileSizes: .word %FILESIZES:~0,-1% >> data.asm\n')
-                fp.write('@echo _fileNames: .addr ')
-                counter = 0
-                for i in range(len(bitmaps)):
-                    if counter > 0:
-                        fp.write(',')
-                    fp.write('_bmpName' + str(i).zfill(2))
-                    counter += 1
-                for i in range(len(charmaps)):
-                    if counter > 0:
-                        fp.write(',')
-                    fp.write('_mapName' + str(i).zfill(2))
-                    counter += 1
-                for i in range(len(music)):
-                    if counter > 0:
-                        fp.write(',')
-                    fp.write('_musName' + str(i).zfill(2))
-                    counter += 1
-                for i in range(len(shared)):
-                    if counter > 0:
-                        fp.write(',')
-                    fp.write('_shrName' + str(i).zfill(2))
-                    counter += 1
-                if len(chunks) > 0:
-                    if counter > 0:
-                        fp.write(',')
-                    fp.write('%CHUNKNAMES:~0,-1%')
-                    counter += 1
-                fp.write(' >> data.asm\n')
-
-                # Write list of Bitmaps
-                for i in range(len(bitmaps)):
-                    fb = FileBase(bitmaps[i], '-lynx.png')
-                    fp.write('@echo _bmpName' + str(i).zfill(2) + ': .byte "' + fb + '.img",0 >> data.asm\n')
-
-                # Write list of Charmaps
-                for i in range(len(charmaps)):
-                    fb = FileBase(charmaps[i], '')
-                    fp.write('@echo _mapName' + str(i).zfill(2) + ': .byte "' + fb + '",0 >> data.asm\n')
-
-                # Write list of Musics
-                for i in range(len(music)):
-                    fb = FileBase(music[i], '-lynx.asm')
-                    fp.write('@echo _musName' + str(i).zfill(2) + ': .byte "' + fb + '.mus",0 >> data.asm\n')
-                    
-                # Write list of Shared
-                for i in range(len(shared)):
-                    fb = FileBase(shared[i], '')
-                    fp.write('@echo _shrName' + str(i).zfill(2) + ': .byte "' + fb + '",0 >> data.asm\n')
-                    
-                # Write list of Chunks                
-                if len(chunks) > 0:
-                    fp.write('set /a IND=0\n')
-                    fp.write('for /f "tokens=*" %%A in (chunks.lst) do @echo _shkName!IND!: .byte "%%~nxA",0 >> data.asm && set /a IND+=1\n')
-
-                # Link list of bitmaps
-                fp.write('@echo ; >> data.asm\n')
-                for i in range(len(bitmaps)):
-                    fb = FileBase(bitmaps[i], '-lynx.png')
-                    fp.write('@echo .segment "BMP' + str(i) + 'DATA" >> data.asm\n')
-                    fp.write('@echo _bmpData' + str(i).zfill(2) + ': .incbin "' + fb + '.spr" >> data.asm\n')                    
-
-                # Link list of charmaps
-                fp.write('@echo ; >> data.asm\n')
-                for i in range(len(charmaps)):
-                    fb = FileBase(charmaps[i], '')
-                    fp.write('@echo .segment "BMP' + str(i) + 'DATA" >> data.asm\n')
-                    fp.write('@echo _mapData' + str(i).zfill(2) + ': .incbin "' + fb +'" >> data.asm\n')
-                    
-                # Link list of musics
-                for i in range(len(music)):
-                    fp.write('@echo .segment "MUS' + str(i) + 'DATA" >> data.asm\n')
-                    fp.write('@echo .import _musData' + str(i).zfill(2) + ' >> data.asm\n')
-                    
-                # Link list of shared
-                for i in range(len(shared)):
-                    fb = FileBase(shared[i], '')
-                    fp.write('@echo .segment "SHR' + str(i) + 'DATA" >> data.asm\n')
-                    fp.write('@echo _shrData' + str(i).zfill(2) + ': .incbin "' + fb + '" >> data.asm\n')
-                    
-                # Link list of chunks
-                if len(chunks) > 0:
-                    fp.write('set /a IND=0\n')
-                    fp.write('for /f "tokens=*" %%A in (chunks.lst) do @echo .segment "SHK!IND!DATA" >> data.asm && @echo _shkData!IND!: .incbin "%%~nxA" >> data.asm && set /a IND+=1\n')
-                    
-            else:
-                fp.write('@echo _fileSizes: .word 0 >> data.asm\n')
-                fp.write('@echo _fileNames: .addr _dummyName >> data.asm\n')
-                fp.write('@echo _dummyName: .byte 0 >> data.asm\n')
-            fp.write('@echo ; >> data.asm\n')
-            
-            # Charset Data
-            fp.write('@echo .segment "RODATA" >> data.asm\n')                
-            if len(charset) > 0:            
-                fp.write('@echo _charNum: .byte 255 >> data.asm\n')
-                fp.write('@echo _charData: .addr ')
-                for i in range(0, 128):
-                    if i > 0:
-                        fp.write(', ')
-                    fp.write('_chr' + str(i).zfill(3))
-                for i in range(128, 256):
-                    if i > 0:
-                        fp.write(', ')
-                    fp.write('_fnt' + str(i).zfill(3))
-                fp.write(' >> data.asm\n')
-                i = 0
-                for r in range(4):
-                    for c in range(32):
-                        fp.write('@echo _chr' + str(i).zfill(3) + ': .incbin "char' + str(r).zfill(3) + str(c).zfill(3) + '.spr" >> data.asm\n')
-                        i = i+1
-                for r in range(4):
-                    for c in range(32):
-                        fp.write('@echo _fnt' + str(i).zfill(3) + ': .incbin "font' + str(r).zfill(3) + str(c).zfill(3) + '.spr" >> data.asm\n')
-                        i = i+1
-                fp.write('@echo _charFlags: .incbin "charset.dat" >> data.asm\n')
-            else:
-                fp.write('@echo _charNum: .byte 0 >> data.asm\n')
-                fp.write('@echo _charData: .byte 0 >> data.asm\n')
-                fp.write('@echo _charFlags: .byte 0 >> data.asm\n')
-            fp.write('@echo ; >> data.asm\n')
-            
-            # Sprite Data 
-            fp.write('@echo .segment "RODATA" >> data.asm\n')                
-            fp.write('@echo _spriteNum: .byte ' + self.entry_LynxSpriteFrames.get() + ' >> data.asm\n')            
-            if len(sprites) > 0:            
-                fp.write('@echo _spriteData: .addr ')    
-                for i in range(int(self.entry_LynxSpriteFrames.get())):
-                    if i > 0:
-                        fp.write(', ')
-                    fp.write('_spr' + str(i).zfill(3))
-                fp.write(' >> data.asm\n')
-                for i in range(int(self.entry_LynxSpriteFrames.get())):
-                    fp.write('@echo _spr' + str(i).zfill(3) + ': .incbin "sprites' + str(i).zfill(3) + '000.spr" >> data.asm\n')
-            else:
-                fp.write('@echo _spriteData: .byte 0 >> data.asm\n')
-            fp.write('@echo ; >> data.asm\n')
-
-            # Keybard Binary Data
-            fp.write('@echo _cursorData: .incbin "cursor.spr" >> data.asm\n')             
-            fp.write('@echo _keybrdData: .incbin "keyboard.spr" >> data.asm\n')                                                 
+            # Generate declare file for read-only data (with offsets of chars and sprites in packed files)
+            names = [','.join([FileBase(item, '-lynx.png') for item in bitmaps]), ','.join([FileBase(item, '') for item in charmaps]),
+                     ','.join([FileBase(item, '-lynx.asm') for item in music]), ','.join([FileBase(item, '') for item in shared])]
+            spriteFrames = 0
+            if len(sprites) > 0:
+                spriteFrames = int(self.entry_LynxSpriteFrames.get())
+            fp.write('..\\..\\utils\\py27\\python ..\\..\\utils\\scripts\\lynx\\LynxData.py ./ "' + '" "'.join(names) + '" ' + str(int(len(charset) > 0)) + ' ' + str(spriteFrames) + ' ' + self.entry_LynxSpriteFrames.get() + '\n')
             
             # Done, return to base folder
             fp.write('\n')
@@ -1142,24 +929,8 @@ class Application:
             fp.write('\necho DONE!\n\n')
             fp.write('echo --------------- COMPILE PROGRAM ---------------\n\n')
 
-            # Build Unity Library
-            CList = ['bitmap.c', 'charmap.c', 'chunks.c', 'geom2d.c', 'hub.c', 'joystick.c', 'mouse.c', 'music.c', 'net-base.c', 'net-url.c', 'net-tcp.c', 'net-udp.c', 'net-web.c', 'pixel.c', 'print.c', 'scaling.c', 'sfx.c', 'sprites.c', 'widgets.c', 'Lynx\\display.c', 'Lynx\\files.c']
-            SList = ['atan2.s', 'chars.s', 'Lynx\\header.s', 'Lynx\\serial.s', 'Lynx\\suzy.s']
-                         
-            for file in CList:
-                fp.write('utils\\cc65\\bin\\cc65 -Cl -O -t lynx -I unity unity\\' + file + '\n')
-                fp.write('utils\\cc65\\bin\\ca65 --cpu 65SC02 unity\\' + file[0:-2] + '.s\n')
-                fp.write('del unity\\' + file[0:-2] + '.s\n')
-
-            for file in SList:            
-                fp.write('utils\\cc65\\bin\\ca65 --cpu 65SC02 unity\\' + file + '\n')
-            
-            fp.write('utils\\cc65\\bin\\ar65 r build/lynx/unity.lib ')
-            for file in CList:
-                fp.write('unity\\' + file[0:-2] + '.o ')
-            for file in SList:            
-                fp.write('unity\\' + file[0:-2] + '.o ')
-            fp.write('\n')
+            # Build Unity Library (shared between projects)
+            fp.write('utils\\py27\\python utils\\scripts\\UnityLib.py lynx\n')
             
             # Compilation 
             comp = 'utils\\cc65\\bin\\cl65 -o build/' + diskname.lower() + '-lynx.lnx -m build/' + diskname.lower() + '-lynx.map -Cl -O -t lynx -C build/lynx/lynx.cfg -I unity '
@@ -1167,7 +938,7 @@ class Application:
                 comp += (item + ' ')
             for i in range(len(music)):
                 comp += 'build/lynx/music' + str(i).zfill(2) + '.asm '
-            fp.write(comp + 'unity/Lynx/sfx.s build/lynx/directory.asm build/lynx/data.asm build/lynx/unity.lib\n')
+            fp.write(comp + 'unity/Lynx/sfx.s build/lynx/directory.asm build/lynx/data.asm ' + LibFolder('lynx') + 'unity.lib\n')
             
             # Info
             fp.write('\necho DONE!\n\n')
@@ -1194,72 +965,49 @@ class Application:
             fp.write('del build\\oric\\*.* /F /Q\n\n')
             fp.write('echo --------------- CONVERT ASSETS ---------------  \n\n')
             
-            # Process Bitmaps / Chunks / Sprites / Shared
-            fp.write('cd utils\\scripts\\oric\n')
-            for item in bitmaps:
-                fb = FileBase(item, '-oric.png')
-                if self.combobox_OricImageQuality.get() == 'Hires(Noisy)':
-                    fp.write('luajit PictOric.lua ' + self.entry_OricDithering.get() + ' ../../../' + item + ' ../../../build/oric/' + fb + '.dat\n')
-                else:
-                    fp.write('..\\..\\py27\\python OricBitmap.py ../../../' + item + ' ../../../build/oric/' + fb + '.dat\n')
-                fp.write('header -a0 ../../../build/oric/' + fb + '.dat ../../../build/oric/' + fb + '.img $A000\n')
-                
-            if len(charset) > 0:
-                fb = FileBase(charset[0], '-oric.png')
-                fp.write('..\\..\\py27\python OricCharset.py ' + self.entry_OricDithering.get() +  ' ../../../' + charset[0] + ' ../../../build/oric/' + fb + '.dat\n') 
-                fp.write('header -a0 ../../../build/oric/' + fb + '.dat ../../../build/oric/' + fb + '.dat $A000\n')
-                
-            if len(chunks) > 0:
-                fp.write('..\\..\\py27\\python ProcessChunks.py ' + self.combobox_OricImageQuality.get() + ' ' + self.entry_OricDithering.get() + ' ../../../' + chunks[0] + ' ../../../build/oric/\n')
-                fp.write('for /f "tokens=*" %%A in (..\\..\\..\\build\\oric\\chunks.lst) do header -a0 ../../../%%A ../../../%%A $8000\n')
-            fp.write('cd ..\\..\\..\n')
+            # Assets manifest
+            manifest = diskname + '-oric-assets.txt'
+            with open("../../build/"+manifest, "wb") as fm:
+                # Bitmaps
+                for item in bitmaps:
+                    fb = FileBase(item, '-oric.png')
+                    if self.combobox_OricImageQuality.get() == 'Hires(Noisy)':
+                        fm.write('PictOric ' + self.entry_OricDithering.get() + ' ' + item + ' build/oric/' + fb + '.dat\n')
+                    else:
+                        fm.write('OricBitmap ' + item + ' build/oric/' + fb + '.dat\n')
 
-            for item in charmaps:
-                fb = FileBase(item, '')
-                fp.write('utils\\scripts\\oric\\header -a0 ' + item + ' build/oric/' + fb + ' $A000\n')
-            
-            if len(sprites) > 0:
-                spriteHeight = int(self.entry_OricSpriteHeight.get())
-                fp.write('utils\\py27\\python utils\\scripts\\oric\\OricSprites.py ' + sprites[0] + ' build/oric/sprites.dat ' + str(spriteHeight) + '\n')
-                fp.write('utils\\scripts\\oric\\header -a0 build/oric/sprites.dat build/oric/sprites.dat $7800\n')
-                
+                # Charset
+                if len(charset) > 0:
+                    fb = FileBase(charset[0], '-oric.png')
+                    fm.write('OricCharset ' + self.entry_OricDithering.get() + ' ' + charset[0] + ' build/oric/' + fb + '.dat\n')
+
+                # Sprites
+                if len(sprites) > 0:
+                    spriteHeight = int(self.entry_OricSpriteHeight.get())
+                    fm.write('OricSprites ' + sprites[0] + ' build/oric/sprites.dat ' + str(spriteHeight) + '\n')
+
+                # Chunks
+                if len(chunks) > 0:
+                    fm.write('OricChunks ' + self.combobox_OricImageQuality.get() + ' ' + self.entry_OricDithering.get() + ' ' + chunks[0] + ' build/oric/\n')
+            fp.write('utils\\py27\\python utils\\scripts\\ProcessAssets.py build/' + manifest + '\n')
+
+            # Music
             for item in music:
                 fb = FileBase(item, '-oric.ym')
                 fp.write('utils\\scripts\\oric\\ym2mym ' + item + ' build/oric/' + fb + '.mus\n')
-                fp.write('utils\\scripts\\oric\\header -h1 -a0 build/oric/' + fb + '.mus build/oric/' + fb + '.mus $8000\n')
-                
-            for item in shared:
-                fb = FileBase(item, '')
-                fp.write('utils\\scripts\\oric\\header -a0 ' + item + ' build/oric/' + fb + ' $A000\n')
                 
             # Info
             fp.write('\necho DONE!\n\n')
             fp.write('echo --------------- COMPILE PROGRAM ---------------\n\n')
 
-            # Build Unity Library
-            CList = ['bitmap.c', 'charmap.c', 'chunks.c', 'geom2d.c', 'hub.c', 'joystick.c', 'mouse.c', 'music.c', 'net-base.c', 'net-url.c', 'net-tcp.c', 'net-udp.c', 'net-web.c', 'pixel.c', 'print.c', 'scaling.c', 'sfx.c', 'sprites.c', 'widgets.c', 'Oric\\directory.c', 'Oric\\files.c']
-            SList = ['atan2.s', 'chars.s', 'Oric\\blit.s', 'Oric\\paseIJK.s', 'Oric\\keyboard.s', 'Oric\\scroll.s', 'Oric\\sedoric.s', 'Oric\\MYM.s']
-                         
-            for file in CList:
-                fp.write('utils\\cc65\\bin\\cc65 -Cl -O -t atmos -I unity unity\\' + file + '\n')
-                fp.write('utils\\cc65\\bin\\ca65 unity\\' + file[0:-2] + '.s\n')
-                fp.write('del unity\\' + file[0:-2] + '.s\n')
-
-            for file in SList:            
-                fp.write('utils\\cc65\\bin\\ca65 unity\\' + file + '\n')
-            
-            fp.write('utils\\cc65\\bin\\ar65 r build/oric/unity.lib ')
-            for file in CList:
-                fp.write('unity\\' + file[0:-2] + '.o ')
-            for file in SList:            
-                fp.write('unity\\' + file[0:-2] + '.o ')
-            fp.write('\n')
+            # Build Unity Library (shared between projects)
+            fp.write('utils\\py27\\python utils\\scripts\\UnityLib.py oric\n')
             
             # Compilation 
             comp = 'utils\\cc65\\bin\\cl65 -o build/oric/' + diskname.lower() + '.bin -m build/' + diskname.lower() + '-oric.map -Cl -O -t atmos -C unity/Oric/oric.cfg -I unity '
             for item in code:
                 comp += (item + ' ')
-            fp.write(comp + 'build/oric/unity.lib\n\n')
+            fp.write(comp + LibFolder('oric') + 'unity.lib\n\n')
 
             # Fix header
             fp.write('utils\\scripts\\oric\\header.exe build/oric/' + diskname.lower() + '.bin build/oric/' + diskname.lower() + '.com $0501\n\n')
@@ -1272,26 +1020,25 @@ class Application:
             fp.write('echo --------------- ORIC DISK BUILDER --------------- \n\n')
             
             # Disk builder
-            cmd = 'set TAP2DSK=utils\\scripts\\oric\\tap2dsk.exe -iLAUNCH.COM build/oric/launch.com'
+            cmd = 'utils\\py27\\python utils\\scripts\\oric\\OricDisk.py build/' + diskname + '-oric.dsk build/oric/launch.com'
             if len(sprites) > 0:
-                cmd += ' build/oric/sprites.dat'
+                cmd += ' sprites.dat=build/oric/sprites.dat,0x7800'
             for item in bitmaps:
-                cmd += ' build/oric/' + FileBase(item, '-oric.png') + '.img'
+                fb = FileBase(item, '-oric.png')
+                cmd += ' ' + fb + '.img=build/oric/' + fb + '.dat'
             if len(charset) > 0:
-                cmd += ' build/oric/' + FileBase(charset[0], '-oric.png') + '.dat'
+                fb = FileBase(charset[0], '-oric.png')
+                cmd += ' ' + fb + '.dat=build/oric/' + fb + '.dat'
             for item in charmaps:
-                cmd += ' build/oric/' + FileBase(item, '')
+                cmd += ' ' + FileBase(item, '') + '=' + item
             for item in music:
                 fb = FileBase(item, '-oric.ym')
-                cmd += ' build/oric/' + fb + '.mus'
+                cmd += ' ' + fb + '.mus=build/oric/' + fb + '.mus,0x8000'
             for item in shared:
-                cmd += ' build/oric/' + FileBase(item, '')
-            fp.write(cmd + '\n')
+                cmd += ' ' + FileBase(item, '') + '=' + item
             if len(chunks) > 0:
-                fp.write('for /f "tokens=*" %%A in (build\oric\chunks.lst) do set TAP2DSK=!TAP2DSK! %%A\n')
-            fp.write('set TAP2DSK=%TAP2DSK% build/' + diskname + '-oric.dsk\n')
-            fp.write('%TAP2DSK%\n')
-            fp.write('utils\\scripts\\oric\\old2mfm.exe build/' + diskname + '-oric.dsk\n')
+                cmd += ' @build/oric/chunks.lst,0x8000'
+            fp.write(cmd + '\n')
             
             # Info
             fp.write('\necho DONE\n')
@@ -1301,6 +1048,10 @@ class Application:
             fp.write('cd "utils\emulators\Oricutron-1.2-Hub"\n')
             fp.write('oricutron.exe -d "..\\..\\..\\build\\' + diskname + '-oric.dsk"\n')            
    
+        ####################################################
+        # Ninja build graphs (for Linux/Unix hosts)
+        WriteBuildGraph(self.Project())
+                
         # Done!
         messagebox.showinfo('Completed', 'Scripts succesfully written to the build folder!')
         
@@ -24,19 +24,84 @@
  *   specific prior written permission.
 """
  
-import io,struct, sys
-from PIL import Image
-from collections import Counter
-from math import sqrt
+import io, numpy, os, struct, sys
 
-input = sys.argv[1]
-output = sys.argv[2]
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Tiles import Tiles, PackPixels
+from ImageCache import OpenImage
 
-try:
+version = 1
+
+def DictOrder(keys):
+    # Iteration order of a small dict (8 slots) after inserting these integer keys
+    slots = [None] * 8
+    for key in keys:
+        i = key & 7
+        perturb = key
+        while slots[i & 7] is not None:
+            i = (i << 2) + i + perturb + 1
+            perturb >>= 5
+        slots[i & 7] = key
+    return [key for key in slots if key is not None]
+
+def EncodeBitmap(pixdata, width, height, rgb):
+    #################################
+    # Split image into cells of 4x8 pixels
+    cells = Tiles(pixdata, width, height, 4, 8).reshape(-1, 32)
+    if cells.max() > 15:
+        raise ValueError('Image has more than 16 colors')
+    num = len(cells)
+
+    # Count colors in each cell (except black)
+    counts = numpy.zeros((num, 16), dtype=numpy.int32)
+    numpy.add.at(counts, (numpy.repeat(numpy.arange(num), 32), cells.ravel()), 1)
+    counts[:,0] = 0
+
+    # Find 3 most abundant colors, with ties broken in order of the Counter keys: order
+    # of insertion (after collisions) while the dict has 8 slots, ascending beyond 5 colors
+    numColors = (counts > 0).sum(axis=1)
+    first = numpy.argmax(cells[:,:,None] == numpy.arange(16), axis=1)
+    appear = numpy.argsort(numpy.where(counts > 0, first, 32), axis=1, kind='mergesort')[:,0:5]
+    rank = numpy.tile(numpy.arange(16), (num, 1))
+    orders = {}
+    for c in numpy.nonzero((numColors > 1) & (numColors <= 5))[0]:
+        keys = tuple(appear[c,0:numColors[c]].tolist())
+        if keys not in orders:
+            orders[keys] = DictOrder(keys)
+        rank[c, orders[keys]] = numpy.arange(numColors[c])
+    order = numpy.lexsort((rank, -counts), axis=1)[:,0:3]
+    choice = numpy.where(counts[numpy.arange(num)[:,None], order] > 0, order, -1)
+
+    # Set these 3 colors in SCREENRAM and COLORRAM
+    scr = numpy.where(choice[:,0] >= 0, choice[:,0] << 4, 0) | numpy.where(choice[:,1] >= 0, choice[:,1], 0)
+    col = numpy.where(choice[:,2] >= 0, choice[:,2], 0)
+
+    # Translation table of each cell: colours not in palette go to nearest colour (ties in order of dict keys)
+    palette = numpy.array(rgb, dtype=numpy.int32)
+    distance = ((palette[:,None,:] - palette[None,:,:])**2).sum(axis=2)
+    translate = numpy.zeros((num, 16), dtype=numpy.uint8)
+    tables = {}
+    for c in numpy.nonzero(choice[:,2] >= 0)[0]:
+        chosen = tuple(choice[c].tolist())
+        if chosen not in tables:
+            keys = DictOrder((0,) + chosen)[1:]
+            nearest = numpy.argmin(distance[:,keys], axis=1)
+            tables[chosen] = [chosen.index(keys[k])+1 for k in nearest]
+        translate[c] = tables[chosen]
+    for i in range(3):
+        valid = choice[:,i] >= 0
+        translate[numpy.nonzero(valid)[0], choice[valid,i]] = i+1
+    translate[:,0] = 0
+
+    # Set colour indices (0-3), 4 pixels per byte
+    bmp = PackPixels(translate[numpy.arange(num)[:,None], cells], 2)
+    return (bmp.tostring(), scr.astype(numpy.uint8).tostring(), col.astype(numpy.uint8).tostring())
+
+def ConvertBitmap(input, output):
     #################################
     # Read source bitmap and palette
-    img1 = Image.open(input)
-    pixdata = list(img1.getdata())
+    img1 = OpenImage(input)
+    pixdata = numpy.asarray(img1)
     rgb = []
     dump = img1.getpalette()
     for i in range(16):
@@ -44,78 +109,22 @@ try:
 
     ################################
     # Convert pixel data to buffers 
-    bmp = [0] * 8000
-    scr = [0] * 1000
-    col = [0] * 1000
-    for y in range(0, 200, 8):
-        for x in range(0, 160, 4):
-            # Find most abundant colors in block
-            block = []
-            for i in range(8):
-                for j in range(4):
-                 block.append(pixdata[(y+i)*160+(x+j)])             
-            
-            # Find 3 most abundant colors (except black)
-            abundant = (value for value in block if value != 0)
-            count = Counter(abundant)        
-            choice = count.most_common(3)
-            
-            # Set these 3 colors in SCREENRAM and COLORRAM
-            translate = { 0:0 }
-            for i in range(1,len(choice)+1):
-                color = choice[i-1][0]                        
-                translate[color] = i
-                offset = (y/8)*40+(x/4);
-                if i == 1:
-                    # SCREENRAM (Upper bits)
-                    scr[offset] |= color << 4
-                if i == 2:
-                    # SCREENRAM (Lower bits)
-                    scr[offset] |= color
-                if i == 3:
-                    # COLORRAM (Lower bits)
-                    col[offset] = color
-                  
-            # Assign colours not in palette to nearest colour
-            for i in range(8):
-                for j in range(4):
-                    if block[i*4+j] not in translate.keys():
-                        delta = []
-                        vec1 = rgb[block[i*4+j]]
-                        for k in range(1,4):
-                            vec2 = rgb[translate.keys()[k]]
-                            delta.append( sqrt( (vec1[0]-vec2[0])**2 + (vec1[1]-vec2[1])**2 + (vec1[2]-vec2[2])**2 ) )
-                        swap = delta.index(min(delta))+1
-                        block[i*4+j] = translate.keys()[swap]
-                                              
-                  
-            # Set colour indices (0-3)
-            for i in range(8):
-                for j in range(4):
-                    color = block[i*4+j]
-                    index = translate[color]
-                    shift = 2*(3-(x+j)%4);
-                    offset = 40*((y+i)&248)+((y+i)&7)+((2*(x+j))&504);
-                    bmp[offset] |= index << shift
-
-    #################
-    # Convert to CHR
-    for i in range(8000):
-        bmp[i] = chr(bmp[i])
-    for i in range(1000):    
-        scr[i] = chr(scr[i])
-    for i in range(1000):    
-        col[i] = chr(col[i])
+    bmp, scr, col = EncodeBitmap(pixdata, 160, 200, rgb)
             
     ########################
     # Write output INP file
     f2 = io.open(output, 'wb')	
     f2.write(''.join([chr(6),chr(9)]))
-    f2.write(''.join(bmp))
-    f2.write(''.join(scr))
-    f2.write(''.join(col))
+    f2.write(bmp)
+    f2.write(scr)
+    f2.write(col)
     f2.write(chr(0))
     f2.close()
 
-except:
-    print "Error: cannot convert " + input + "... (is it a 160x200 PNG file with 16 color palette?)"
+if __name__ == '__main__':
+    input = sys.argv[1]
+    output = sys.argv[2]
+    try:
+        ConvertBitmap(input, output)
+    except:
+        print "Error: cannot convert " + input + "... (is it a 160x200 PNG file with 16 color palette?)"
@@ -24,72 +24,65 @@
  *   specific prior written permission.
 """
  
-import io, os, sys, csv
-from PIL import Image
+import io, numpy, os, sys, csv
 
-charFile = sys.argv[1]
-output   = sys.argv[2]
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Tiles import Tiles, PackPixels, FontTiles
+from ImageCache import OpenImage
 
-fontFile = 'utils/scripts/c64/font.png'
-flagFile = charFile.replace('-c64.png', '.csv')
+version = 1
 
-#############################
-# Read char and font bitmaps
-charImg = Image.open(charFile)
-fontImg = Image.open(fontFile)
-charRaw = list(charImg.getdata())
-fontRaw = list(fontImg.getdata())
-print "Charset size: {%i,%i}; Colors: %i" % (charImg.size[0], charImg.size[1], max(charRaw))
+def ConvertCharset(charFile, output):
+    fontFile = 'utils/scripts/c64/font.png'
+    flagFile = charFile.replace('-c64.png', '.csv')
 
-############################
-# Rearrange into 4*8 blocks
-charBlocks = []
-for row in range(0, charImg.size[1], 8):
-    for col in range(0, charImg.size[0], 4):
-        for j in range(0, 8):
-            for i in range(0, 4):
-                charBlocks.append(charRaw[(row+j)*charImg.size[0]+col+i])
-fontBlocks = []
-for row in range(0, fontImg.size[1], 8):
-    for col in range(0, fontImg.size[0], 4):
-        for j in range(0, 8):
-            for i in range(0, 4):
-                fontBlocks.append(fontRaw[(row+j)*fontImg.size[0]+col+i])
+    #############################
+    # Read char and font bitmaps
+    charImg = OpenImage(charFile)
+    charRaw = numpy.asarray(charImg)
+    print "Charset size: {%i,%i}; Colors: %i" % (charImg.size[0], charImg.size[1], charRaw.max())
 
-###############################
-# Process character attributes
-attrData = [chr(0x0e)] * 128
-for i in range(0, len(charBlocks)/32):
-    attr = max(charBlocks[i*32:(i+1)*32])
-    if attr is 4:
-        for j in range(0, 32):
-            if charBlocks[i*32+j] == 4:
-                charBlocks[i*32+j] = 3
-        attrData[i] = chr(0x0a)
+    ############################
+    # Rearrange into 4*8 blocks
+    charBlocks = Tiles(charRaw, charImg.size[0], charImg.size[1], 4, 8).reshape(-1, 32)
+                
+    ###############################
+    # Process character attributes
+    attrData = numpy.array([0x0e] * 128, dtype=numpy.uint8)
+    multi = charBlocks.max(axis=1) == 4
+    charBlocks[(charBlocks == 4) & multi[:,None]] = 3
+    attrData[numpy.nonzero(multi)[0]] = 0x0a
+    attrData = attrData.tostring()
 
-############################################
-# Convert char and font data to C64 format
-charData = [chr(0)] * (256*8)
-for i in range(0, len(charBlocks), 4):
-    charData[i/4] = chr((charBlocks[i+0]<<6) + (charBlocks[i+1]<<4) + (charBlocks[i+2]<<2) + (charBlocks[i+3]<<0))
-for i in range(0, len(fontBlocks), 4):
-    charData[128*8+i/4] = chr((fontBlocks[i+0]<<6) + (fontBlocks[i+1]<<4) + (fontBlocks[i+2]<<2) + (fontBlocks[i+3]<<0))
+    ############################################
+    # Convert char and font data to C64 format
+    charData = numpy.zeros(256*8, dtype=numpy.uint8)
+    chars = PackPixels(charBlocks, 2).ravel()
+    charData[0:len(chars)] = chars
+    font = numpy.fromstring(FontTiles(fontFile, 4, 8, 2), dtype=numpy.uint8)
+    charData[128*8:128*8+len(font)] = font
+    charData = charData.tostring()
 
-#######################
-# Read character flags
-flagData = [chr(0)] * 128
-with open(flagFile) as csvfile:
-    i = 0
-    rows = csv.reader(csvfile, delimiter=',')
-    for row in rows:
-        for elt in row:
-            flagData[i] = chr(int(elt))
-            i += 1
+    #######################
+    # Read character flags
+    flagData = [chr(0)] * 128
+    with open(flagFile) as csvfile:
+        i = 0
+        rows = csv.reader(csvfile, delimiter=',')
+        for row in rows:
+            for elt in row:
+                flagData[i] = chr(int(elt))
+                i += 1
             
-############################
-# Write output binary file
-f2 = io.open(output, 'wb')
-f2.write(''.join(charData))
-f2.write(''.join(attrData))
-f2.write(''.join(flagData))
-f2.close()
+    ############################
+    # Write output binary file
+    f2 = io.open(output, 'wb')
+    f2.write(charData)
+    f2.write(attrData)
+    f2.write(''.join(flagData))
+    f2.close()
+
+if __name__ == '__main__':
+    charFile = sys.argv[1]
+    output   = sys.argv[2]
+    ConvertCharset(charFile, output)
@@ -24,72 +24,49 @@
  *   specific prior written permission.
 """
  
-import io,struct, sys
-from PIL import Image
+import io, numpy, os, struct, sys
 
-input = sys.argv[1]
-output = sys.argv[2]
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Tiles import Tiles, PackPixels
+from ImageCache import OpenImage
 
-#################################
-# Read source bitmap and palette
-img1 = Image.open(input)
-rawdata = list(img1.getdata())
-colors = max(rawdata)
-print "Sprite sheet size: {%i,%i}; Number of colors: %i" % (img1.size[0], img1.size[1], colors)
+version = 1
 
-################################
-# Rearrange into 12 * 21 blocks
-griddata = []
-for row in range(0, img1.size[1], 21):
-    for col in range(0, img1.size[0], 12):
-        for j in range(0, 21):        
-            for i in range(0, 12):
-                griddata.append(rawdata[(row+j)*img1.size[0]+col+i])
+def ConvertSprites(input, output):
+    #################################
+    # Read source bitmap and palette
+    img1 = OpenImage(input)
+    rawdata = numpy.asarray(img1)
+    colors = int(rawdata.max())
+    print "Sprite sheet size: {%i,%i}; Number of colors: %i" % (img1.size[0], img1.size[1], colors)
 
-#############################
-# Split into 4 colors layers
-layers = 0
-layerdata = []
-while (layers+3) <= max(griddata):
-    pixdata = []
-    
-    # Transcribe unique colors to different layers
-    for i in range(len(griddata)):
-        # Transparent or shared color?
-        if (griddata[i] in [0,1]): 
-            color = griddata[i]
-        elif (griddata[i] == 2): 
-            color = 3        
-        # Is it the unique color of layer?
-        elif (griddata[i] == layers+3): 
-            color = 2
-        # Otherwise use transparent
-        else:
-            color = 0
-        pixdata.append(color)
-        
-    # Add to layer data
-    layerdata.append(pixdata)
-    layers += 1
+    ################################
+    # Rearrange into 12 * 21 blocks
+    griddata = Tiles(rawdata, img1.size[0], img1.size[1], 12, 21).reshape(-1, 21*12)
+    frames = len(griddata)
 
-####################################
-# Convert 4bit pixel data to buffers 
-block = 12*21
-frames = len(griddata)/block
-layersize = frames*64
-sprdata = [chr(0)] * (layers*layersize)
-for layer in range(layers):
-    for frame in range(frames):
-        for i in range(0, block, 4):
-            sprdata[layer*layersize+frame*64+i/4] = \
-                        chr((layerdata[layer][frame*block+i+3]<<0) + 
-                            (layerdata[layer][frame*block+i+2]<<2) + 
-                            (layerdata[layer][frame*block+i+1]<<4) + 
-                            (layerdata[layer][frame*block+i]  <<6))
+    #############################
+    # Split into 4 colors layers
+    # Transparent and shared colors are kept in all layers (2 is swapped to 3),
+    # colors from 3 upwards each get their own layer (as color 2)
+    shared = numpy.array([0, 1, 3] + [0]*253, dtype=numpy.uint8)[griddata]
+    layers = max(0, colors-2)
+    unique = numpy.arange(3, layers+3).reshape(layers, 1, 1)
+    layerdata = numpy.where(griddata == unique, 2, shared)
 
-###########################
-# Write output binary file
-f2 = io.open(output, 'wb')	
-f2.write(''.join([chr(0),chr(0xc8)]))
-f2.write(''.join(sprdata))
-f2.close()
+    ####################################
+    # Convert 4bit pixel data to buffers (63 bytes + 1 padding byte per frame)
+    sprdata = numpy.zeros((layers, frames, 64), dtype=numpy.uint8)
+    sprdata[:,:,0:63] = PackPixels(layerdata, 2)
+
+    ###########################
+    # Write output binary file
+    f2 = io.open(output, 'wb')	
+    f2.write(''.join([chr(0),chr(0xc8)]))
+    f2.write(sprdata.tostring())
+    f2.close()
+
+if __name__ == '__main__':
+    input = sys.argv[1]
+    output = sys.argv[2]
+    ConvertSprites(input, output)
@@ -0,0 +1,212 @@
+"""
+ * Copyright (c) 2020 Anthony Beaucamp.
+ *
+ * This software is provided 'as-is', without any express or implied warranty.
+ * In no event will the authors be held liable for any damages arising from
+ * the use of this software.
+ *
+ * Permission is granted to anyone to use this software for any purpose,
+ * including commercial applications, and to alter it and redistribute it
+ * freely, subject to the following restrictions:
+ *
+ *   1. The origin of this software must not be misrepresented * you must not
+ *   claim that you wrote the original software. If you use this software in a
+ *   product, an acknowledgment in the product documentation would be
+ *   appreciated but is not required.
+ *
+ *   2. Altered source versions must be plainly marked as such, and must not
+ *   be misrepresented as being the original software.
+ *
+ *   3. This notice may not be removed or altered from any distribution.
+ *
+ *   4. The names of this software and/or it's copyright holders may not be
+ *   used to endorse or promote products derived from this software without
+ *   specific prior written permission.
+"""
+
+#
+# D64 disk image writer (replaces c1541)
+#
+# Usage: D64.py <image.d64> <title,id> [name=file ...] [@list ...]
+#
+#   Formats a 35 tracks disk and writes each file as PRG. Files named in a
+#   list (such as chunks.lst) are written under their base name. Sectors are
+#   allocated like the 1541 DOS (nearest track to the directory, interleave
+#   of 10) and the number of free blocks is reported.
+#
+
+import os, sys
+
+dirTrack = 18
+interleave = 10
+dirInterleave = 3
+
+def Sectors(track):
+    # Number of sectors on each track
+    if track <= 17:
+        return 21
+    if track <= 24:
+        return 19
+    if track <= 30:
+        return 18
+    return 17
+
+def Petscii(name):
+    # Convert ASCII to PETSCII (swap case)
+    output = ''
+    for c in name:
+        if 'a' <= c <= 'z':
+            output += chr(ord(c) - 0x20)
+        elif 'A' <= c <= 'Z':
+            output += chr(ord(c) + 0x80)
+        else:
+            output += c
+    return output
+
+############################################
+class D64Image:
+    def __init__(self, title, id):
+        self.tracks = 35
+        self.offsets = [0, 0]
+        for track in range(1, self.tracks+1):
+            self.offsets.append(self.offsets[-1] + Sectors(track)*256)
+        self.data = bytearray(self.offsets[-1])
+        self.files = 0
+
+        # BAM (all sectors free, except BAM and first directory sector)
+        bam = self.Offset(dirTrack, 0)
+        self.data[bam:bam+4] = chr(dirTrack) + chr(1) + 'A' + chr(0)
+        for track in range(1, self.tracks+1):
+            bits = (1 << Sectors(track)) - 1
+            self.data[bam+track*4:bam+track*4+4] = chr(Sectors(track)) + chr(bits & 0xff) + chr((bits >> 8) & 0xff) + chr(bits >> 16)
+        self.data[bam+0x90:bam+0xab] = Petscii(title[0:16]).ljust(16, '\xa0') + '\xa0\xa0' + Petscii(id[0:2]).ljust(2, '\xa0') + '\xa02A\xa0\xa0\xa0\xa0'
+        self.Allocate(dirTrack, 0)
+        self.Allocate(dirTrack, 1)
+        self.dir = [(dirTrack, 1)]
+        self.data[self.Offset(dirTrack, 1)+1] = 0xff
+
+    def Offset(self, track, sector):
+        return self.offsets[track] + sector*256
+
+    def IsFree(self, track, sector):
+        return self.data[self.Offset(dirTrack, 0) + track*4 + 1 + sector/8] & (1 << (sector % 8))
+
+    def Allocate(self, track, sector):
+        if not self.IsFree(track, sector):
+            return False
+        bam = self.Offset(dirTrack, 0) + track*4
+        self.data[bam+1+sector/8] &= ~(1 << (sector % 8)) & 0xff
+        self.data[bam] -= 1
+        return True
+
+    def FreeBlocks(self):
+        # Free sectors (outside of directory track)
+        bam = self.Offset(dirTrack, 0)
+        return sum([self.data[bam+track*4] for track in range(1, self.tracks+1) if track != dirTrack])
+
+    def AllocateTrack(self, track):
+        # First free sector on track (or None)
+        for sector in range(Sectors(track)):
+            if self.Allocate(track, sector):
+                return (track, sector)
+        return None
+
+    def FirstSector(self):
+        # Nearest track to directory, below then above
+        for distance in range(1, self.tracks):
+            for track in [dirTrack - distance, dirTrack + distance]:
+                if 1 <= track <= self.tracks:
+                    block = self.AllocateTrack(track)
+                    if block:
+                        return block
+        raise IOError('Disk full')
+
+    def NextSector(self, track, sector, step):
+        # Same track (with interleave), then tracks further away from directory
+        sector += step
+        if sector >= Sectors(track):
+            sector -= Sectors(track)
+            if sector != 0:
+                sector -= 1
+        for i in range(Sectors(track)):
+            if self.Allocate(track, sector):
+                return (track, sector)
+            sector = (sector + 1) % Sectors(track)
+        if track == dirTrack:
+            raise IOError('Directory full')
+        if track < dirTrack:
+            tracks = range(track-1, 0, -1) + range(dirTrack+1, self.tracks+1)
+        else:
+            tracks = range(track+1, self.tracks+1) + range(dirTrack-1, 0, -1)
+        for t in tracks:
+            block = self.AllocateTrack(t)
+            if block:
+                return block
+        raise IOError('Disk full')
+
+    def DirEntry(self):
+        # Find unused directory entry (adding directory sector if needed)
+        for track, sector in self.dir:
+            offset = self.Offset(track, sector)
+            for i in range(8):
+                if self.data[offset + i*32 + 2] == 0:
+                    return offset + i*32
+        track, sector = self.dir[-1]
+        block = self.NextSector(track, sector, dirInterleave)
+        offset = self.Offset(track, sector)
+        self.data[offset:offset+2] = chr(block[0]) + chr(block[1])
+        self.data[self.Offset(block[0], block[1])+1] = 0xff
+        self.dir.append(block)
+        return self.Offset(block[0], block[1])
+
+    def AddFile(self, name, data):
+        # Check free space
+        blocks = max(1, (len(data) + 253) / 254)
+        if blocks > self.FreeBlocks():
+            raise IOError("Disk full, cannot write '" + name + "' (" + str(blocks) + " blocks)")
+        entry = self.DirEntry()
+
+        # Write chain of sectors (2 bytes link + 254 bytes data)
+        first = self.FirstSector()
+        track, sector = first
+        for i in range(blocks):
+            chunk = data[i*254:(i+1)*254]
+            offset = self.Offset(track, sector)
+            if i < blocks-1:
+                track, sector = self.NextSector(track, sector, interleave)
+                self.data[offset:offset+2] = chr(track) + chr(sector)
+            else:
+                self.data[offset:offset+2] = chr(0) + chr(len(chunk)+1)
+            self.data[offset+2:offset+2+len(chunk)] = chunk
+
+        # Directory entry (closed PRG)
+        self.data[entry+2:entry+32] = '\x82' + chr(first[0]) + chr(first[1]) + Petscii(name[0:16]).ljust(16, '\xa0') + \
+                                      '\x00'*9 + chr(blocks & 0xff) + chr(blocks >> 8)
+        self.files += 1
+
+    def Save(self, filename):
+        with open(filename, "wb") as fp:
+            fp.write(self.data)
+
+############################################
+# Build disk from list of files
+def WriteDisk(image, header, files):
+    title, id = (header.split(',') + [''])[0:2]
+    disk = D64Image(title, id)
+    for name, filename in files:
+        with open(filename, "rb") as fp:
+            disk.AddFile(name, fp.read())
+    disk.Save(image)
+    print "Disk (" + image + "): " + str(disk.files) + " files, " + str(disk.FreeBlocks()) + " blocks free"
+    return disk.FreeBlocks()
+
+if __name__ == '__main__':
+    files = []
+    for arg in sys.argv[3:]:
+        if arg.startswith('@'):
+            with open(arg[1:], "r") as fp:
+                files += [(os.path.basename(line.strip()), line.strip()) for line in fp if line.strip() != '']
+        else:
+            name, filename = arg.split('=', 1)
+            files.append((name, filename))
+    WriteDisk(sys.argv[1], sys.argv[2], files)
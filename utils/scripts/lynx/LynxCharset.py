@@ -26,22 +26,27 @@
  
 import io, os, sys, csv
 
-input = sys.argv[1]
-output = sys.argv[2]
+version = 1
 
-################################
-# Convert character flags
-flagdata = [chr(0)] * 256
-with open(input.replace('-lynx.png', '.csv')) as csvfile:
-    i = 0
-    rows = csv.reader(csvfile, delimiter=',')
-    for row in rows:
-        for elt in row:
-            flagdata[i] = chr(int(elt))
-            i += 1
+def ConvertCharset(input, output):
+    ################################
+    # Convert character flags
+    flagdata = [chr(0)] * 256
+    with open(input.replace('-lynx.png', '.csv')) as csvfile:
+        i = 0
+        rows = csv.reader(csvfile, delimiter=',')
+        for row in rows:
+            for elt in row:
+                flagdata[i] = chr(int(elt))
+                i += 1
 
-###########################
-# Write output binary file
-f2 = io.open(output, 'wb')
-f2.write(''.join(flagdata))
-f2.close()
+    ###########################
+    # Write output binary file
+    f2 = io.open(output, 'wb')
+    f2.write(''.join(flagdata))
+    f2.close()
+
+if __name__ == '__main__':
+    input = sys.argv[1]
+    output = sys.argv[2]
+    ConvertCharset(input, output)
@@ -0,0 +1,156 @@
+"""
+ * Copyright (c) 2020 Anthony Beaucamp.
+ *
+ * This software is provided 'as-is', without any express or implied warranty.
+ * In no event will the authors be held liable for any damages arising from
+ * the use of this software.
+ *
+ * Permission is granted to anyone to use this software for any purpose,
+ * including commercial applications, and to alter it and redistribute it
+ * freely, subject to the following restrictions:
+ *
+ *   1. The origin of this software must not be misrepresented * you must not
+ *   claim that you wrote the original software. If you use this software in a
+ *   product, an acknowledgment in the product documentation would be
+ *   appreciated but is not required.
+ *
+ *   2. Altered source versions must be plainly marked as such, and must not
+ *   be misrepresented as being the original software.
+ *
+ *   3. This notice may not be removed or altered from any distribution.
+ *
+ *   4. The names of this software and/or it's copyright holders may not be
+ *   used to endorse or promote products derived from this software without
+ *   specific prior written permission.
+"""
+
+import os, struct, sys
+
+def NameList(arg):
+    if arg == '':
+        return []
+    return arg.split(',')
+
+def SpriteOffsets(filename, count):
+    # Table of offsets at the start of packed sprite files (see LynxSprites.py)
+    with open(filename, "rb") as fp:
+        return struct.unpack('<' + str(count) + 'H', fp.read(count*2))
+
+#############################################
+# Generate data.asm (for the .bat script and the ninja graph)
+def WriteData(folder, bitmaps, charmaps, music, shared, charset, spriteFrames, spriteNum=None):
+    # Read list of chunks
+    chunks = []
+    if os.path.exists(folder + 'chunks.lst'):
+        with open(folder + 'chunks.lst', "r") as fin:
+            chunks = [line.strip() for line in fin if line.strip() != '']
+
+    # Get size of various files
+    files = [folder + fb + '.spr' for fb in bitmaps] + \
+            [folder + fb for fb in charmaps] + \
+            [folder + 'music' + str(i).zfill(2) + '.asm' for i in range(len(music))] + \
+            [folder + fb for fb in shared] + chunks
+    sizes = [str(os.path.getsize(f)) for f in files]
+
+    with open(folder + 'data.asm', "w") as fp:
+        # Declare globals
+        for name in ['_fileNum', '_fileSizes', '_fileNames', '_charNum', '_charData', '_charFlags', '_spriteNum', '_spriteData', '_cursorData', '_keybrdData']:
+            fp.write('.global ' + name + '\n')
+        fp.write(';\n')
+
+        # Num and sizes of files
+        fp.write('.segment "RODATA"\n')
+        fp.write('_fileNum: .byte ' + str(len(files)) + '\n')
+
+        # List of file names and data
+        if len(files) > 0:
+            names = ['_bmpName' + str(i).zfill(2) for i in range(len(bitmaps))] + \
+                    ['_mapName' + str(i).zfill(2) for i in range(len(charmaps))] + \
+                    ['_musName' + str(i).zfill(2) for i in range(len(music))] + \
+                    ['_shrName' + str(i).zfill(2) for i in range(len(shared))] + \
+                    ['_shkName' + str(i) for i in range(len(chunks))]
+            fp.write('_fileSizes: .word ' + ','.join(sizes) + '\n')
+            fp.write('_fileNames: .addr ' + ','.join(names) + '\n')
+            for i in range(len(bitmaps)):
+                fp.write('_bmpName' + str(i).zfill(2) + ': .byte "' + bitmaps[i] + '.img",0\n')
+            for i in range(len(charmaps)):
+                fp.write('_mapName' + str(i).zfill(2) + ': .byte "' + charmaps[i] + '",0\n')
+            for i in range(len(music)):
+                fp.write('_musName' + str(i).zfill(2) + ': .byte "' + music[i] + '.mus",0\n')
+            for i in range(len(shared)):
+                fp.write('_shrName' + str(i).zfill(2) + ': .byte "' + shared[i] + '",0\n')
+            for i in range(len(chunks)):
+                fp.write('_shkName' + str(i) + ': .byte "' + os.path.basename(chunks[i]) + '",0\n')
+
+            # Link data
+            fp.write(';\n')
+            for i in range(len(bitmaps)):
+                fp.write('.segment "BMP' + str(i) + 'DATA"\n')
+                fp.write('_bmpData' + str(i).zfill(2) + ': .incbin "' + bitmaps[i] + '.spr"\n')
+            fp.write(';\n')
+            for i in range(len(charmaps)):
+                fp.write('.segment "BMP' + str(i) + 'DATA"\n')
+                fp.write('_mapData' + str(i).zfill(2) + ': .incbin "' + charmaps[i] + '"\n')
+            for i in range(len(music)):
+                fp.write('.segment "MUS' + str(i) + 'DATA"\n')
+                fp.write('.import _musData' + str(i).zfill(2) + '\n')
+            for i in range(len(shared)):
+                fp.write('.segment "SHR' + str(i) + 'DATA"\n')
+                fp.write('_shrData' + str(i).zfill(2) + ': .incbin "' + shared[i] + '"\n')
+            for i in range(len(chunks)):
+                fp.write('.segment "SHK' + str(i) + 'DATA"\n')
+                fp.write('_shkData' + str(i) + ': .incbin "' + os.path.basename(chunks[i]) + '"\n')
+        else:
+            fp.write('_fileSizes: .word 0\n')
+            fp.write('_fileNames: .addr _dummyName\n')
+            fp.write('_dummyName: .byte 0\n')
+        fp.write(';\n')
+
+        # Charset Data
+        fp.write('.segment "RODATA"\n')
+        if charset:
+            fp.write('_charNum: .byte 255\n')
+            labels = ['_chrData+' + str(offset) for offset in SpriteOffsets(folder + 'char.spr', 128)] + \
+                     ['_fntData+' + str(offset) for offset in SpriteOffsets(folder + 'font.spr', 128)]
+            fp.write('_charData: .addr ' + ', '.join(labels) + '\n')
+            fp.write('_chrData: .incbin "char.spr", 256\n')
+            fp.write('_fntData: .incbin "font.spr", 256\n')
+            fp.write('_charFlags: .incbin "charset.dat"\n')
+        else:
+            fp.write('_charNum: .byte 0\n')
+            fp.write('_charData: .byte 0\n')
+            fp.write('_charFlags: .byte 0\n')
+        fp.write(';\n')
+
+        # Sprite Data
+        fp.write('.segment "RODATA"\n')
+        # (number of frames set in the project, even without sprite sheet)
+        if spriteNum is None:
+            spriteNum = spriteFrames
+        fp.write('_spriteNum: .byte ' + str(spriteNum) + '\n')
+        if spriteFrames > 0:
+            labels = ['_sprData+' + str(offset) for offset in SpriteOffsets(folder + 'sprites.spr', spriteFrames)]
+            fp.write('_spriteData: .addr ' + ', '.join(labels) + '\n')
+            fp.write('_sprData: .incbin "sprites.spr", ' + str(spriteFrames*2) + '\n')
+        else:
+            fp.write('_spriteData: .byte 0\n')
+        fp.write(';\n')
+
+        # Keyboard Binary Data
+        fp.write('_cursorData: .incbin "cursor.spr"\n')
+        fp.write('_keybrdData: .incbin "keyboard.spr"\n')
+
+    return len(chunks)
+
+if __name__ == '__main__':
+    folder = sys.argv[1]
+    bitmaps = NameList(sys.argv[2])
+    charmaps = NameList(sys.argv[3])
+    music = NameList(sys.argv[4])
+    shared = NameList(sys.argv[5])
+    charset = int(sys.argv[6])
+    spriteFrames = int(sys.argv[7])
+    spriteNum = None
+    if len(sys.argv) > 8:
+        spriteNum = int(sys.argv[8])
+    WriteData(folder, bitmaps, charmaps, music, shared, charset, spriteFrames, spriteNum)
@@ -0,0 +1,168 @@
+"""
+ * Copyright (c) 2020 Anthony Beaucamp.
+ *
+ * This software is provided 'as-is', without any express or implied warranty.
+ * In no event will the authors be held liable for any damages arising from
+ * the use of this software.
+ *
+ * Permission is granted to anyone to use this software for any purpose,
+ * including commercial applications, and to alter it and redistribute it
+ * freely, subject to the following restrictions:
+ *
+ *   1. The origin of this software must not be misrepresented * you must not
+ *   claim that you wrote the original software. If you use this software in a
+ *   product, an acknowledgment in the product documentation would be
+ *   appreciated but is not required.
+ *
+ *   2. Altered source versions must be plainly marked as such, and must not
+ *   be misrepresented as being the original software.
+ *
+ *   3. This notice may not be removed or altered from any distribution.
+ *
+ *   4. The names of this software and/or it's copyright holders may not be
+ *   used to endorse or promote products derived from this software without
+ *   specific prior written permission.
+"""
+
+#
+# Lynx sprite packer (replaces png2bmp + sprpck)
+#
+# Usage: LynxSprites.py <input.png> <output.spr> [literal|packed] [tilesX,tilesY] [width,height] [x,y]
+#
+#   Encodes 4 bits sprite data for Suzy from an indexed PNG, as sprpck -t6 -p2
+#   (literal lines like -u, or packed lines). Lines are drawn in quadrants around
+#   the action point x,y (-a): down-right, up-right, up-left then down-left. When
+#   the image is cut into tiles (-r and -S), all tiles are written to one file: a
+#   table of offsets (one word per tile in row order, counted from the end of the
+#   table), followed by the sprite data of each tile.
+#
+
+import io, numpy, os, struct, sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Tiles import Tiles, PackPixels
+from ImageCache import OpenImage
+
+version = 1
+bits = 4
+
+def Quadrants(pixels, x, y):
+    # Split tile around action point (lines and pixels running away from it)
+    return [pixels[y:,x:], pixels[:y,x:][::-1,:], pixels[:y,:x][::-1,::-1], pixels[y:,:x][:,::-1]]
+
+def LiteralLines(pixels):
+    # Pixel data of each line (odd widths padded with one pixel)
+    height, width = pixels.shape
+    if width % 2:
+        pixels = numpy.hstack([pixels, numpy.zeros((height, 1), dtype=numpy.uint8)])
+    lines = PackPixels(pixels, bits)
+
+    # Suzy ignores the last bits of a line: add a zero byte if pixel data ends on a byte boundary
+    if width % 2 == 0:
+        lines = numpy.hstack([lines, numpy.zeros((height, 1), dtype=numpy.uint8)])
+    if lines.shape[1] > 254:
+        raise ValueError('Sprite line is too long')
+
+    # Each line starts with offset to next line
+    offsets = numpy.empty((height, 1), dtype=numpy.uint8)
+    offsets[:] = lines.shape[1] + 1
+    return numpy.hstack([offsets, lines]).tostring()
+
+def PackedLine(line):
+    # Packets of 1 to 16 pixels: literal flag (1 bit), count-1 (4 bits), then pixels (or pixel to repeat)
+    fields = []
+    pending = []
+    i = 0
+    while i <= len(line):
+        j = i
+        while j < len(line) and j-i < 16 and line[j] == line[i]:
+            j += 1
+        if len(pending) == 16 or (pending and (i == len(line) or j-i > 2)):
+            fields += [(1, 1), (len(pending)-1, 4)] + [(p, bits) for p in pending]
+            pending = []
+        if i == len(line):
+            break
+        if j-i > 2 or (j-i == 2 and not pending):
+            # Repeated pixel (single pixels are never packed: 00000 ends the line)
+            fields += [(0, 1), (j-i-1, 4), (line[i], bits)]
+            i = j
+        else:
+            pending.append(line[i])
+            i += 1
+    fields.append((0, 5))
+
+    # Assemble bit stream (first field in the high bits)
+    value, length = 0, 0
+    for field, size in fields:
+        value = (value << size) | int(field)
+        length += size
+    padding = (8 - length % 8) % 8
+    data = ('%x' % (value << padding)).zfill((length+padding)/4).decode('hex')
+
+    # Add a zero byte if line ends on a byte boundary (as for literal lines)
+    if padding == 0:
+        data += chr(0)
+    if len(data) > 254:
+        raise ValueError('Sprite line is too long')
+    return chr(len(data) + 1) + data
+
+def EncodeSprite(pixels, x, y, literal):
+    # Lines of each quadrant (offset 1 moves on to next quadrant, 0 ends sprite)
+    quadrants = Quadrants(pixels, x, y)
+    while len(quadrants) > 1 and quadrants[-1].size == 0:
+        quadrants.pop()
+    data = []
+    for i, quadrant in enumerate(quadrants):
+        if i > 0:
+            data.append(chr(1))
+        if quadrant.size == 0:
+            continue
+        if literal:
+            data.append(LiteralLines(quadrant))
+        else:
+            data += [PackedLine(line.tolist()) for line in quadrant]
+    data.append(chr(0))
+    return ''.join(data)
+
+def ConvertSprites(input, output, mode='literal', tiles=None, size=None, action=(0, 0)):
+    #################################
+    # Read source bitmap (palette indices)
+    img1 = OpenImage(input)
+
+    ###############################
+    # Cut into tiles (or single sprite)
+    if tiles:
+        width, height = size
+        pixdata = numpy.asarray(img1.crop((0, 0, tiles[0]*width, tiles[1]*height)))
+        sprites = Tiles(pixdata, tiles[0]*width, tiles[1]*height, width, height)
+    else:
+        pixdata = numpy.asarray(img1)
+        sprites = [pixdata]
+    if pixdata.ndim != 2 or pixdata.max() > 15:
+        raise ValueError('Image is not a 16 color PNG')
+
+    ########################
+    # Encode sprite data
+    literal = (mode == 'literal')
+    sprdata = [EncodeSprite(sprite, action[0], action[1], literal) for sprite in sprites]
+
+    ###########################
+    # Write output binary file (with table of offsets for tiled images)
+    f2 = io.open(output, 'wb')
+    if tiles:
+        offsets = numpy.cumsum([0] + [len(data) for data in sprdata[0:-1]])
+        if offsets[-1] > 0xffff:
+            raise ValueError('Sprite data is too large')
+        f2.write(struct.pack('<%iH' % len(offsets), *offsets))
+    f2.write(''.join(sprdata))
+    f2.close()
+
+if __name__ == '__main__':
+    input = sys.argv[1]
+    output = sys.argv[2]
+    mode = 'literal'
+    if len(sys.argv) > 3:
+        mode = sys.argv[3]
+    args = [[int(n) for n in arg.split(',')] for arg in sys.argv[4:7]]
+    tiles, size, action = (args + [None, None, (0, 0)][len(args):])[0:3]
+    ConvertSprites(input, output, mode, tiles, size, action)
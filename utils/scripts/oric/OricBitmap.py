@@ -1,23 +1,54 @@
 
-import io,struct, sys
-from PIL import Image
-from collections import Counter
-from math import sqrt
+import io, numpy, os, struct, sys
 
-input = sys.argv[1]
-output = sys.argv[2]
-try:
-    noRemap = [int(n) for n in sys.argv[3].split(',')]
-except:
-    noRemap = []
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Palette import Remap
+from ImageCache import OpenImage
 
-try:
+version = 1
+
+# Inversion groups
+groups = [ [0,1,2,3,4],         # line 1 and 2 non-inverted
+           [5,6,7,8,9],         # line 1 inverted
+           [10,11,12,13,14],    # line 2 inverted
+           [15,16,17,18,19] ]   # line 1 and 2 inverted
+
+def GroupTables(rgb, noRemap=[]):
+    # Group of each color, and nearest color of each group (colors in noRemap are never chosen)
+    colorGroup = numpy.zeros(20, dtype=int)
+    for g in range(len(groups)):
+        colorGroup[groups[g]] = g
+    palette = numpy.array(rgb[0:20], dtype=int)
+    distance = ((palette[:,None,:] - palette[None,:,:])**2).sum(axis=2)
+    distance[:,[n for n in noRemap if 0 <= n < 20]] = 999999**2
+    nearest = numpy.zeros((20, len(groups)), dtype=int)
+    for g in range(len(groups)):
+        nearest[:,g] = numpy.array(groups[g])[numpy.argmin(distance[:,groups[g]], axis=1)]
+        nearest[groups[g],g] = groups[g]
+    return colorGroup, nearest
+
+def EncodeBlocks(blocks, rgb, noRemap=[]):
+    # Encode array of 3x1 pixel blocks (shape [...,3]) into pairs of bytes (line 1 and 2)
+    blocks = numpy.asarray(blocks, dtype=int)
+    colorGroup, nearest = GroupTables(rgb, noRemap)
+
+    # Find most frequent group in block (lowest group on ties), and nearest colors in that group
+    gcount = numpy.stack([(colorGroup[blocks] == g).sum(axis=-1) for g in range(len(groups))], axis=-1)
+    gsel = gcount.argmax(axis=-1)
+    index = nearest[blocks, gsel[...,None]] % 5
+
+    # Assign inversion bit, then bits of each pixel (in order: 1 = 2/1, 2 = 3/0, 3 = 0/3, 4 = 3/3)
+    weights = numpy.array([16, 4, 1])
+    byte1 = 64 + 128*((gsel == 1) | (gsel == 3)) + (numpy.array([0,2,3,0,3])[index]*weights).sum(axis=-1)
+    byte2 = 64 + 128*((gsel == 2) | (gsel == 3)) + (numpy.array([0,1,0,3,3])[index]*weights).sum(axis=-1)
+    return byte1.astype(numpy.uint8), byte2.astype(numpy.uint8)
+
+def ConvertBitmap(input, output, noRemap=[]):
     # Read source file
-    img1 = Image.open(sys.argv[1])
-    pixdata = list(img1.getdata())
+    img1 = OpenImage(input)
 
     # Force BW over WB order for grey colour
-    pixdata = [pix if pix != 5 else 10 for pix in pixdata]
+    pixdata = Remap(img1, 'OricGrey')
 
     # Get palette RGB
     rgb = []
@@ -25,88 +56,28 @@ try:
     for i in range(20):
         rgb.append(dump[i*3:i*3+3])
 
-    # Inversion groups
-    groups = [ [0,1,2,3,4],         # line 1 and 2 non-inverted
-               [5,6,7,8,9],         # line 1 inverted
-               [10,11,12,13,14],    # line 2 inverted
-               [15,16,17,18,19] ]   # line 1 and 2 inverted
-               
-    # Convert to AIC format
-    data = [0]*8000
-    for y in range(100):
-        # Set paper/ink
-        data[(2*y+0)*40+0] = 3    # Ink: Yellow / Blue
-        data[(2*y+1)*40+0] = 6    # Ink: Cyan / Red
-        
-        # Process in blocks of 3x1 pixels (encoded as 6x2)
-        for x in range(0,39):
-            # Find most frequent colour in block
-            location = y*2*240+x*6+6
-            block = [pixdata[location], pixdata[location+2], pixdata[location+4]]
-            gcount = []
-            for i in block:
-                for g in range(len(groups)):
-                    if i in groups[g]:
-                        gcount.append(g)
-            count = Counter(gcount)
-            gsel = count.most_common(1)[0][0]
-                
-            # Process other colors
-            for i in range(3):            
-                # In same group?
-                if block[i] not in groups[gsel]:            
-                    # Find nearest color in group
-                    delta = []
-                    vec1 = rgb[block[i]]
-                    for k in range(len(groups[gsel])):
-                        index = groups[gsel][k]
-                        if index in noRemap:
-                            delta.append( 999999 )
-                        else:
-                            vec2 = rgb[index]
-                            delta.append( sqrt( (vec1[0]-vec2[0])**2 + (vec1[1]-vec2[1])**2 + (vec1[2]-vec2[2])**2 ) )
-                    swap = delta.index(min(delta))
-                    block[i] = groups[gsel][swap]
-            
-            # Assign inversion bit
-            byte1 = (2*y+0)*40+x+1
-            byte2 = (2*y+1)*40+x+1
-            if gsel == 0:
-                data[byte1] = 64
-                data[byte2] = 64
-            if gsel == 1:
-                data[byte1] = 192
-                data[byte2] = 64
-            if gsel == 2:
-                data[byte1] = 64
-                data[byte2] = 192
-            if gsel == 3:
-                data[byte1] = 192
-                data[byte2] = 192
-                
-            # Assign bits
-            for i in range(3):
-                index = block[i] % 5
-                if index == 1:
-                    data[byte1] += 32 / 4**i
-                    data[byte2] += 16 / 4**i
-                if index == 2:
-                    data[byte1] += (32+16) / 4**i
-                if index == 3:
-                    data[byte2] += (32+16) / 4**i
-                if index == 4:
-                    data[byte1] += (32+16) / 4**i
-                    data[byte2] += (32+16) / 4**i
-            
-    # Convert to char
-    for i in range(len(data)):
-        data[i] = chr(data[i])
+    # Convert to AIC format: paper/ink, then blocks of 3x1 pixels (encoded as 6x2)
+    data = numpy.zeros((100, 2, 40), dtype=numpy.uint8)
+    data[:,0,0] = 3    # Ink: Yellow / Blue
+    data[:,1,0] = 6    # Ink: Cyan / Red
+    blocks = pixdata.reshape(200, 240)[0::2,6:240].reshape(100, 39, 6)[:,:,0::2]
+    data[:,0,1:], data[:,1,1:] = EncodeBlocks(blocks, rgb, noRemap)
+    data = data.tostring()
                 
     #################
     # Write DAT file
     f2 = io.open(output, 'wb')	
-    f2.write(''.join(data))
+    f2.write(data)
     f2.close()
 
-except:
-    print "Error: cannot convert " + input + "... (is it a 117x100 PNG file with 20 color palette?)"
+if __name__ == '__main__':
+    input = sys.argv[1]
+    output = sys.argv[2]
+    try:
+        noRemap = [int(n) for n in sys.argv[3].split(',')]
+    except:
+        noRemap = []
+    try:
+        ConvertBitmap(input, output, noRemap)
+    except:
+        print "Error: cannot convert " + input + "... (is it a 117x100 PNG file with 20 color palette?)"
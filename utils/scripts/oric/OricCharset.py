@@ -24,58 +24,60 @@
  *   specific prior written permission.
 """
  
-import io, os, sys, csv
+import io, numpy, os, sys, csv
 from PIL import Image
+from PictOric import LinearLevels, LineCache, DitherPicture, darkest
 
-dither   = sys.argv[1]
-charFile = sys.argv[2]
-output   = sys.argv[3]
+version = 1
 
-pictFile = output.replace('.dat', '.png')
-flagFile = charFile.replace('-oric.png', '.csv')
+def ConvertCharset(dither, charFile, output):
+    flagFile = charFile.replace('-oric.png', '.csv')
 
-#############################
-# Read char and font bitmaps
-charImg = Image.open(charFile)
-charRaw = list(charImg.getdata())
-print "Charset size: {%i,%i}" % (charImg.size[0], charImg.size[1])
+    #############################
+    # Read char and font bitmaps
+    charImg = Image.open(charFile)
+    print "Charset size: {%i,%i}" % (charImg.size[0], charImg.size[1])
 
-############################
-# Prepare image for PictOric
-charImg = charImg.convert("RGB")
-result = Image.new(charImg.mode, (240, 200), (0,0,0))
-result.paste(charImg, (6, 0))
-result.save(pictFile)
+    ##############################################
+    # Place charset after first octet of screen
+    # (levels are normalized over the whole screen)
+    charRGB = numpy.asarray(charImg.convert("RGB"))
+    screen = numpy.zeros((200, 240, 3), dtype=numpy.uint8)
+    screen[0:min(charImg.size[1], 200), 6:min(charImg.size[0]+6, 240)] = charRGB[0:200, 0:234]
 
-###################
-# Call PictOric
-os.system('luajit PictOric.lua ' + dither + ' ' + pictFile + ' ' + output)
+    ###########################################
+    # Dither the 32 lines holding characters
+    # (the lines below do not affect them)
+    pixels = LinearLevels(screen)[screen[0:32]]
+    pixels[pixels.max(axis=2) < darkest] = 0
+    lines = LineCache()
+    data = DitherPicture(pixels, float(dither), lines)
+    lines.Report()
 
-#####################
-# Trim PictOric File
-f1 = io.open(output, 'rb')
-data = f1.read()
-f1.close()
-charData = []
-for pix in range(8):
-    for row in range(4):
-        for col in range(32):
-            charData.append(data[row*8*40+pix*40+col+1])
+    #########################################
+    # Keep 4 rows of 32 chars (by pixel line)
+    charData = data.reshape(4, 8, 40)[:,:,1:33].transpose(1, 0, 2).tostring()
 
-#######################
-# Read character flags
-flagData = [chr(0)] * 128
-with open(flagFile) as csvfile:
-    i = 0
-    rows = csv.reader(csvfile, delimiter=',')
-    for row in rows:
-        for elt in row:
-            flagData[i] = chr(int(elt))
-            i += 1
+    #######################
+    # Read character flags
+    flagData = [chr(0)] * 128
+    with open(flagFile) as csvfile:
+        i = 0
+        rows = csv.reader(csvfile, delimiter=',')
+        for row in rows:
+            for elt in row:
+                flagData[i] = chr(int(elt))
+                i += 1
             
-############################
-# Write output binary file
-f2 = io.open(output, 'wb')
-f2.write(''.join(charData))
-f2.write(''.join(flagData))
-f2.close()
+    ############################
+    # Write output binary file
+    f2 = io.open(output, 'wb')
+    f2.write(charData)
+    f2.write(''.join(flagData))
+    f2.close()
+
+if __name__ == '__main__':
+    dither   = sys.argv[1]
+    charFile = sys.argv[2]
+    output   = sys.argv[3]
+    ConvertCharset(dither, charFile, output)
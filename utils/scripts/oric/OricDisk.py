@@ -0,0 +1,148 @@
+"""
+ * Copyright (c) 2020 Anthony Beaucamp.
+ *
+ * This software is provided 'as-is', without any express or implied warranty.
+ * In no event will the authors be held liable for any damages arising from
+ * the use of this software.
+ *
+ * Permission is granted to anyone to use this software for any purpose,
+ * including commercial applications, and to alter it and redistribute it
+ * freely, subject to the following restrictions:
+ *
+ *   1. The origin of this software must not be misrepresented * you must not
+ *   claim that you wrote the original software. If you use this software in a
+ *   product, an acknowledgment in the product documentation would be
+ *   appreciated but is not required.
+ *
+ *   2. Altered source versions must be plainly marked as such, and must not
+ *   be misrepresented as being the original software.
+ *
+ *   3. This notice may not be removed or altered from any distribution.
+ *
+ *   4. The names of this software and/or it's copyright holders may not be
+ *   used to endorse or promote products derived from this software without
+ *   specific prior written permission.
+"""
+
+#
+# Oric disk builder (replaces the header, tap2dsk and old2mfm chain)
+#
+# Usage: OricDisk.py <image.dsk> <launch.com> [name=file[,address] ...] [@list[,address] ...]
+#
+#   Adds tape headers to all files (load address $A000 unless specified, e.g.
+#   sprites.dat=build/oric/sprites.dat,0x7800) and stores them as programs of a
+#   single tape image. tap2dsk converts this tape into a Sedoric disk in one
+#   run, which is then converted to MFM format in memory. Files named in a
+#   list (such as chunks.lst) are stored under their base name.
+#
+
+import io, os, struct, subprocess, sys
+
+rootDir = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..'))
+
+def Tool(name):
+    # Use bundled binaries if present, otherwise those in the PATH
+    bundled = os.path.join(rootDir, 'utils', 'scripts', 'oric', name)
+    if os.path.exists(bundled) or os.path.exists(bundled + '.exe'):
+        return bundled
+    return name
+
+def Address(arg):
+    # Parse address such as 0xA000 or $A000
+    return int(arg.replace('$', '').replace('0x', ''), 16)
+
+############################################
+# Tape image
+def TapHeader(data, address, name, autorun=False):
+    # Synchro, machine code program, end address (inclusive), start address, name
+    end = address + len(data) - 1
+    if autorun:
+        flag = 0xc7
+    else:
+        flag = 0x00
+    return '\x16\x16\x16\x24\x00\x00\x80' + chr(flag) + struct.pack('>HH', end, address) + '\x00' + name.upper() + '\x00'
+
+def WriteTap(filename, files):
+    # Write list of (name, file, address) as programs of a single tape
+    with io.open(filename, 'wb') as fp:
+        for name, item, address in files:
+            with io.open(item, 'rb') as fin:
+                data = fin.read()
+            fp.write(TapHeader(data, address, name) + data)
+
+############################################
+# MFM disk image
+def CRCTable():
+    table = []
+    for i in range(256):
+        crc = i << 8
+        for j in range(8):
+            if crc & 0x8000:
+                crc = ((crc << 1) ^ 0x1021) & 0xffff
+            else:
+                crc = (crc << 1) & 0xffff
+        table.append(crc)
+    return table
+crcTable = CRCTable()
+
+def CRC(data):
+    # CRC-16-CCITT (as computed by the floppy controller)
+    crc = 0xffff
+    for c in data:
+        crc = ((crc << 8) & 0xffff) ^ crcTable[(crc >> 8) ^ ord(c)]
+    return struct.pack('>H', crc)
+
+def MfmTrack(sectors, track, side, trackSize=6400, gap1=72, gap2=22):
+    # Raw track with ID and data fields for each sector (256 bytes)
+    gap3 = (trackSize - gap1 - len(sectors)*318) / len(sectors)
+    output = '\x4e'*gap1
+    for i in range(len(sectors)):
+        idField = '\xa1\xa1\xa1\xfe' + chr(track) + chr(side) + chr(i+1) + '\x01'
+        dataField = '\xa1\xa1\xa1\xfb' + sectors[i]
+        output += '\x00'*12 + idField + CRC(idField) + '\x4e'*gap2
+        output += '\x00'*12 + dataField + CRC(dataField) + '\x4e'*gap3
+    return output + '\x4e'*(trackSize-len(output))
+
+def ConvertMfm(filename):
+    # Convert Sedoric disk from old format (ORICDISK) to MFM_DISK
+    with io.open(filename, 'rb') as fp:
+        data = fp.read()
+    if data[0:8] != 'ORICDISK':
+        raise IOError("'" + filename + "' is not an Oric disk image")
+    sides, tracks, sectors = struct.unpack('<III', data[8:20])
+    output = 'MFM_DISK' + struct.pack('<III', sides, tracks, 1)
+    output += '\x00'*(256-len(output))
+    offset = 256
+    for side in range(sides):
+        for track in range(tracks):
+            output += MfmTrack([data[offset+i*256:offset+(i+1)*256] for i in range(sectors)], track, side)
+            offset += sectors*256
+    with io.open(filename, 'wb') as fp:
+        fp.write(output)
+
+############################################
+# Build disk from launcher and list of files
+def WriteDisk(image, launcher, files):
+    tape = os.path.splitext(image)[0] + '.tap'
+    WriteTap(tape, files)
+    if subprocess.call([Tool('tap2dsk'), '-iLAUNCH.COM', launcher, tape, image]) != 0:
+        print "Error: cannot create disk '" + image + "'"
+        sys.exit(1)
+    os.remove(tape)
+    ConvertMfm(image)
+    print "Disk (" + image + "): " + str(len(files)+1) + " files"
+
+if __name__ == '__main__':
+    files = []
+    for arg in sys.argv[3:]:
+        address = 0xa000
+        if ',' in arg:
+            arg, address = arg.rsplit(',', 1)
+            address = Address(address)
+        if arg.startswith('@'):
+            with open(arg[1:], "r") as fp:
+                files += [(os.path.basename(line.strip()), line.strip(), address) for line in fp if line.strip() != '']
+        else:
+            name, filename = arg.split('=', 1)
+            files.append((name, filename, address))
+    WriteDisk(sys.argv[1], sys.argv[2], files)
@@ -0,0 +1,337 @@
+"""
+ * Copyright (c) 2020 Anthony Beaucamp.
+ *
+ * This software is provided 'as-is', without any express or implied warranty.
+ * In no event will the authors be held liable for any damages arising from
+ * the use of this software.
+ *
+ * Permission is granted to anyone to use this software for any purpose,
+ * including commercial applications, and to alter it and redistribute it
+ * freely, subject to the following restrictions:
+ *
+ *   1. The origin of this software must not be misrepresented * you must not
+ *   claim that you wrote the original software. If you use this software in a
+ *   product, an acknowledgment in the product documentation would be
+ *   appreciated but is not required.
+ *
+ *   2. Altered source versions must be plainly marked as such, and must not
+ *   be misrepresented as being the original software.
+ *
+ *   3. This notice may not be removed or altered from any distribution.
+ *
+ *   4. The names of this software and/or it's copyright holders may not be
+ *   used to endorse or promote products derived from this software without
+ *   specific prior written permission.
+"""
+
+#
+# Oric "Hires(Noisy)" converter, ported from PictOric.lua (by Samuel DEVULDER)
+#
+#   The picture is scaled to 240x200 in linear RGB, then dithered line by line
+#   in AIC mode (ink 3 on even lines, ink 6 on odd lines). Each octet is either
+#   normal or inverse, whichever gives the least error (ignoring the error
+#   coming from neighbouring octets), and pixels are then dithered with
+#   Ostromoukhov's variable coefficients error diffusion.
+#
+
+import hashlib, io, numpy, os, sys
+from PIL import Image
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from AssetCache import AssetCache
+
+version = 2
+
+width, height = 240, 200
+normalize = 0.0001      # Fraction of pixels allowed to saturate
+aic = [3, 6]            # Ink of even and odd lines
+paper = 0
+tolerance = 0.05        # Margin detection tolerance
+darkest = 4/(255*12.92) # Darker pixels are set to black
+
+# Error modulation thresholds
+t1, t2 = 0.5, 0.667
+
+# Oric palette (in linear RGB)
+palette = [(float(i & 1), float((i >> 1) & 1), float((i >> 2) & 1)) for i in range(8)]
+
+# Ostromoukhov's diffusion coefficients for levels 0-127 (mirrored for 128-255)
+coefficients = [
+    (13, 0, 5), (13, 0, 5), (21, 0, 10), (7, 0, 4), (8, 0, 5), (47, 3, 28), (23, 3, 13), (15, 3, 8),
+    (22, 6, 11), (43, 15, 20), (7, 3, 3), (501, 224, 211), (249, 116, 103), (165, 80, 67), (123, 62, 49), (489, 256, 191),
+    (81, 44, 31), (483, 272, 181), (60, 35, 22), (53, 32, 19), (237, 148, 83), (471, 304, 161), (3, 2, 1), (459, 304, 161),
+    (38, 25, 14), (453, 296, 175), (225, 146, 91), (149, 96, 63), (111, 71, 49), (63, 40, 29), (73, 46, 35), (435, 272, 217),
+    (108, 67, 56), (13, 8, 7), (213, 130, 119), (423, 256, 245), (5, 3, 3), (281, 173, 162), (141, 89, 78), (283, 183, 150),
+    (71, 47, 36), (285, 193, 138), (13, 9, 6), (41, 29, 18), (36, 26, 15), (289, 213, 114), (145, 109, 54), (291, 223, 102),
+    (73, 57, 24), (293, 233, 90), (21, 17, 6), (295, 243, 78), (37, 31, 9), (27, 23, 6), (149, 129, 30), (299, 263, 54),
+    (75, 67, 12), (43, 39, 6), (151, 139, 18), (303, 283, 30), (38, 36, 3), (305, 293, 18), (153, 149, 6), (307, 303, 6),
+    (1, 1, 0), (101, 105, 2), (49, 53, 2), (95, 107, 6), (23, 27, 2), (89, 109, 10), (43, 55, 6), (83, 111, 14),
+    (5, 7, 1), (172, 181, 37), (97, 76, 22), (72, 41, 17), (119, 47, 29), (4, 1, 1), (4, 1, 1), (4, 1, 1),
+    (4, 1, 1), (4, 1, 1), (4, 1, 1), (4, 1, 1), (4, 1, 1), (4, 1, 1), (65, 18, 17), (95, 29, 26),
+    (185, 62, 53), (30, 11, 9), (35, 14, 11), (85, 37, 28), (55, 26, 19), (80, 41, 29), (155, 86, 59), (5, 3, 2),
+    (5, 3, 2), (5, 3, 2), (5, 3, 2), (5, 3, 2), (5, 3, 2), (5, 3, 2), (5, 3, 2), (5, 3, 2),
+    (5, 3, 2), (5, 3, 2), (5, 3, 2), (5, 3, 2), (305, 176, 119), (155, 86, 59), (105, 56, 39), (80, 41, 29),
+    (65, 32, 23), (55, 26, 19), (335, 152, 113), (85, 37, 28), (115, 48, 37), (35, 14, 11), (355, 136, 109), (30, 11, 9),
+    (365, 128, 107), (185, 62, 53), (25, 8, 7), (95, 29, 26), (385, 112, 103), (65, 18, 17), (395, 104, 101), (4, 1, 1) ]
+coefficients = coefficients + coefficients[::-1]
+ostro = []
+for a, b, c in coefficients:
+    d = 1.0/(a+b+c)
+    ostro.append((a*d, b*d, c*d))
+ostro = numpy.array(ostro)
+
+def ToLinear(val):
+    # sRGB level (0-255) to linear intensity
+    val = val/255.0
+    if val <= 0.04045:
+        return val/12.92
+    return ((val+0.055)/1.055)**2.4
+
+linear = numpy.array([ToLinear(i) for i in range(256)])
+
+def Normalization(rgb):
+    # Scale factor, so that only a fraction of the pixels saturate (histogram of max components,
+    # sampled every 4 bytes of the 24 bits BMP rows, as in PictOric.lua)
+    h, w = rgb.shape[0:2]
+    bytesPerRow = 4*((w*3+3)/4)
+    rows = numpy.zeros((h, bytesPerRow), dtype=numpy.uint8)
+    rows[:,0:w*3] = rgb[:,:,::-1].reshape(h, w*3)
+    histo = numpy.bincount(rows.reshape(h, -1, 4)[:,:,0:3].max(axis=2).ravel(), minlength=256).tolist()
+    thr = 0
+    for i in range(256):
+        thr = thr + histo[i]*normalize
+    acc = 0
+    for i in range(255, -1, -1):
+        acc = acc + histo[i]
+        if acc >= thr:
+            norm = linear[i]
+            return 1.0/norm if norm > 0 else None
+
+def ScreenBoxes(size, screen, scale, divisor, center):
+    # Range of picture pixels covered by each screen pixel along one axis
+    pos = numpy.arange(screen+1)*scale/float(divisor)
+    if center:
+        pos = pos + (size - screen*scale/float(divisor))/2
+    pos = numpy.floor(pos).astype(int)
+    start, end = pos[0:-1], pos[1:]
+    return start, numpy.maximum(end, start+1)
+
+def LinearLevels(rgb):
+    # Linear intensity of levels 0-255, normalized for RGB picture (array of shape [h,w,3])
+    levels = linear
+    norm = Normalization(rgb)
+    if norm:
+        levels = levels*norm
+        levels = numpy.where(levels < 1, levels, 1.0)
+    return levels
+
+def LinearPicture(rgb):
+    # Convert RGB picture (array of shape [h,w,3]) to linear RGB screen (shape [200,240,3])
+    h, w = rgb.shape[0:2]
+    pixels = LinearLevels(rgb)[rgb]
+
+    # Average picture pixels covered by each screen pixel (picture is scaled to fit, and centered)
+    if float(w)/h < float(width)/height:
+        x1, x2 = ScreenBoxes(w, width, h, height, True)
+        y1, y2 = ScreenBoxes(h, height, h, height, False)
+    else:
+        x1, x2 = ScreenBoxes(w, width, w, width, False)
+        y1, y2 = ScreenBoxes(h, height, w, width, True)
+    screen = numpy.zeros((height, width, 3))
+    for j in range((y2-y1).max()):
+        for i in range((x2-x1).max()):
+            ys, xs = y1+j, x1+i
+            inside = ((ys < y2) & (ys >= 0) & (ys < h))[:,None] & ((xs < x2) & (xs >= 0) & (xs < w))[None,:]
+            screen += numpy.where(inside[:,:,None], pixels[ys.clip(0,h-1)][:,xs.clip(0,w-1)], 0.0)
+    screen = (1.0/((y2-y1)[:,None]*(x2-x1)[None,:]))[:,:,None] * screen
+    screen[screen.max(axis=2) < darkest] = 0
+
+    # Blank the first octet, unless it is of the same saturated color or grey on each line
+    first = screen[:,0:6]
+    saturated = (abs(abs(first[:,0]-0.5)-0.5) <= tolerance).all(axis=1) & (abs(first - first[:,0:1]) <= tolerance).all(axis=(1,2))
+    mean = (first[:,:,0] + first[:,:,1] + first[:,:,2])/3
+    grey = (abs(first - mean[:,:,None]) <= tolerance).all(axis=(1,2))
+    if not (saturated | grey).all():
+        screen[:,0:6] = 0
+    return screen
+
+def Attenuate(x):
+    # Keep diffused error within -0.5..0.5, but let it overflow a little beyond t2 (as constraints make it accumulate)
+    if x < 0:
+        return -Attenuate(-x)
+    if x < t1:
+        return x
+    if x < t2:
+        return t1
+    if x < 1+t2-t1:
+        return x-t2+t1
+    return 1.0
+
+def AttenuateArray(x):
+    # Same as Attenuate(), on arrays
+    a = abs(x)
+    r = numpy.where(a < t2, t1, numpy.where(a < 1+t2-t1, a-t2+t1, 1.0))
+    return numpy.where(a < t1, x, numpy.where(x < 0, -r, r))
+
+def Distance(r1, g1, b1, c):
+    # Weighted RGB distance (squared)
+    r2, g2, b2 = c
+    rM = (r1+r2)*0.5
+    rM = 0 if rM < 0 else 1 if rM > 1 else rM
+    r, g, b = r1-r2, g1-g2, b1-b2
+    return r*r*(2+rM) + g*g*4 + b*b*(3-rM)
+
+def DistanceArray(c1, c2):
+    # Same as Distance(), on arrays of shape [...,3]
+    rM = ((c1[...,0]+c2[...,0])*0.5).clip(0, 1)
+    r, g, b = c1[...,0]-c2[...,0], c1[...,1]-c2[...,1], c1[...,2]-c2[...,2]
+    return r*r*(2+rM) + g*g*4 + b*b*(3-rM)
+
+def OctetErrors(pixels, errors, z, coefs, fg, bg):
+    # Error of dithering each octet (arrays of shape [n,6,...]) with each pair of colors (fg/bg lists),
+    # neglecting the error coming from other octets (__sam__'s idea #2)
+    fgColor = numpy.array(palette)[fg][:,None,:]
+    bgColor = numpy.array(palette)[bg][:,None,:]
+    differ = (numpy.array(fg) != numpy.array(bg))[:,None]
+    e = numpy.zeros((len(fg),) + pixels.shape[0:1] + (3,))
+    total = 0
+    for k in range(6):
+        e = (e + errors[:,k]) + pixels[:,k]
+        d1, d2 = DistanceArray(e, fgColor), DistanceArray(e, bgColor)
+        useBg = differ & (d2 < d1)
+        total = total + numpy.where(useBg, d2, d1)
+        e = e - numpy.where(useBg[:,:,None], bgColor, fgColor)
+        e = AttenuateArray(e*z[:,k,None]) * coefs[:,k]
+    return total
+
+def DitherLine(pixels, z, coefs, err1, ink, reverse):
+    # Dither line of linear RGB pixels (shape [w,3]), given the error diffused from the line above
+    # (list of w+2 colors). Return line bytes and the error diffused to the next line.
+    w = len(pixels)
+    octets = w/6
+    err2 = [[0.0, 0.0, 0.0] for x in range(w+2)]
+
+    # Choose normal or inverse octets (first octet sets the ink)
+    errors = numpy.array(err1[1:w+1]).reshape(octets, 6, 3)[1:]
+    total = OctetErrors(pixels.reshape(octets, 6, 3)[1:], errors, z.reshape(octets, 6)[1:],
+                        coefs[:,:,0].reshape(octets, 6, 3)[1:], [ink, 7-ink], [paper, 7-paper])
+    inverse = [False] + (total[1] < total[0]).tolist()
+    cmds = [ink] + [192 if inv else 64 for inv in inverse[1:]]
+    fgs = [palette[paper]] + [palette[7-ink] if inv else palette[ink] for inv in inverse[1:]]
+    bgs = [palette[paper]] + [palette[7-paper] if inv else palette[paper] for inv in inverse[1:]]
+
+    # Dither pixels
+    pixels, zs, cs = pixels.tolist(), z.tolist(), coefs.tolist()
+    if reverse:
+        xs, step = range(w-1, -1, -1), -1
+    else:
+        xs, step = range(w), 1
+    for x in xs:
+        pr, pg, pb = pixels[x]
+        e = err1[x+1]
+        er, eg, eb = e[0]+pr, e[1]+pg, e[2]+pb
+        o = x/6
+        d1 = Distance(er, eg, eb, fgs[o])
+        d2 = Distance(er, eg, eb, bgs[o])
+        if d1 <= d2:
+            c = fgs[o]
+            if cmds[o] % 128 >= 64:
+                cmds[o] += 1 << (5-x%6)
+        else:
+            c = bgs[o]
+        er, eg, eb = er-c[0], eg-c[1], eb-c[2]
+
+        # Ostromoukhov's diffusion (to next pixel, and 2 pixels below)
+        zx = zs[x]
+        next, below1, below2 = err1[x+1+step], err2[x+1-step], err2[x+1]
+        for i, v in enumerate((er, eg, eb)):
+            v = Attenuate(v*zx)
+            c1, c2, c3 = cs[x][i]
+            next[i] = next[i] + v*c1
+            below1[i] = below1[i] + v*c2
+            below2[i] = below2[i] + v*c3
+
+    return cmds, err2
+
+class LineCache:
+    # Dithered lines, kept in the asset cache (see AssetCache.py) by blocks of 20 lines, under the
+    # hash of the dithering settings and of all pixels from the top of the picture to the end of the
+    # block (which also determine the error diffused from above), so that pictures sharing their top
+    # part are only dithered from the first block that differs
+    block = 20
+
+    def __init__(self):
+        self.cache = AssetCache()
+        self.reused = 0
+        self.dithered = 0
+
+    def Keys(self, screen, errAtt):
+        # Key of each block of lines
+        digest = hashlib.sha1(repr(['PictOric', version, errAtt, screen.shape[1]]))
+        keys = []
+        for y in range(0, screen.shape[0], self.block):
+            digest.update(numpy.ascontiguousarray(screen[y:y+self.block]).tostring())
+            keys.append(digest.hexdigest())
+        return keys
+
+    def Load(self, key, width):
+        # Return bytes of block (shape [n,width]) and error diffused to next line (or None)
+        blobs = self.cache.Load(key)
+        if blobs is None:
+            return None
+        data = numpy.fromstring(blobs[0], dtype=numpy.uint8).reshape(-1, width)
+        self.reused += len(data)
+        return data, numpy.fromstring(blobs[1]).reshape(-1, 3).tolist()
+
+    def Save(self, key, data, err):
+        self.cache.Save(key, [data.tostring(), numpy.array(err).tostring()])
+
+    def Report(self):
+        print "Line cache: %i lines reused, %i lines dithered" % (self.reused, self.dithered)
+
+def DitherPicture(screen, errAtt, lines=None):
+    # Dither linear RGB screen (shape [h,w,3]) to Oric hires bytes (shape [h,w/6]), using cache of lines if provided
+    h, w = screen.shape[0:2]
+    z = 1+(errAtt-1)*screen.max(axis=2)
+    coefs = ostro[numpy.floor(1.5+255*screen).astype(int)-1]
+    data = numpy.zeros((h, w/6), dtype=numpy.uint8)
+    err = [[0.0, 0.0, 0.0] for x in range(w+2)]  # Error diffused to current line (with 1 pixel margin on each side)
+
+    # Reuse blocks of lines dithered before (until the first block that differs)
+    keys = []
+    start = 0
+    if lines and lines.cache.Enabled():
+        keys = lines.Keys(screen, errAtt)
+        for key in keys:
+            block = lines.Load(key, w/6)
+            if block is None:
+                break
+            data[start:start+len(block[0])], err = block
+            start += len(block[0])
+
+    for y in range(start, h):
+        # Serpentine order (odd lines from right to left)
+        ink, reverse = aic[y%2], y%2 == 1
+        data[y], err = DitherLine(screen[y], z[y], coefs[y], err, ink, reverse)
+        if keys:
+            lines.dithered += 1
+            if (y+1) % lines.block == 0 or y == h-1:
+                lines.Save(keys[y/lines.block], data[y/lines.block*lines.block:y+1], err)
+    return data
+
+#############################################
+# Convert picture to Oric "Hires(Noisy)" format
+def ConvertPicture(dither, input, output):
+    rgb = numpy.asarray(Image.open(input).convert('RGB'))
+    lines = LineCache()
+    data = DitherPicture(LinearPicture(rgb), float(dither), lines)
+    lines.Report()
+    f2 = io.open(output, 'wb')
+    f2.write(data.tostring())
+    f2.close()
+
+if __name__ == '__main__':
+    dither = sys.argv[1]
+    input  = sys.argv[2]
+    output = sys.argv[3]
+    ConvertPicture(dither, input, output)
@@ -1,87 +1,151 @@
+import io, numpy, os, struct, sys
+from multiprocessing import Pool, cpu_count
+from OricBitmap import ConvertBitmap
+from PictOric import ConvertPicture
 
-import io, os, struct, sys, subprocess
+version = 1
 
-############################################    
-# Process chunks definition file
-algorithm = sys.argv[1]
-dithering = sys.argv[2]
-chunkDefs = sys.argv[3]
-outfolder = sys.argv[4]
-
-script = open(chunkDefs, "r")
-lines = script.readlines() 
-script.close()
-
-listing = open(outfolder+'chunks.lst', "w")
-sourceindex = 0;
-sources = dict()
-
-for line in lines:
-    # Skip comments
-    if line[0] != '\'':
-        continue
-        
-    # Parse chunk filename
-    offset1 = 1
-    offset2 = 1
-    while line[offset2] != '\'':
+scriptDir = os.path.dirname(os.path.abspath(__file__))
+
+############################################
+# Parse chunks definition file
+def ParseChunks(chunkDefs, outfolder):
+    # Return list of chunks: (input file, output file, [x,y,w,h])
+    script = open(chunkDefs, "r")
+    lines = script.readlines()
+    script.close()
+
+    chunks = []
+    for line in lines:
+        # Skip comments
+        if line[0] != '\'':
+            continue
+
+        # Parse chunk filename
+        offset1 = 1
+        offset2 = 1
+        while line[offset2] != '\'':
+            offset2 += 1
+        infile = os.path.dirname(chunkDefs) + '/' + line[offset1:offset2]
+
+        # Skip to next '
         offset2 += 1
-    infile = os.path.dirname(chunkDefs) + '/' + line[offset1:offset2]
-    
-    # Skip to next '
-    offset2 += 1
-    while line[offset2] != '\'':
+        while line[offset2] != '\'':
+            offset2 += 1
         offset2 += 1
-    offset2 += 1
 
-    # Parse output filename
-    offset1 = offset2
-    while line[offset2] != '\'':
-        offset2 += 1
-    outfile = outfolder + '/' + line[offset1:offset2]
-    outfile = outfile.replace('//','/')
+        # Parse output filename
+        offset1 = offset2
+        while line[offset2] != '\'':
+            offset2 += 1
+        outfile = outfolder + '/' + line[offset1:offset2]
+        outfile = outfile.replace('//','/')
 
-    # Skip to next [
-    while line[offset2] != '[':
-        offset2 += 1
-    offset2 += 1    
-    
-    # Parse coordinates
-    offset1 = offset2
-    while line[offset2] != ']':
+        # Skip to next [
+        while line[offset2] != '[':
+            offset2 += 1
         offset2 += 1
-    coords = [int(s) for s in line[offset1:offset2].split(',')]
 
-    # Convert file to oric graphic
-    if infile in sources:    
-        sourcefile = sources[infile]
+        # Parse coordinates
+        offset1 = offset2
+        while line[offset2] != ']':
+            offset2 += 1
+        coords = [int(s) for s in line[offset1:offset2].split(',')]
+        chunks.append((infile, outfile, coords))
+    return chunks
+
+def SourceInputs(algorithm, infile):
+    # Files that the conversion of a source image depends on
+    if algorithm == "Hires(Noisy)":
+        return [infile, os.path.join(scriptDir, 'PictOric.py')]
+    return [infile, os.path.join(scriptDir, 'OricBitmap.py'), os.path.join(scriptDir, '..', 'Palette.py'), os.path.join(scriptDir, '..', 'ImageCache.py')]
+
+############################################
+# Convert source images to oric graphics
+def ConvertSources(algorithm, dithering, infiles, outfolder, cache=None, scriptHashes=[]):
+    # Return dict of converted images (as arrays of 200*40 bytes)
+    sources = {}
+    jobs = []
+    for infile in infiles:
+        # Check asset cache (keyed by image contents and conversion settings)
+        key = None
+        if cache:
+            key = cache.Key(['OricSource', version, algorithm, dithering] + scriptHashes, SourceInputs(algorithm, infile))
+            blobs = cache.Load(key)
+            if blobs is not None:
+                sources[infile] = blobs[0]
+                continue
+        sourcefile = outfolder + "/source" + str(len(jobs)) + ".dat"
+        jobs.append((infile, sourcefile.replace('//','/'), key))
+
+    # Convert missing sources concurrently (one process per core)
+    if algorithm == "Hires(Noisy)":
+        function, args = ConvertPicture, [(dithering, infile, sourcefile) for infile, sourcefile, key in jobs]
+    else:
+        function, args = ConvertBitmap, [(infile, sourcefile) for infile, sourcefile, key in jobs]
+    workers = min(len(jobs), cpu_count())
+    if workers > 1:
+        pool = Pool(workers)
+        results = [pool.apply_async(function, item) for item in args]
+        pool.close()
+        for result in results:
+            result.get()
+        pool.join()
     else:
-        sourcefile = outfolder + "/source" + str(sourceindex) + ".dat"
-        sourcefile = sourcefile.replace('//','/')
-        sourceindex += 1
-        if algorithm == "Hires(Noisy)":
-            subprocess.call(["luajit.exe", "PictOric.lua", dithering, infile, sourcefile])
-        else:
-            subprocess.call(["..\\..\\py27\\python", "OricBitmap.py", infile, sourcefile])
-        sources[infile] = sourcefile
-
-    # Read the entire image
-    f1 = io.open(sourcefile, 'rb')
-    data = f1.read()
-    f1.close()
-    
-    # Only keep the relevant block of converted file
-    f2 = io.open(outfile, 'wb')
-    f2.write(chr(coords[0]))
-    f2.write(chr(coords[1]))
-    f2.write(chr(coords[2]))
-    f2.write(chr(coords[3]))   
-    for y in range(coords[1], coords[1]+coords[3], 1):
-        for x in range(coords[0], coords[0]+coords[2], 6):
-            f2.write(data[y*40+x/6])
-    f2.close()
-
-    # Add file to list
-    listing.write(outfile.replace("../../../","")+'\n')
-    
-listing.close()
+        for item in args:
+            function(*item)
+
+    # Read each converted file once
+    for infile, sourcefile, key in jobs:
+        f1 = io.open(sourcefile, 'rb')
+        sources[infile] = f1.read()
+        f1.close()
+        if cache:
+            cache.Save(key, [sources[infile]])
+    for infile in sources:
+        sources[infile] = numpy.fromstring(sources[infile], dtype=numpy.uint8)
+    return sources
+
+############################################
+# Process chunks definition file
+def ProcessChunks(algorithm, dithering, chunkDefs, outfolder, cache=None, scriptHashes=[]):
+    chunks = ParseChunks(chunkDefs, outfolder)
+
+    # Check asset cache
+    missing = []
+    infiles = []
+    for infile, outfile, coords in chunks:
+        key = None
+        if cache:
+            key = cache.Key(['OricChunks', version, algorithm, dithering, coords] + scriptHashes, SourceInputs(algorithm, infile))
+            if cache.Fetch(key, [outfile]):
+                continue
+        missing.append((infile, outfile, coords, key))
+        if infile not in infiles:
+            infiles.append(infile)
+
+    # Convert each source once, then only keep the relevant block of each chunk
+    sources = ConvertSources(algorithm, dithering, infiles, outfolder, cache, scriptHashes)
+    for infile, outfile, coords, key in missing:
+        x, y, w, h = coords
+        octets = x/6 + numpy.arange(len(range(x, x+w, 6)))
+        block = sources[infile][numpy.arange(y, y+h)[:,None]*40 + octets[None,:]]
+        f2 = io.open(outfile, 'wb')
+        f2.write(''.join([chr(c) for c in coords]))
+        f2.write(block.tostring())
+        f2.close()
+        if cache:
+            cache.Store(key, [outfile])
+
+    # List files (in order of definition)
+    listing = open(outfolder+'chunks.lst', "w")
+    for infile, outfile, coords in chunks:
+        listing.write(outfile.replace("../../../","")+'\n')
+    listing.close()
+
+if __name__ == '__main__':
+    algorithm = sys.argv[1]
+    dithering = sys.argv[2]
+    chunkDefs = sys.argv[3]
+    outfolder = sys.argv[4]
+    ProcessChunks(algorithm, dithering, chunkDefs, outfolder)